@@ -0,0 +1,9 @@
+"""Безголовые (без Blender) инструменты для работы с мешами деталей.
+
+Единственная зависимость — NumPy. Модули запускаются из корня репозитория,
+например: python -m meshtools.mesh_diff a.stl b.stl
+"""
+from meshtools.bvh import BVH
+from meshtools.mesh import Mesh, from_triangles, make_mesh, merge, transformed, triangles
+from meshtools.mesh_diff import compare_meshes
+from meshtools.stl_io import read_stl, write_stl
@@ -0,0 +1,235 @@
+"""Компактный архив мешей: квантованные индексированные вершины и сжатые индексы.
+
+Пример:
+    python -m meshtools.archive pack "3DScrog/Corner 2.85mm.v2024.12.18.stl"
+    python -m meshtools.archive unpack "3DScrog/Corner 2.85mm.v2024.12.18.meshz" -o corner.stl
+    python -m meshtools.archive info "3DScrog/Corner 2.85mm.v2024.12.18.meshz"
+
+Формат файла: сигнатура MESHZ, версия, длина заголовка, JSON-заголовок
+(границы, шаг сетки, параметры генератора, таблица потоков) и один сжатый
+блок с потоками. Вершины квантуются на сетку (по умолчанию 1 мкм), совпавшие
+после квантования сливаются. Вершины нумеруются в порядке первого появления
+в гранях, координаты и индексы хранятся разностями в zigzag-кодировке,
+байты каждого потока разложены по плоскостям - так их лучше сжимает lzma.
+"""
+import argparse
+import json
+import lzma
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from meshtools.mesh import make_mesh
+from meshtools.stl_io import read_stl, write_stl
+
+MAGIC = b"MESHZ"
+VERSION = 1
+PREAMBLE = struct.Struct("<5sBI")
+DEFAULT_QUANTUM = 0.001
+ARCHIVE_SUFFIX = ".meshz"
+CODECS = {
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+    "none": (bytes, bytes),
+}
+
+
+# --- 1. Потоки целых чисел ---
+def _zigzag(values):
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values):
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def _encode_stream(values):
+    """Беззнаковые значения -> (байты по плоскостям, ширина в байтах)."""
+    values = np.asarray(values, dtype=np.uint64)
+    top = int(values.max(initial=0))
+    width = 1 if top < 2 ** 8 else 2 if top < 2 ** 16 else 4 if top < 2 ** 32 else 8
+    planes = values.astype(f"<u{width}").view(np.uint8).reshape(-1, width).T
+    return np.ascontiguousarray(planes).tobytes(), width
+
+
+def _decode_stream(buffer, width, count):
+    planes = np.frombuffer(buffer, dtype=np.uint8, count=width * count).reshape(width, count)
+    return np.ascontiguousarray(planes.T).view(f"<u{width}").ravel().astype(np.uint64)
+
+
+# --- 2. Кодирование ---
+def quantize(mesh, quantum=DEFAULT_QUANTUM):
+    """Квантует вершины на сетку и сливает совпавшие.
+
+    Возвращает (целые координаты от origin, грани, origin); вырожденные
+    после квантования грани отбрасываются.
+    """
+    origin = np.floor(mesh.vertices.min(axis=0) / quantum) * quantum if len(mesh.vertices) else np.zeros(3)
+    grid = np.rint((mesh.vertices - origin) / quantum).astype(np.int64)
+    grid, inverse = np.unique(grid, axis=0, return_inverse=True)
+    faces = inverse.ravel()[mesh.faces]
+    valid = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    return grid, faces[valid], origin
+
+
+def _reorder(grid, faces):
+    """Нумерация вершин по первому появлению, минимальный индекс грани - первым, грани по порядку."""
+    flat = faces.ravel()
+    first = np.full(len(grid), len(flat), dtype=np.int64)
+    np.minimum.at(first, flat, np.arange(len(flat)))
+    used = np.flatnonzero(first < len(flat))
+    order = used[np.argsort(first[used], kind="stable")]
+    rank = np.empty(len(grid), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    faces = rank[faces]
+    # Циклический сдвиг сохраняет обход грани
+    shift = np.argmin(faces, axis=1)
+    faces = np.take_along_axis(faces, (np.arange(3)[None, :] + shift[:, None]) % 3, axis=1)
+    faces = faces[np.lexsort((faces[:, 2], faces[:, 1], faces[:, 0]))]
+    return grid[order], faces
+
+
+def encode(mesh, quantum=DEFAULT_QUANTUM, params=None, codec="lzma"):
+    """Упаковывает меш в байты архива."""
+    grid, faces, origin = quantize(mesh, quantum)
+    grid, faces = _reorder(grid, faces)
+    streams = {
+        "x": _zigzag(np.diff(grid[:, 0], prepend=0)),
+        "y": _zigzag(np.diff(grid[:, 1], prepend=0)),
+        "z": _zigzag(np.diff(grid[:, 2], prepend=0)),
+        # Первые индексы граней не убывают; остальные - относительно первого
+        "f0": np.diff(faces[:, 0], prepend=0).astype(np.uint64),
+        "f1": _zigzag(faces[:, 1] - faces[:, 0]),
+        "f2": _zigzag(faces[:, 2] - faces[:, 0]),
+    }
+    table = []
+    chunks = []
+    for name, values in streams.items():
+        data, width = _encode_stream(values)
+        table.append({"name": name, "width": width, "count": len(values)})
+        chunks.append(data)
+    vertices = origin + grid * quantum
+    header = {
+        "version": VERSION,
+        "codec": codec,
+        "quantum": quantum,
+        "origin": origin.tolist(),
+        "bounds": [vertices.min(axis=0).tolist(), vertices.max(axis=0).tolist()] if len(vertices) else None,
+        "vertex_count": len(grid),
+        "face_count": len(faces),
+        "streams": table,
+        "params": params or {},
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    payload = CODECS[codec][0](b"".join(chunks))
+    return PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)) + header_bytes + payload
+
+
+# --- 3. Декодирование ---
+def read_header(data):
+    """Заголовок архива и смещение сжатого блока."""
+    if len(data) < PREAMBLE.size:
+        raise ValueError("Не архив meshz: файл короче заголовка.")
+    magic, version, size = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Не архив meshz: неверная сигнатура.")
+    if not 1 <= version <= VERSION:
+        raise ValueError(f"Архив версии {version} не поддерживается (1-{VERSION}).")
+    if len(data) < PREAMBLE.size + size:
+        raise ValueError("Архив обрезан: заголовок неполный.")
+    # JSONDecodeError и UnicodeDecodeError - подклассы ValueError
+    header = json.loads(bytes(data[PREAMBLE.size:PREAMBLE.size + size]).decode("utf-8"))
+    if not isinstance(header, dict) or header.get("codec") not in CODECS:
+        raise ValueError("Поврежденный заголовок архива.")
+    return header, PREAMBLE.size + size
+
+
+def decode(data):
+    """Байты архива -> (Mesh, заголовок)."""
+    header, offset = read_header(data)
+    payload = CODECS[header["codec"]][1](bytes(data[offset:]))
+    streams = {}
+    position = 0
+    for entry in header["streams"]:
+        size = entry["width"] * entry["count"]
+        streams[entry["name"]] = _decode_stream(payload[position:position + size], entry["width"], entry["count"])
+        position += size
+    grid = np.stack([np.cumsum(_unzigzag(streams[axis])) for axis in "xyz"], axis=1)
+    first = np.cumsum(streams["f0"].view(np.int64))
+    faces = np.stack([first, first + _unzigzag(streams["f1"]), first + _unzigzag(streams["f2"])], axis=1)
+    vertices = np.asarray(header["origin"]) + grid * header["quantum"]
+    return make_mesh(vertices, faces), header
+
+
+def write_archive(path, mesh, quantum=DEFAULT_QUANTUM, params=None, codec="lzma"):
+    data = encode(mesh, quantum, params, codec)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def read_archive(path):
+    """Читает архив: (Mesh, заголовок)."""
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def archive_to_stl(path, output):
+    mesh, _ = read_archive(path)
+    write_stl(output, mesh)
+    return mesh
+
+
+# --- 4. Командная строка ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Компактный архив мешей (.meshz).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="STL -> .meshz")
+    pack.add_argument("inputs", nargs="+", help="STL-файлы")
+    pack.add_argument("-o", "--output", help="выходной файл (только для одного входа)")
+    pack.add_argument("--quantum", type=float, default=DEFAULT_QUANTUM, help="шаг сетки, мм")
+    pack.add_argument("--codec", choices=sorted(CODECS), default="lzma")
+    pack.add_argument("--params", help="JSON-файл параметров генератора для заголовка")
+    unpack = commands.add_parser("unpack", help=".meshz -> STL")
+    unpack.add_argument("inputs", nargs="+", help="архивы .meshz")
+    unpack.add_argument("-o", "--output", help="выходной STL (только для одного входа)")
+    info = commands.add_parser("info", help="заголовок архива")
+    info.add_argument("inputs", nargs="+")
+    args = parser.parse_args(argv)
+
+    if getattr(args, "output", None) and len(args.inputs) > 1:
+        parser.error("-o допустим только с одним входным файлом")
+    if args.command == "pack":
+        params = None
+        if args.params:
+            with open(args.params, encoding="utf-8") as f:
+                params = json.load(f)
+        for path in args.inputs:
+            output = args.output or os.path.splitext(path)[0] + ARCHIVE_SUFFIX
+            mesh = read_stl(path, tolerance=args.quantum / 2)
+            size = write_archive(output, mesh, args.quantum, params, args.codec)
+            print(f"{path} -> {output}: {os.path.getsize(path)} -> {size} байт "
+                  f"({len(mesh.vertices)} вершин, {len(mesh.faces)} треугольников)")
+    elif args.command == "unpack":
+        for path in args.inputs:
+            output = args.output or os.path.splitext(path)[0] + ".stl"
+            mesh = archive_to_stl(path, output)
+            print(f"{path} -> {output}: {len(mesh.faces)} треугольников")
+    else:
+        for path in args.inputs:
+            with open(path, "rb") as f:
+                header, _ = read_header(f.read())
+            header.pop("streams")
+            print(f"{path}: {json.dumps(header, ensure_ascii=False, indent=2)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
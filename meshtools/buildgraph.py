@@ -0,0 +1,289 @@
+"""Граф шагов сборки с кэшированием промежуточных мешей.
+
+Рецепт генератора - набор чистых шагов. Ключ шага - хэш его имени, версии,
+байткода функции и вызываемых ею функций пакета, используемых параметров и
+ключей входных шагов, поэтому ключи всего графа известны до запуска, а правка
+кода шага или его помощников в других модулях не отдает старый результат из
+кэша. Результаты (меши) берутся из LRU-кэша в памяти, затем
+с диска; недостающие шаги считаются в пуле потоков или процессов, независимые
+ветви - параллельно.
+"""
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+import types
+
+import numpy as np
+
+from meshtools.mesh import make_mesh
+
+# Шаг: fn(*результаты deps, params) -> Mesh; params - имена используемых параметров
+Step = collections.namedtuple("Step", ["name", "fn", "params", "deps", "version"], defaults=((), ""))
+
+DEFAULT_CACHE_DIR = ".meshcache"
+
+
+# --- 1. Кэши ---
+def mesh_nbytes(mesh):
+    return mesh.vertices.nbytes + mesh.faces.nbytes
+
+
+class MemoryCache:
+    """LRU-кэш мешей в памяти с ограничением по объему."""
+
+    def __init__(self, max_bytes=512 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        mesh = self.entries.get(key)
+        if mesh is not None:
+            self.entries.move_to_end(key)
+        return mesh
+
+    def put(self, key, mesh):
+        if key in self.entries:
+            self.size -= mesh_nbytes(self.entries.pop(key))
+        self.entries[key] = mesh
+        self.size += mesh_nbytes(mesh)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= mesh_nbytes(evicted)
+
+
+class DiskCache:
+    """Кэш мешей в .npz-файлах; при переполнении удаляются давно не читанные."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=2 * 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                mesh = make_mesh(data["vertices"], data["faces"])
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        # Время изменения файла служит отметкой последнего использования
+        os.utime(path)
+        return mesh
+
+    def put(self, key, mesh):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, vertices=mesh.vertices, faces=mesh.faces)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        evict_lru(self.directory, self.max_bytes, (".npz",))
+
+
+def evict_lru(directory, max_bytes, suffixes):
+    """Удаляет файлы с данными окончаниями, начиная с самых старых по mtime, пока объем больше max_bytes."""
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffixes):
+            stat = entry.stat()
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# --- 2. Граф ---
+def _const_repr(value):
+    # Порядок frozenset зависит от PYTHONHASHSEED, а ключи должны совпадать между процессами
+    if isinstance(value, frozenset):
+        return repr(sorted(map(_const_repr, value)))
+    if isinstance(value, tuple):
+        return "(" + ", ".join(map(_const_repr, value)) + ")"
+    return repr(value)
+
+
+def _package_functions(value, names):
+    """Функции пакета meshtools за значением глобального имени: сама функция, методы класса
+    или атрибуты модуля из names (обращение вида module.name)."""
+    package = __name__.split(".")[0]
+
+    def ours(obj):
+        return getattr(obj, "__module__", None) is not None and obj.__module__.split(".")[0] == package
+
+    if isinstance(value, types.ModuleType):
+        if value.__name__.split(".")[0] != package:
+            return []
+        candidates = [getattr(value, name, None) for name in names]
+    elif isinstance(value, type):
+        candidates = list(vars(value).values()) if ours(value) else []
+    else:
+        candidates = [value]
+    # Обертки вроде lru_cache хранят исходную функцию в __wrapped__
+    candidates = [getattr(obj, "__wrapped__", obj) for obj in candidates]
+    return [obj for obj in candidates if isinstance(obj, types.FunctionType) and ours(obj)]
+
+
+def code_hash(fn):
+    """Хэш байткода функции с константами, вложенными функциями и всеми функциями пакета
+    meshtools, до которых она доходит через глобальные имена (в любом модуле пакета).
+
+    Функции сторонних библиотек не входят; вызовы через данные (словари функций)
+    не отслеживаются - при изменении их поведения поднимайте version шага.
+    """
+    digest = hashlib.sha256()
+    pending, seen = [fn], set()
+    while pending:
+        item = pending.pop()
+        # Функция несет свои глобальные имена, вложенный код - глобальные имена владельца
+        code, scope = (item.__code__, item) if isinstance(item, types.FunctionType) else item
+        if code in seen:
+            continue
+        seen.add(code)
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                pending.append((const, scope))
+            else:
+                digest.update(_const_repr(const).encode())
+        if scope is item:
+            for cell in item.__closure__ or ():
+                pending.extend(_package_functions(cell.cell_contents, code.co_names))
+        for name in code.co_names:
+            pending.extend(_package_functions(scope.__globals__.get(name), code.co_names))
+    return digest.hexdigest()[:16]
+
+
+def _timed(fn, inputs, params):
+    start = time.perf_counter()
+    value = fn(*inputs, params)
+    return value, time.perf_counter() - start
+
+
+class BuildGraph:
+    """Исполнитель рецепта из шагов Step.
+
+    После build() в last_report для каждого затронутого шага лежит пара
+    (источник, секунды), где источник - "memory", "disk" или "computed".
+    """
+
+    def __init__(self, steps, memory=None, disk=None, workers=4, executor="thread"):
+        self.steps = {step.name: step for step in steps}
+        self.order = [step.name for step in steps]
+        for step in steps:
+            missing = [d for d in step.deps if d not in self.steps or self.order.index(d) > self.order.index(step.name)]
+            if missing:
+                raise ValueError(f"Шаг {step.name!r}: входы {missing} не объявлены раньше него.")
+        self.code = {step.name: code_hash(step.fn) for step in steps}
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+        self.workers = workers
+        self.executor = executor
+        self._pool = None
+        self.last_report = {}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_pool(self):
+        if self._pool is None:
+            cls = (concurrent.futures.ProcessPoolExecutor if self.executor == "process"
+                   else concurrent.futures.ThreadPoolExecutor)
+            self._pool = cls(max_workers=self.workers)
+        return self._pool
+
+    def keys(self, params):
+        """Ключи всех шагов для данного набора параметров."""
+        keys = {}
+        for name in self.order:
+            step = self.steps[name]
+            payload = json.dumps({
+                "step": name,
+                "fn": f"{step.fn.__module__}.{step.fn.__qualname__}",
+                "version": step.version,
+                "code": self.code[name],
+                "params": {p: params[p] for p in step.params},
+                "deps": [keys[d] for d in step.deps],
+            }, sort_keys=True)
+            keys[name] = hashlib.sha256(payload.encode()).hexdigest()[:32]
+        return keys
+
+    def _lookup(self, key):
+        mesh = self.memory.get(key)
+        if mesh is not None:
+            return mesh, "memory"
+        if self.disk is not None:
+            mesh = self.disk.get(key)
+            if mesh is not None:
+                self.memory.put(key, mesh)
+                return mesh, "disk"
+        return None, None
+
+    def build(self, params, target=None):
+        """Возвращает результат шага target (по умолчанию последнего), считая только недостающее."""
+        target = target or self.order[-1]
+        keys = self.keys(params)
+        values = {}
+        report = {}
+        pending = set()
+
+        # Обход назад от цели: входы нужны только тем шагам, которых нет в кэше
+        stack = [target]
+        while stack:
+            name = stack.pop()
+            if name in values or name in pending:
+                continue
+            start = time.perf_counter()
+            mesh, source = self._lookup(keys[name])
+            if mesh is not None:
+                values[name] = mesh
+                report[name] = (source, time.perf_counter() - start)
+                continue
+            pending.add(name)
+            stack.extend(self.steps[name].deps)
+
+        running = {}
+        while pending or running:
+            ready = [n for n in pending if all(d in values for d in self.steps[n].deps)]
+            for name in sorted(ready, key=self.order.index):
+                pending.discard(name)
+                step = self.steps[name]
+                inputs = [values[d] for d in step.deps]
+                step_params = {p: params[p] for p in step.params}
+                running[self._get_pool().submit(_timed, step.fn, inputs, step_params)] = name
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                mesh, seconds = future.result()
+                mesh = make_mesh(mesh.vertices, mesh.faces)
+                values[name] = mesh
+                report[name] = ("computed", seconds)
+                self.memory.put(keys[name], mesh)
+                if self.disk is not None:
+                    self.disk.put(keys[name], mesh)
+
+        self.last_report = report
+        return values[target]
@@ -0,0 +1,342 @@
+"""Запросы ближайшей точки к треугольной сетке: BVH по кривой Мортона и воксельный хеш.
+
+Треугольники сортируются по кодам Мортона центров и раскладываются по листьям
+полного бинарного дерева в массиве; обход идет векторно для целой пачки
+точек. Воксельный хеш (ячейка -> треугольники) дает быстрый первый кандидат,
+так что у большинства точек дерево отсекается почти сразу.
+
+Знак в signed_distance берется по псевдонормали ближайшего элемента
+(Bærentzen, Aanæs): нормаль грани, сумма нормалей двух граней ребра или
+сумма нормалей граней вершины, взвешенных углами при ней. Для замкнутой
+поверхности без самопересечений такой знак верен и у острых ребер, где
+нормаль одной ближайшей грани может смотреть не туда. Вершины треугольников
+сравниваются точно, так что суп из треугольников меша сваривается без допуска.
+"""
+import numpy as np
+
+# --- 1. Вспомогательные функции ---
+def _dot(u, v):
+    return np.einsum("ij,ij->i", u, v)
+
+
+def _expand_bits(v):
+    """Раздвигает 21 младший бит так, чтобы между ними было по два нулевых (для кода Мортона)."""
+    v = v.astype(np.uint64) & np.uint64(0x1FFFFF)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_codes(points, lo, hi):
+    """63-битные коды Мортона для точек внутри бокса [lo, hi]."""
+    extent = np.where(hi - lo > 0, hi - lo, 1.0)
+    cells = np.clip((points - lo) / extent * 2097151.0, 0, 2097151).astype(np.uint64)
+    return (_expand_bits(cells[:, 0]) << np.uint64(2)) | (_expand_bits(cells[:, 1]) << np.uint64(1)) | _expand_bits(cells[:, 2])
+
+
+def box_distance2(points, box_min, box_max):
+    """Квадрат расстояния от точек до боксов (поэлементно)."""
+    d = np.maximum(np.maximum(box_min - points, points - box_max), 0.0)
+    return np.einsum("ij,ij->i", d, d)
+
+
+def box_far_distance2(points, box_min, box_max):
+    """Квадрат расстояния от точек до самых дальних углов боксов (верхняя оценка для содержимого)."""
+    d = np.maximum(np.abs(points - box_min), np.abs(points - box_max))
+    return np.einsum("ij,ij->i", d, d)
+
+
+def closest_point_on_triangles(p, a, b, c):
+    """Ближайшие точки на треугольниках (a, b, c) к точкам p; все массивы (k, 3)."""
+    ab, ac = b - a, c - a
+    ap, bp, cp = p - a, p - b, p - c
+    d1 = np.einsum("ij,ij->i", ab, ap)
+    d2 = np.einsum("ij,ij->i", ac, ap)
+    d3 = np.einsum("ij,ij->i", ab, bp)
+    d4 = np.einsum("ij,ij->i", ac, bp)
+    d5 = np.einsum("ij,ij->i", ab, cp)
+    d6 = np.einsum("ij,ij->i", ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Внутренняя область треугольника
+        denom = va + vb + vc
+        v = np.where(denom != 0, vb / denom, 0.0)
+        w = np.where(denom != 0, vc / denom, 0.0)
+        result = a + ab * v[:, None] + ac * w[:, None]
+
+        # Ребро BC
+        e1, e2 = d4 - d3, d5 - d6
+        mask = (va <= 0) & (e1 >= 0) & (e2 >= 0)
+        t = np.where(e1 + e2 != 0, e1 / (e1 + e2), 0.0)
+        result = np.where(mask[:, None], b + (c - b) * t[:, None], result)
+
+        # Ребро AC
+        mask = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        t = np.where(d2 - d6 != 0, d2 / (d2 - d6), 0.0)
+        result = np.where(mask[:, None], a + ac * t[:, None], result)
+
+        # Вершина C
+        result = np.where(((d6 >= 0) & (d5 <= d6))[:, None], c, result)
+
+        # Ребро AB
+        mask = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        t = np.where(d1 - d3 != 0, d1 / (d1 - d3), 0.0)
+        result = np.where(mask[:, None], a + ab * t[:, None], result)
+
+    # Вершины B и A
+    result = np.where(((d3 >= 0) & (d4 <= d3))[:, None], b, result)
+    result = np.where(((d1 <= 0) & (d2 <= 0))[:, None], a, result)
+    return result
+
+
+# --- 2. Воксельный хеш ---
+class VoxelHash:
+    """Разреженная равномерная сетка: ячейка -> треугольники, чьи боксы ее задевают.
+
+    Треугольники, занимающие больше `max_cells` ячеек (крупные плоские грани),
+    в хеш не попадают - их находит обход BVH.
+    """
+
+    OFFSET = 1 << 20
+
+    def __init__(self, tri_min, tri_max, cell=None, max_cells=27):
+        if cell is None:
+            extent = (tri_max - tri_min).max(axis=1) if len(tri_min) else np.ones(1)
+            cell = float(np.median(extent)) or 1.0
+        self.cell = cell
+        lo = np.floor(tri_min / cell).astype(np.int64)
+        span = np.floor(tri_max / cell).astype(np.int64) - lo + 1
+        count = span.prod(axis=1) if len(lo) else np.zeros(0, dtype=np.int64)
+        small = np.flatnonzero(count <= max_cells)
+        tri = np.repeat(small, count[small])
+        # Номер ячейки внутри бокса треугольника раскладывается по осям
+        local = np.arange(len(tri)) - np.repeat(np.cumsum(count[small]) - count[small], count[small])
+        sy, sz = span[tri, 1], span[tri, 2]
+        cells = lo[tri] + np.stack([local // (sy * sz), (local // sz) % sy, local % sz], axis=1)
+        keys = self._keys(cells)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.tri = tri[order]
+
+    def _keys(self, cells):
+        cells = np.clip(cells + self.OFFSET, 0, 2 * self.OFFSET - 1)
+        return (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+
+    def candidates(self, points):
+        """Пары (индекс точки, треугольник) для треугольников из ячейки каждой точки."""
+        keys = self._keys(np.floor(points / self.cell).astype(np.int64))
+        start = np.searchsorted(self.keys, keys, side="left")
+        stop = np.searchsorted(self.keys, keys, side="right")
+        count = stop - start
+        q = np.repeat(np.arange(len(points)), count)
+        offset = np.arange(len(q)) - np.repeat(np.cumsum(count) - count, count)
+        return q, self.tri[np.repeat(start, count) + offset]
+
+
+# --- 3. Иерархия ограничивающих объемов ---
+class BVH:
+    """Линейная BVH над треугольниками: листья по кривой Мортона, полное бинарное дерево в массиве.
+
+    Узел i имеет детей 2i+1 и 2i+2, листья лежат на последнем уровне `depth`.
+    Пустые листья дополнения имеют "вывернутые" боксы (+inf / -inf) и никогда не пересекаются.
+    Запросы ближайшей точки сначала проверяют ячейку воксельного хеша, затем обходят дерево.
+    """
+
+    def __init__(self, tris, leaf_size=8):
+        self.tris = np.ascontiguousarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+        self.leaf_size = leaf_size
+        # Псевдонормали для signed_distance считаются при первом запросе
+        self._normals = None
+        n = len(self.tris)
+        tri_min = self.tri_min = self.tris.min(axis=1)
+        tri_max = self.tri_max = self.tris.max(axis=1)
+
+        n_leaves = max(1, -(-n // leaf_size))
+        self.depth = int(np.ceil(np.log2(n_leaves))) if n_leaves > 1 else 0
+        self.n_leaves = 2 ** self.depth
+        self.first_leaf = self.n_leaves - 1
+
+        order = np.arange(n)
+        if n:
+            centroids = self.tris.mean(axis=1)
+            order = np.argsort(morton_codes(centroids, centroids.min(axis=0), centroids.max(axis=0)), kind="stable")
+        leaf_tris = np.full(self.n_leaves * leaf_size, -1, dtype=np.int64)
+        leaf_tris[:n] = order
+        self.leaf_tris = leaf_tris.reshape(self.n_leaves, leaf_size)
+
+        valid = (self.leaf_tris >= 0)[..., None]
+        safe = np.where(self.leaf_tris >= 0, self.leaf_tris, 0)
+        if n:
+            leaf_min = np.where(valid, tri_min[safe], np.inf).min(axis=1)
+            leaf_max = np.where(valid, tri_max[safe], -np.inf).max(axis=1)
+        else:
+            leaf_min = np.full((self.n_leaves, 3), np.inf)
+            leaf_max = np.full((self.n_leaves, 3), -np.inf)
+
+        # Боксы узлов собираются снизу вверх по уровням
+        self.node_min = np.empty((2 * self.n_leaves - 1, 3))
+        self.node_max = np.empty((2 * self.n_leaves - 1, 3))
+        self.voxels = VoxelHash(tri_min, tri_max)
+        self.node_min[self.first_leaf:] = leaf_min
+        self.node_max[self.first_leaf:] = leaf_max
+        for level in range(self.depth - 1, -1, -1):
+            start, stop = 2 ** level - 1, 2 ** (level + 1) - 1
+            self.node_min[start:stop] = self.node_min[stop:2 * stop + 1].reshape(-1, 2, 3).min(axis=1)
+            self.node_max[start:stop] = self.node_max[stop:2 * stop + 1].reshape(-1, 2, 3).max(axis=1)
+
+    def _leaf_candidates(self, query, leaves):
+        """Пары (запрос, треугольник) для пар (запрос, лист) с отбросом пустых слотов."""
+        tri = self.leaf_tris[leaves - self.first_leaf].ravel()
+        q = np.repeat(query, self.leaf_size)
+        keep = tri >= 0
+        return q[keep], tri[keep]
+
+    def _exact(self, points, q, tri):
+        """Ближайшие точки и квадраты расстояний для пар (запрос, треугольник)."""
+        t = self.tris[tri]
+        closest = closest_point_on_triangles(points[q], t[:, 0], t[:, 1], t[:, 2])
+        diff = points[q] - closest
+        return closest, np.einsum("ij,ij->i", diff, diff)
+
+    def _update_best(self, points, q, tri, best_tri, best_point, best_d2):
+        """Проверяет пары (запрос, треугольник) и обновляет лучшие найденные ответы на месте."""
+        closest, d2 = self._exact(points, q, tri)
+        # Для каждого запроса берем пару с минимальным расстоянием
+        order = np.lexsort((d2, q))
+        q, tri, closest, d2 = q[order], tri[order], closest[order], d2[order]
+        first = np.r_[True, q[1:] != q[:-1]] if len(q) else np.zeros(0, dtype=bool)
+        q, tri, closest, d2 = q[first], tri[first], closest[first], d2[first]
+        better = d2 < best_d2[q]
+        q = q[better]
+        best_tri[q], best_point[q], best_d2[q] = tri[better], closest[better], d2[better]
+
+    def _rounds(self, points, query, item, near, expand, best_tri, best_point, best_d2, upper, tolerance2):
+        """Проверяет кандидатов (боксы или треугольники) по возрастанию `near` внутри каждого запроса.
+
+        В раунде k берется k-й ближайший кандидат каждого запроса; после раунда
+        оценка `upper` уточняется, и отсеченные кандидаты выбрасываются.
+        """
+        order = np.lexsort((near, query))
+        query, item, near = query[order], item[order], near[order]
+        starts = np.flatnonzero(np.r_[True, query[1:] != query[:-1]]) if len(query) else np.zeros(0, dtype=np.int64)
+        rank = np.arange(len(query)) - np.repeat(starts, np.diff(np.r_[starts, len(query)]))
+        current = 0
+        while len(query):
+            now = rank == current
+            q, tri = expand(query[now], item[now])
+            keep = box_distance2(points[q], self.tri_min[tri], self.tri_max[tri]) + tolerance2 < upper[q]
+            self._update_best(points, q[keep], tri[keep], best_tri, best_point, best_d2)
+            np.minimum(upper, best_d2, out=upper)
+
+            rest = ~now & (near + tolerance2 < upper[query])
+            query, item, near, rank = query[rest], item[rest], near[rest], rank[rest]
+            current += 1
+
+    def _closest_batch(self, points, tolerance, max_distance):
+        nq = len(points)
+        tolerance2 = tolerance * tolerance
+        best_tri = np.full(nq, -1, dtype=np.int64)
+        best_point = np.full((nq, 3), np.nan)
+        best_d2 = np.full(nq, np.inf)
+
+        upper = np.full(nq, max_distance * max_distance)
+
+        # Треугольники из ячейки воксельного хеша дают начальную верхнюю оценку;
+        # для точек на поверхности она сразу точная
+        q, tri = self.voxels.candidates(points)
+        near = box_distance2(points[q], self.tri_min[tri], self.tri_max[tri])
+        self._rounds(points, q, tri, near, lambda q, tri: (q, tri), best_tri, best_point, best_d2, upper, tolerance2)
+
+        # Обход в ширину всеми запросами сразу с отсечением по верхней оценке;
+        # оценка уточняется дальними углами боксов текущего фронта
+        # Запросы, уже найденные на поверхности с точностью `tolerance`, дерево не обходят
+        query = np.flatnonzero(upper > tolerance2)
+        node = np.zeros(len(query), dtype=np.int64)
+        near = np.zeros(len(query))
+        for _ in range(self.depth):
+            query = np.repeat(query, 2)
+            node = (2 * np.repeat(node, 2) + 1) + np.tile([0, 1], len(node))
+            box_min, box_max = self.node_min[node], self.node_max[node]
+            near = box_distance2(points[query], box_min, box_max)
+            occupied = np.isfinite(near)
+            np.minimum.at(upper, query[occupied], box_far_distance2(points[query[occupied]], box_min[occupied], box_max[occupied]))
+            # Бокс, который может улучшить ответ меньше чем на `tolerance2`, не рассматриваем
+            keep = near + tolerance2 < upper[query]
+            query, node, near = query[keep], node[keep], near[keep]
+
+        # Листья проверяются раундами: сначала ближайший лист каждого запроса,
+        # затем остальные, пока их не отсечет уточненная оценка
+        self._rounds(points, query, node, near, self._leaf_candidates, best_tri, best_point, best_d2, upper, tolerance2)
+        return np.sqrt(best_d2), best_tri, best_point
+
+    def closest(self, points, batch=16384, tolerance=1e-6, max_distance=np.inf):
+        """Для каждой точки возвращает (расстояние, индекс треугольника, ближайшая точка).
+
+        Найденное расстояние превышает точное не более чем на `tolerance` (мм);
+        это позволяет не перебирать все перекрывающиеся боксы у точек на поверхности.
+        Точки дальше `max_distance` получают расстояние inf и индекс -1.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if len(self.tris) == 0:
+            return np.full(len(points), np.inf), np.full(len(points), -1), np.full((len(points), 3), np.nan)
+        results = [self._closest_batch(points[i:i + batch], tolerance, max_distance) for i in range(0, len(points), batch)]
+        if not results:
+            return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def _pseudonormals(self):
+        """Нормали граней, ребер (k-е ребро - из вершины k в k+1) и вершин по углам, (n, 3) и (n, 3, 3)."""
+        if self._normals is None:
+            n = len(self.tris)
+            _, ids = np.unique(self.tris.reshape(-1, 3), axis=0, return_inverse=True)
+            ids = ids.reshape(n, 3)
+            normal = np.cross(self.tris[:, 1] - self.tris[:, 0], self.tris[:, 2] - self.tris[:, 0])
+            length = np.linalg.norm(normal, axis=1, keepdims=True)
+            normal = np.divide(normal, length, out=np.zeros_like(normal), where=length > 0)
+            # Угол при вершине k между ребрами к соседним вершинам
+            forward = np.roll(self.tris, -1, axis=1) - self.tris
+            backward = np.roll(self.tris, 1, axis=1) - self.tris
+            angle = np.arctan2(np.linalg.norm(np.cross(forward, backward), axis=2),
+                               np.einsum("ikj,ikj->ik", forward, backward))
+            vertex = np.zeros((ids.max() + 1, 3))
+            np.add.at(vertex, ids, angle[..., None] * normal[:, None, :])
+            pairs = np.sort(np.stack([ids, np.roll(ids, -1, axis=1)], axis=2).reshape(-1, 2), axis=1)
+            _, edge_ids = np.unique(pairs, axis=0, return_inverse=True)
+            edge = np.zeros((edge_ids.max() + 1, 3))
+            np.add.at(edge, edge_ids, np.repeat(normal, 3, axis=0))
+            self._normals = normal, edge[edge_ids].reshape(n, 3, 3), vertex[ids]
+        return self._normals
+
+    def signed_distance(self, points, batch=16384):
+        """Расстояние со знаком: положительное снаружи (по псевдонормали ближайшего элемента)."""
+        distance, tri, closest = self.closest(points, batch=batch)
+        if len(self.tris) == 0:
+            return distance, tri, closest
+        face, edge, vertex = self._pseudonormals()
+        t = self.tris[tri]
+        # Барицентрические координаты ближайшей точки: нули показывают ребро или вершину
+        v0, v1, v2 = t[:, 1] - t[:, 0], t[:, 2] - t[:, 0], closest - t[:, 0]
+        d00, d01, d11 = _dot(v0, v0), _dot(v0, v1), _dot(v1, v1)
+        d20, d21 = _dot(v2, v0), _dot(v2, v1)
+        denom = d00 * d11 - d01 * d01
+        with np.errstate(divide="ignore", invalid="ignore"):
+            v = np.where(denom > 0, (d11 * d20 - d01 * d21) / denom, 1 / 3)
+            w = np.where(denom > 0, (d00 * d21 - d01 * d20) / denom, 1 / 3)
+        zero = np.stack([1 - v - w, v, w], axis=1) <= 1e-9
+        count = zero.sum(axis=1)
+        normal = face[tri]
+        # Ноль у одной вершины - ребро напротив нее, у двух - оставшаяся вершина
+        on_edge = count == 1
+        k = np.argmax(zero[on_edge], axis=1)
+        normal[on_edge] = edge[tri[on_edge], (k + 1) % 3]
+        at_vertex = count == 2
+        k = np.argmin(zero[at_vertex], axis=1)
+        normal[at_vertex] = vertex[tri[at_vertex], k]
+        side = _dot(np.asarray(points, dtype=np.float64).reshape(-1, 3) - closest, normal)
+        return np.where(side < 0, -distance, distance), tri, closest
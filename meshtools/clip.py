@@ -0,0 +1,141 @@
+"""Разрез замкнутого меша плоскостью с заделкой сечения.
+
+Безголовая замена apply_boolean_difference с кубом-вырезателем из create_cut_plane.
+"""
+import numpy as np
+
+from meshtools.mesh import components, make_mesh, merge
+from meshtools.triangulate import group_loops, triangulate
+
+
+# --- 1. Отсечение полупространством ---
+def _plane_basis(normal):
+    """Ортонормированный базис (e1, e2) плоскости, такой что e1 x e2 = normal."""
+    helper = np.array([1.0, 0.0, 0.0]) if abs(normal[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+    e1 = np.cross(helper, normal)
+    e1 /= np.linalg.norm(e1)
+    return e1, np.cross(normal, e1)
+
+
+def clip_open(mesh, normal, offset):
+    """Оставляет часть меша, где dot(normal, x) < offset; сечение остается открытым.
+
+    Новые вершины на ребрах общие для соседних граней (ключ - ребро), так что
+    граница разреза получается замкнутыми контурами.
+    """
+    normal = np.asarray(normal, dtype=np.float64)
+    side = mesh.vertices @ normal - offset
+    inside = side < 0
+    face_in = inside[mesh.faces]
+    count = face_in.sum(axis=1)
+    keep_faces = [mesh.faces[count == 3]]
+
+    # Поворачиваем вершины грани так, чтобы "одинокая" вершина стояла первой
+    partial = mesh.faces[(count == 1) | (count == 2)]
+    partial_in = inside[partial]
+    lonely_is_in = partial_in.sum(axis=1) == 1
+    lonely = np.where(lonely_is_in, np.argmax(partial_in, axis=1), np.argmin(partial_in, axis=1))
+    roll = (np.arange(3)[None, :] + lonely[:, None]) % 3
+    partial = np.take_along_axis(partial, roll, axis=1)
+
+    # Точки пересечения на ребрах (0-1) и (0-2), общие по ключу ребра
+    edges = np.concatenate([partial[:, [0, 1]], partial[:, [0, 2]]])
+    keys = np.sort(edges, axis=1)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    a, b = unique_keys[:, 0], unique_keys[:, 1]
+    t = side[a] / (side[a] - side[b])
+    points = mesh.vertices[a] + (mesh.vertices[b] - mesh.vertices[a]) * t[:, None]
+    # Если конец ребра лежит ровно на плоскости, используем саму вершину
+    new_index = len(mesh.vertices) + np.arange(len(unique_keys))
+    new_index = np.where(side[b] == 0, b, np.where(side[a] == 0, a, new_index))
+    cut01, cut02 = np.split(new_index[inverse.ravel()], 2)
+
+    v0, v1, v2 = partial[:, 0], partial[:, 1], partial[:, 2]
+    one_in = lonely_is_in
+    keep_faces.append(np.stack([v0, cut01, cut02], axis=1)[one_in])
+    two_in = ~lonely_is_in
+    keep_faces.append(np.stack([cut01, v1, v2], axis=1)[two_in])
+    keep_faces.append(np.stack([cut01, v2, cut02], axis=1)[two_in])
+
+    faces = np.concatenate(keep_faces)
+    valid = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    vertices = np.concatenate([mesh.vertices, points])
+    faces = faces[valid]
+    used, local = np.unique(faces, return_inverse=True)
+    return make_mesh(vertices[used], local.reshape(-1, 3))
+
+
+def chain_loops(edges):
+    """Замкнутые контуры (массивы индексов) из ориентированных ребер (k, 2)."""
+    following = dict(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+    loops = []
+    while following:
+        start, current = next(iter(following.items()))
+        loop = [start]
+        del following[start]
+        while current != start and current in following:
+            loop.append(current)
+            current = following.pop(current)
+        if len(loop) >= 3:
+            loops.append(np.array(loop))
+    return loops
+
+
+def boundary_loops(mesh):
+    """Замкнутые контуры из граничных (непарных) ориентированных ребер меша."""
+    f = mesh.faces
+    directed = np.concatenate([f[:, [0, 1]], f[:, [1, 2]], f[:, [2, 0]]])
+    n = max(len(mesh.vertices), 1)
+    forward = directed[:, 0] * n + directed[:, 1]
+    backward = directed[:, 1] * n + directed[:, 0]
+    return chain_loops(directed[~np.isin(forward, backward)])
+
+
+def cap_faces(vertices, loops, normal):
+    """Триангулирует плоские контуры (индексы в vertices); треугольники смотрят по normal."""
+    e1, e2 = _plane_basis(np.asarray(normal, dtype=np.float64))
+    flat = [np.column_stack([vertices[loop] @ e1, vertices[loop] @ e2]) for loop in loops]
+    faces = [np.zeros((0, 3), dtype=np.int64)]
+    for outer, holes in group_loops(flat):
+        indices = np.concatenate([loops[outer]] + [loops[h] for h in holes])
+        tris = triangulate(flat[outer], [flat[h] for h in holes])
+        faces.append(indices[tris])
+    return np.concatenate(faces)
+
+
+def cap_loops(mesh, normal):
+    """Заделывает граничные контуры, лежащие в плоскости с нормалью normal (крышка смотрит по normal)."""
+    loops = boundary_loops(mesh)
+    if not loops:
+        return mesh
+    # Крышка обходит граничные ребра в обратную сторону
+    loops = [loop[::-1] for loop in loops]
+    return make_mesh(mesh.vertices, np.concatenate([mesh.faces, cap_faces(mesh.vertices, loops, normal)]))
+
+
+def clip_plane(mesh, normal, offset):
+    """Оставляет часть замкнутого меша, где dot(normal, x) < offset, и заделывает сечение.
+
+    Каждая оболочка режется отдельно: объединенные без булевой операции детали
+    (как после join_objects) пересекаются, и их сечения нельзя заделывать вместе.
+    """
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    parts = [cap_loops(clip_open(part, normal, offset), normal) for part in components(mesh)]
+    return merge(part for part in parts if len(part.faces))
+
+
+# --- 2. Вырезание плоского слоя (куб-вырезатель) ---
+def cut_slab(mesh, z_low, z_high, half_size=None):
+    """Удаляет слой z_low < z < z_high (булево вычитание плоского куба).
+
+    half_size - половина размера куба по x/y; деталь должна помещаться в него,
+    иначе куб вырезал бы слой не целиком.
+    """
+    if half_size is not None and len(mesh.vertices):
+        inside_slab = (mesh.vertices[:, 2] > z_low) & (mesh.vertices[:, 2] < z_high)
+        if np.abs(mesh.vertices[inside_slab, :2]).max(initial=0.0) > half_size:
+            raise ValueError("Деталь выходит за куб-вырезатель по X/Y; разрез плоскостью неприменим.")
+    below = clip_plane(mesh, (0.0, 0.0, 1.0), z_low)
+    above = clip_plane(mesh, (0.0, 0.0, -1.0), -z_high)
+    return merge([below, above])
@@ -0,0 +1,283 @@
+"""Проверка столкновений и зазоров между деталями сборки или стола печати.
+
+Пример (детали на столе должны отстоять друг от друга минимум на 2 мм):
+    python -m meshtools.collision plate part1.stl part2.stl part3.stl --spacing 2
+
+Сборка: пары из --overlap должны пересекаться, остальные - не касаться:
+    python -m meshtools.collision assembly sector.stl tube_x.stl tube_y.stl \
+        --overlap sector.stl tube_x.stl --overlap sector.stl tube_y.stl
+"""
+import argparse
+import collections
+import itertools
+import sys
+
+import numpy as np
+
+from meshtools.bvh import BVH, closest_point_on_triangles
+from meshtools.mesh import bounds, triangles
+from meshtools.stl_io import read_stl
+
+# Результат проверки пары деталей; contained - одна деталь целиком внутри другой
+Contact = collections.namedtuple("Contact", ["part_a", "part_b", "intersecting_pairs", "min_distance", "ok",
+                                             "contained"], defaults=(False,))
+
+
+# --- 1. Пересечение боксов двух BVH ---
+def overlapping_pairs(tree_a, tree_b, margin=0.0):
+    """Пары треугольников (ia, ib), чьи боксы (расширенные на margin) пересекаются.
+
+    Обход двух деревьев идет одновременно для всего фронта пар узлов.
+    """
+    if len(tree_a.tris) == 0 or len(tree_b.tris) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    node_a = np.zeros(1, dtype=np.int64)
+    node_b = np.zeros(1, dtype=np.int64)
+    for level in range(max(tree_a.depth, tree_b.depth)):
+        if level < tree_a.depth:
+            node_a = (2 * np.repeat(node_a, 2) + 1) + np.tile([0, 1], len(node_a))
+            node_b = np.repeat(node_b, 2)
+        if level < tree_b.depth:
+            node_b = (2 * np.repeat(node_b, 2) + 1) + np.tile([0, 1], len(node_b))
+            node_a = np.repeat(node_a, 2)
+        keep = boxes_overlap(tree_a.node_min[node_a], tree_a.node_max[node_a],
+                             tree_b.node_min[node_b], tree_b.node_max[node_b], margin)
+        node_a, node_b = node_a[keep], node_b[keep]
+
+    # Листья раскрываются в пары треугольников, которые снова фильтруются по боксам
+    leaf_a = tree_a.leaf_tris[node_a - tree_a.first_leaf]
+    leaf_b = tree_b.leaf_tris[node_b - tree_b.first_leaf]
+    ia = np.repeat(leaf_a, tree_b.leaf_size, axis=1).ravel()
+    ib = np.tile(leaf_b, (1, tree_a.leaf_size)).ravel()
+    keep = (ia >= 0) & (ib >= 0)
+    ia, ib = ia[keep], ib[keep]
+    keep = boxes_overlap(tree_a.tri_min[ia], tree_a.tri_max[ia], tree_b.tri_min[ib], tree_b.tri_max[ib], margin)
+    return ia[keep], ib[keep]
+
+
+def boxes_overlap(min_a, max_a, min_b, max_b, margin=0.0):
+    """Поэлементная проверка пересечения боксов с допуском margin."""
+    return np.all((min_a <= max_b + margin) & (min_b <= max_a + margin), axis=1)
+
+
+# --- 2. Точные проверки для пар треугольников ---
+def _dot(u, v):
+    return np.einsum("ij,ij->i", u, v)
+
+
+def triangles_intersect(a, b, eps=1e-9):
+    """Пересекаются ли треугольники a[i] и b[i] (массивы (k, 3, 3)); касание считается пересечением.
+
+    Теорема о разделяющей оси: нормали обоих треугольников, 9 попарных
+    произведений ребер и (для компланарного случая) 6 нормалей к ребрам в плоскости.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    edges_a = np.roll(a, -1, axis=1) - a
+    edges_b = np.roll(b, -1, axis=1) - b
+    normal_a = np.cross(edges_a[:, 0], edges_a[:, 1])
+    normal_b = np.cross(edges_b[:, 0], edges_b[:, 1])
+    axes = [normal_a, normal_b]
+    axes += [np.cross(edges_a[:, i], edges_b[:, j]) for i in range(3) for j in range(3)]
+    axes += [np.cross(normal_a, edges_a[:, i]) for i in range(3)]
+    axes += [np.cross(normal_b, edges_b[:, i]) for i in range(3)]
+
+    separated = np.zeros(len(a), dtype=bool)
+    for axis in axes:
+        length = np.linalg.norm(axis, axis=1)
+        usable = length > eps
+        unit = axis / np.where(usable, length, 1.0)[:, None]
+        proj_a = np.einsum("ikj,ij->ik", a, unit)
+        proj_b = np.einsum("ikj,ij->ik", b, unit)
+        gap = (proj_a.min(axis=1) > proj_b.max(axis=1) + eps) | (proj_b.min(axis=1) > proj_a.max(axis=1) + eps)
+        separated |= usable & gap
+    return ~separated
+
+
+def segment_distances(p1, q1, p2, q2):
+    """Расстояния между отрезками [p1, q1] и [p2, q2] (поэлементно, массивы (k, 3))."""
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a, e, f = _dot(d1, d1), _dot(d2, d2), _dot(d2, r)
+    c, b = _dot(d1, r), _dot(d1, d2)
+    denom = a * e - b * b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(denom > 1e-12, np.clip((b * f - c * e) / denom, 0.0, 1.0), 0.0)
+        t = np.where(e > 1e-12, (b * s + f) / e, 0.0)
+        # Если t вышел за отрезок, зажимаем его и пересчитываем s
+        s = np.where(t < 0, np.where(a > 1e-12, np.clip(-c / a, 0.0, 1.0), 0.0), s)
+        s = np.where(t > 1, np.where(a > 1e-12, np.clip((b - c) / a, 0.0, 1.0), 0.0), s)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm((p1 + d1 * s[:, None]) - (p2 + d2 * t[:, None]), axis=1)
+
+
+def triangle_distances(a, b):
+    """Минимальные расстояния между треугольниками a[i] и b[i]; 0 для пересекающихся."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    candidates = []
+    for i in range(3):
+        cp = closest_point_on_triangles(a[:, i], b[:, 0], b[:, 1], b[:, 2])
+        candidates.append(np.linalg.norm(a[:, i] - cp, axis=1))
+        cp = closest_point_on_triangles(b[:, i], a[:, 0], a[:, 1], a[:, 2])
+        candidates.append(np.linalg.norm(b[:, i] - cp, axis=1))
+        for j in range(3):
+            candidates.append(segment_distances(a[:, i], a[:, (i + 1) % 3], b[:, j], b[:, (j + 1) % 3]))
+    distance = np.min(candidates, axis=0) if len(a) else np.zeros(0)
+    return np.where(triangles_intersect(a, b), 0.0, distance)
+
+
+# --- 3. Проверка пар деталей ---
+def _tree(part):
+    return part if isinstance(part, BVH) else BVH(triangles(part))
+
+
+def intersecting_pairs(part_a, part_b, batch=1 << 20):
+    """Пары пересекающихся треугольников двух мешей (или готовых BVH)."""
+    tree_a, tree_b = _tree(part_a), _tree(part_b)
+    ia, ib = overlapping_pairs(tree_a, tree_b)
+    hits = np.concatenate([triangles_intersect(tree_a.tris[ia[i:i + batch]], tree_b.tris[ib[i:i + batch]])
+                           for i in range(0, len(ia), batch)] or [np.zeros(0, dtype=bool)])
+    return ia[hits], ib[hits]
+
+
+def min_distance(part_a, part_b, limit, batch=1 << 20):
+    """Минимальное расстояние между поверхностями деталей, если оно меньше limit; иначе inf.
+
+    Сначала расстояния от вершин каждой детали до другой (запросы к BVH) дают
+    верхнюю оценку; точные расстояния треугольник-треугольник считаются только
+    для пар в пределах этой оценки.
+    """
+    tree_a, tree_b = _tree(part_a), _tree(part_b)
+    upper = limit
+    for source, target in ((tree_a, tree_b), (tree_b, tree_a)):
+        points = np.unique(source.tris.reshape(-1, 3), axis=0)
+        distance, _, _ = target.closest(points, max_distance=upper)
+        if len(distance):
+            upper = min(upper, float(distance.min()))
+    ia, ib = overlapping_pairs(tree_a, tree_b, margin=upper)
+    best = np.inf
+    for i in range(0, len(ia), batch):
+        d = triangle_distances(tree_a.tris[ia[i:i + batch]], tree_b.tris[ib[i:i + batch]])
+        best = min(best, float(d.min()))
+    return best if best < limit else np.inf
+
+
+def winding_numbers(points, tris, batch=1 << 18):
+    """Обобщенное число оборотов замкнутой поверхности tris (k, 3, 3) в точках (сумма телесных углов)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    result = np.empty(len(points))
+    step = max(batch // max(len(tris), 1), 1)
+    for start in range(0, len(points), step):
+        d = tris[None] - points[start:start + step, None, None, :]
+        a, b, c = d[:, :, 0], d[:, :, 1], d[:, :, 2]
+        la, lb, lc = (np.linalg.norm(x, axis=2) for x in (a, b, c))
+        det = np.einsum("pfi,pfi->pf", a, np.cross(b, c))
+        dots = (np.einsum("pfi,pfi->pf", a, b) * lc + np.einsum("pfi,pfi->pf", b, c) * la
+                + np.einsum("pfi,pfi->pf", c, a) * lb)
+        result[start:start + step] = np.arctan2(det, la * lb * lc + dots).sum(axis=1) / (2 * np.pi)
+    return result
+
+
+def contains(outer, inner):
+    """Лежит ли деталь inner внутри outer при условии, что их поверхности не пересекаются.
+
+    Без пересечений поверхностей все вершины inner по одну сторону от outer,
+    поэтому достаточно числа оборотов outer в одной вершине inner.
+    """
+    outer, inner = _tree(outer), _tree(inner)
+    if len(outer.tris) == 0 or len(inner.tris) == 0:
+        return False
+    point = inner.tris[0, 0]
+    if not boxes_overlap(outer.node_min[:1], outer.node_max[:1], point[None], point[None])[0]:
+        return False
+    return bool(abs(winding_numbers(point, outer.tris)[0]) > 0.5)
+
+
+def check_pair(name_a, part_a, name_b, part_b, expect="clear", clearance=0.0):
+    """Проверяет пару деталей: expect="overlap" - должны пересекаться, "clear" - не ближе clearance.
+
+    Деталь целиком внутри другой (поверхности не пересекаются) считается пересечением.
+    """
+    tree_a, tree_b = _tree(part_a), _tree(part_b)
+    ia, _ = intersecting_pairs(tree_a, tree_b)
+    if len(ia):
+        return Contact(name_a, name_b, len(ia), 0.0, expect == "overlap")
+    if contains(tree_a, tree_b) or contains(tree_b, tree_a):
+        return Contact(name_a, name_b, 0, 0.0, expect == "overlap", contained=True)
+    distance = min_distance(tree_a, tree_b, limit=max(clearance, 1e-9))
+    ok = expect == "clear" and distance >= clearance
+    return Contact(name_a, name_b, 0, distance, ok)
+
+
+def check_assembly(parts, rules, default="clear", clearance=0.0):
+    """Проверяет все пары деталей сборки.
+
+    parts - словарь имя -> Mesh; rules - словарь (имя_a, имя_b) -> "overlap" | "clear".
+    Пары без правила проверяются по `default`. Сначала отсеиваются пары с непересекающимися
+    габаритами, BVH строится один раз на деталь.
+    """
+    trees = {}
+    results = []
+    for (name_a, mesh_a), (name_b, mesh_b) in itertools.combinations(parts.items(), 2):
+        expect = rules.get((name_a, name_b), rules.get((name_b, name_a), default))
+        lo_a, hi_a = bounds(mesh_a)
+        lo_b, hi_b = bounds(mesh_b)
+        if not boxes_overlap(lo_a[None], hi_a[None], lo_b[None], hi_b[None], clearance)[0]:
+            results.append(Contact(name_a, name_b, 0, np.inf, expect == "clear"))
+            continue
+        for name, mesh in ((name_a, mesh_a), (name_b, mesh_b)):
+            if name not in trees:
+                trees[name] = BVH(triangles(mesh))
+        results.append(check_pair(name_a, trees[name_a], name_b, trees[name_b], expect, clearance))
+    return results
+
+
+def check_plate(parts, spacing):
+    """Проверяет раскладку на столе: все детали попарно не пересекаются и отстоят не меньше spacing."""
+    return check_assembly(parts, rules={}, default="clear", clearance=spacing)
+
+
+# --- 4. Командная строка ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка пересечений и зазоров между деталями.")
+    parser.add_argument("mode", choices=["plate", "assembly"],
+                        help="plate - все детали раздельно; assembly - пары из --overlap пересекаются, "
+                             "остальные раздельно")
+    parser.add_argument("parts", nargs="+", help="STL-файлы деталей")
+    parser.add_argument("--spacing", type=float, default=0.0, help="минимальный зазор в мм для plate")
+    parser.add_argument("--overlap", nargs=2, action="append", default=[], metavar=("A", "B"),
+                        help="пара деталей сборки, которые должны пересекаться (повторять)")
+    args = parser.parse_args(argv)
+
+    rules = {}
+    for pair in args.overlap:
+        if not set(pair) <= set(args.parts):
+            parser.error(f"--overlap {' '.join(pair)}: обе детали должны быть в списке")
+        rules[tuple(pair)] = "overlap"
+    if rules and args.mode == "plate":
+        parser.error("--overlap имеет смысл только для assembly")
+
+    parts = {path: read_stl(path) for path in args.parts}
+    if args.mode == "plate":
+        results = check_plate(parts, args.spacing)
+    else:
+        results = check_assembly(parts, rules, default="clear")
+    failed = 0
+    for contact in results:
+        if contact.ok:
+            continue
+        failed += 1
+        if contact.intersecting_pairs:
+            print(f"{contact.part_a} x {contact.part_b}: пересекаются ({contact.intersecting_pairs} пар треугольников)")
+        elif contact.contained:
+            print(f"{contact.part_a} x {contact.part_b}: одна деталь внутри другой")
+        elif contact.min_distance == np.inf:
+            print(f"{contact.part_a} x {contact.part_b}: должны пересекаться, но не касаются")
+        else:
+            print(f"{contact.part_a} x {contact.part_b}: расстояние {contact.min_distance:.3f} мм")
+    print(f"Проверено пар: {len(results)}, нарушений: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
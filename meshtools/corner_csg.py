@@ -0,0 +1,68 @@
+"""Уголок через булевы операции и сравнение с STL из Blender.
+
+Пример:
+    python -m meshtools.corner_csg -o corner.stl --reference "3DScrog/Corner 2.85mm.v2024.12.18.stl"
+    python -m meshtools.corner_csg -p internal_diameter=2.85
+
+Blender-скрипт склеивает сектор и трубки и вычитает разрезающий куб
+булевой операцией. Здесь то же самое делает csg (union и difference), а
+результат сравнивается с эталоном (--reference) или, без него, с
+безголовым генератором, который оболочки только склеивает.
+"""
+import argparse
+import json
+import sys
+import time
+
+from meshtools.csg import DEFAULT_QUANTUM, boolean, is_manifold, union
+from meshtools.generators import (CORNER_DEFAULTS, build_corner, corner_sector, corner_tube_x, corner_tube_y,
+                                  resolve_params)
+from meshtools.mesh import transformed
+from meshtools.mesh_diff import compare_meshes, format_report
+from meshtools.primitives import box, rotation_matrix
+from meshtools.stl_io import read_stl, write_stl
+
+
+def corner(params, quantum=DEFAULT_QUANTUM):
+    """Уголок как в Blender-скрипте: (сектор + две трубки) - разрезающий куб, но через union/difference."""
+    p = {**CORNER_DEFAULTS, **params}
+    body = union(corner_sector(p), corner_tube_x(p), corner_tube_y(p), quantum=quantum)
+    body = transformed(body, rotation_matrix(-90, 45, 0), (0.0, 0.0, p["offset_of_joinded"]))
+    # Куб create_cut_plane: масштаб по Z равен cut_thickness / 2
+    cut = box((p["cut_size"], p["cut_size"], p["cut_thickness"] / 2), (0.0, 0.0, p["z_offset"]))
+    return boolean(body, cut, "difference", quantum)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Уголок через CSG и сравнение с эталоном.")
+    parser.add_argument("-p", "--param", action="append", default=[], help="имя=значение")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--reference", help="STL из Blender (по умолчанию - безголовый генератор)")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="допуск сравнения в мм")
+    parser.add_argument("--quantum", type=float, default=DEFAULT_QUANTUM, help="шаг сетки в мм")
+    args = parser.parse_args(argv)
+
+    try:
+        params = resolve_params("corner", {key: json.loads(value) for key, _, value in
+                                           (item.partition("=") for item in args.param)})
+    except (KeyError, ValueError) as error:
+        parser.error(str(error.args[0]))
+    start = time.perf_counter()
+    result = corner(params, args.quantum)
+    print(f"{len(result.faces)} треугольников за {(time.perf_counter() - start) * 1000:.0f} мс, "
+          f"{'многообразие' if is_manifold(result) else 'НЕ многообразие'}")
+    if args.output:
+        write_stl(args.output, result)
+
+    if args.reference:
+        report = compare_meshes(read_stl(args.reference), result, args.tolerance)
+    else:
+        # Безголовый генератор только склеивает оболочки: внутренние стенки есть лишь в нем,
+        # поэтому сравнение в одну сторону - от результата CSG до его поверхности
+        report = compare_meshes(build_corner(params), result, args.tolerance, symmetric=False)
+    print(format_report(report, args.tolerance))
+    return 0 if report.hausdorff <= args.tolerance and is_manifold(result) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
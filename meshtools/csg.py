@@ -0,0 +1,828 @@
+"""Булевы операции над замкнутыми мешами без Blender.
+
+Пример:
+    python -m meshtools.csg union a.stl b.stl -o ab.stl
+    python -m meshtools.csg difference a.stl b.stl -o a_minus_b.stl
+
+Вершины привязываются к целочисленной сетке (по умолчанию 1 мкм), и все
+решения "пересекает ли ребро треугольник" принимаются точными целочисленными
+предикатами ориентации. Вырожденные случаи (вершина в плоскости чужой грани,
+совпадающие грани и ребра, касание) разрешаются символическим возмущением
+второго операнда: он раздувается на e вдоль нормалей вершин (для
+пересечения - сдувается) и сдвигается на d w + d^2 y + d^3 z,
+w = (10^4, 10^2, 1), d << e^3. Определители считаются как многочлены от e и
+d, знак дает старший ненулевой коэффициент, поэтому пересечение всегда
+общего положения. Точки на одном ребре упорядочиваются по пределу, почти
+равные - точным сравнением рядов. Кандидаты в пересекающиеся пары дает BVH
+(collision.overlapping_pairs), так что работа растет с размером линии
+пересечения, а не всего меша. Точки пересечения имеют символьные ключи
+(ребро, треугольник), поэтому обе стороны разреза получают одни и те же
+вершины. Разрезанные грани делятся ломаными пересечения комбинаторно и
+триангулируются при малых настоящих e и d; куски поверхности между линиями
+разреза классифицируются обобщенным числом оборотов другого операнда.
+
+Результат берется в пределе e, d -> 0: совпадающие грани схлопываются в
+стенки нулевой толщины. Связность чистится на сетке (_clean): ребра нулевой
+длины стягиваются, встречные пары граней удаляются, касающиеся листы
+разводятся (после объединения склеиваются), плоские и тонкие грани
+переворачиваются. Оболочки тоньше половины шага сетки удаляются, координаты
+вершин остаются точными. Результат проверяется is_manifold; если он все же
+не многообразие, поднимается RuntimeError.
+
+Операнды должны быть замкнутыми многообразиями без самопересечений (меш из
+нескольких пересекающихся оболочек сначала объединяется через union).
+Уголок через булевы операции и сравнение с Blender - в meshtools.corner_csg.
+"""
+import argparse
+import functools
+import math
+import sys
+import time
+
+import numpy as np
+
+from meshtools.bvh import BVH
+from meshtools.collision import overlapping_pairs, winding_numbers
+from meshtools.mesh import connected_labels, make_mesh
+from meshtools.stl_io import read_stl, write_stl
+from meshtools.triangulate import points_in_polygon, signed_area, triangulate
+
+DEFAULT_QUANTUM = 0.001
+# Разности координат меньше 2^19 шагов: определитель 3x3 помещается в int64
+MAX_EXTENT = 2 ** 19
+OPERATIONS = ("union", "intersection", "difference")
+# Вершины второго операнда раздуваются на e * lift, |lift| около _LIFT шагов сетки
+_LIFT = 8
+# Оставшиеся вырожденности снимает сдвиг второго операнда d w + d^2 y + d^3 z, d << e^3
+_WEIGHTS = np.array([10 ** 4, 10 ** 2, 1])
+# Настоящие e и d - только для координат точек в плоскости граней
+_E, _D = 2.0 ** -12, 2.0 ** -44
+# Одночлены разложения определителя в порядке убывания: 1, e, e^2, e^3, d, d e, d e^2, d^2, ...
+_MONOMIALS = np.array([_E ** i * _D ** j for j in range(4) for i in range(4 if j == 0 else 3)])
+
+
+# --- 1. Сетка и точные предикаты ---
+def _flat(grid, faces):
+    a, b, c = grid[faces[:, 0]], grid[faces[:, 1]], grid[faces[:, 2]]
+    return (np.cross(b - a, c - a) == 0).all(axis=1)
+
+
+def _thin(grid, faces):
+    """Грани ниже двух шагов сетки к длинной стороне: при округлении вершин они могут вывернуться."""
+    a, b, c = (grid[faces[:, k]].astype(np.float64) for k in range(3))
+    longest = np.maximum(np.maximum(((b - a) ** 2).sum(1), ((c - b) ** 2).sum(1)), ((a - c) ** 2).sum(1))
+    return (np.cross(b - a, c - a) ** 2).sum(1) < 4 * longest
+
+
+def _flip_slivers(grid, faces):
+    """Убирает тонкие и плоские грани переворотом длинного ребра.
+
+    Грань (a, b, c) с тупым углом при b и соседняя по ребру (c, a) грань
+    (a, c, d) заменяются на (a, b, d) и (b, c, d); если d = b, обе грани
+    удаляются. Тонкую неплоскую грань переворачиваем, только если наименьшая
+    высота пары растет, а новые грани не плоские (как в перевороте Лоусона).
+    Если ребро (b, d) уже есть, плоская грань вместо переворота стягивает b
+    к одному из концов (когда это не склеивает чужие грани), а тонкая
+    остается. Возвращает грани, пары вершин для слияния и флаг изменений;
+    новые ребра нулевой длины стягивает _clean.
+    """
+    faces = faces.tolist()
+    owner = {(f[k], f[(k + 1) % 3]): i for i, f in enumerate(faces) for k in range(3)}
+    # Граней-кандидатов немного, поэтому геометрия - на целых Python, без numpy на каждую грань
+    points = grid.tolist()
+
+    def cross(a, b, c):
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = points[a], points[b], points[c]
+        ux, uy, uz, vx, vy, vz = bx - ax, by - ay, bz - az, cx - ax, cy - ay, cz - az
+        return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+    def dot(a, b, c):
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = points[a], points[b], points[c]
+        return (ax - bx) * (cx - bx) + (ay - by) * (cy - by) + (az - bz) * (cz - bz)
+
+    def height(a, b, c):
+        x, y, z = cross(a, b, c)
+        return math.sqrt((x * x + y * y + z * z) / max(dot(b, a, b), dot(c, b, c), dot(a, c, a)))
+
+    def neighbors(x):
+        return {v for u, v in owner if u == x}
+
+    changed = False
+    queue = np.flatnonzero(_thin(grid, np.array(faces, dtype=np.int64).reshape(-1, 3))).tolist()
+    # Проходов немного: каждый переворот улучшает пару граней
+    for _ in range(32):
+        touched, retry = set(), set()
+        for i in queue:
+            f = faces[i]
+            if i in touched or f is None or height(*f) >= 2:
+                continue
+            k = next((k for k in range(3) if dot(f[k - 1], f[k], f[(k + 1) % 3]) < 0), None)
+            if k is None:
+                continue
+            a, b, c = f[k - 1], f[k], f[(k + 1) % 3]
+            flat = cross(a, b, c) == (0, 0, 0)
+            j = owner.get((a, c))
+            if j is None:
+                if flat:
+                    raise ValueError("Плоская грань на краю меша: операнд не замкнут.")
+                continue
+            d = next(v for v in faces[j] if v != a and v != c)
+            if not flat and (d == b or min(height(a, b, d), height(b, c, d)) <= min(height(a, b, c), height(a, c, d))
+                             or (0, 0, 0) in (cross(a, b, d), cross(b, c, d))):
+                continue
+            if d != b and ((b, d) in owner or (d, b) in owner):
+                # Переворот дал бы ребро с четырьмя гранями: стягиваем b к концу, ближний - первым
+                for end in sorted((a, c), key=lambda x: dot(x, b, x)):
+                    apexes = {v for g in (owner.get((b, end)), owner.get((end, b)))
+                              if g is not None for v in faces[g] if v not in (b, end)}
+                    if flat and neighbors(b) & neighbors(end) == apexes:
+                        alive = [g for g in faces if g is not None]
+                        return np.array(alive, dtype=np.int64).reshape(-1, 3), [(b, end)], True
+                continue
+            for g in (f, faces[j]):
+                for m in range(3):
+                    owner.pop((g[m], g[(m + 1) % 3]), None)
+            changed = True
+            touched.update((i, j))
+            if d == b:
+                faces[i] = faces[j] = None
+                continue
+            faces[i], faces[j] = [a, b, d], [b, c, d]
+            for g, n in ((faces[i], i), (faces[j], j)):
+                for m in range(3):
+                    owner[(g[m], g[(m + 1) % 3])] = n
+            # Соседи новых граней могли стать переворачиваемыми
+            for g in (faces[i], faces[j]):
+                retry.update(owner.get((g[m], g[m - 1])) for m in range(3))
+        if not touched:
+            break
+        queue = sorted((touched | retry) - {None})
+    return np.array([f for f in faces if f is not None], dtype=np.int64).reshape(-1, 3), [], changed
+
+
+def _cancel_pairs(faces):
+    """Удаляет пары граней на одних и тех же вершинах с противоположным обходом."""
+    start = faces.argmin(axis=1)
+    rolled = np.take_along_axis(faces, (start[:, None] + np.arange(3)) % 3, axis=1)
+    forward = np.where(rolled[:, 1] < rolled[:, 2], 1, -1)
+    keys, inverse = np.unique(np.sort(faces, axis=1), axis=0, return_inverse=True)
+    balance = np.bincount(inverse.ravel(), weights=forward, minlength=len(keys))
+    count = np.bincount(inverse.ravel(), minlength=len(keys))
+    return faces[~((count[inverse.ravel()] > 1) & (balance[inverse.ravel()] == 0))]
+
+
+def _pair_around(grid, faces, group, tail, merged):
+    """Пары полуребер одного ребра с четырьмя и более гранями - по углу вокруг ребра.
+
+    Нормаль грани с полуребром u -> v смотрит в сторону роста угла, с v -> u -
+    в сторону убывания. merged: соседние грани склеиваются через клин снаружи
+    тела (тела слились), иначе через клин внутри (тела только касаются).
+    """
+    u, v = min(tail[group[0]], tail[group[1]]), max(tail[group[0]], tail[group[1]])
+    axis = (grid[v] - grid[u]).astype(np.float64)
+    axis /= np.linalg.norm(axis)
+    e1 = np.cross(axis, np.eye(3)[int(np.argmin(np.abs(axis)))])
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(axis, e1)
+    apex = faces[group // 3, (group % 3 + 2) % 3]
+    r = (grid[apex] - grid[u]).astype(np.float64)
+    order = np.argsort(np.arctan2(r @ e2, r @ e1), kind="stable")
+    ring = list(zip(group[order].tolist(), (tail[group[order]] == u).tolist()))
+    # Соседние по кругу пары снимаются, пока грани не кончатся; у сложившейся в
+    # пределе геометрии направления могут не чередоваться - тогда берется другой клин
+    pairs = []
+    while len(ring) > 1:
+        for wanted in (merged, not merged):
+            k = next((k for k in range(len(ring))
+                      if ring[k][1] == wanted and ring[(k + 1) % len(ring)][1] != wanted), None)
+            if k is not None:
+                pairs.append((ring[k][0], ring[(k + 1) % len(ring)][0]))
+                ring = [item for m, item in enumerate(ring) if m not in (k, (k + 1) % len(ring))]
+                break
+        else:
+            break
+    return pairs
+
+
+def _separate(grid, source, faces, merged):
+    """Разводит листы, которые после стягивания сошлись в одном ребре или вершине.
+
+    Полуребра связываются в пары (у ребра с четырьмя гранями - _pair_around),
+    углы граней вокруг вершины, связанные парами, дают одну вершину; разные
+    веера получают разные копии вершины. Ребро, которое и после этого
+    принадлежит двум листам, делится серединой отдельно в каждом листе.
+    """
+    if not len(faces):
+        return grid, source, faces
+    tail = faces.ravel()
+    following = (np.arange(len(tail)) // 3) * 3 + (np.arange(len(tail)) % 3 + 1) % 3
+    head = tail[following]
+    n = len(grid)
+    key = np.minimum(tail, head) * n + np.maximum(tail, head)
+    order = np.argsort(key, kind="stable")
+    starts = np.flatnonzero(np.r_[True, key[order][1:] != key[order][:-1]])
+    sizes = np.diff(np.r_[starts, len(key)])
+    pairs = [np.stack([order[starts[sizes == 2]], order[starts[sizes == 2] + 1]], axis=1)]
+    crowded = [order[s:s + size] for s, size in zip(starts[sizes > 2], sizes[sizes > 2])]
+    for group in crowded:
+        pairs.append(np.array(_pair_around(grid, faces, group, tail, merged), dtype=np.int64).reshape(-1, 2))
+    pairs = np.concatenate(pairs)
+    h, g = pairs[:, 0], pairs[:, 1]
+    corners = np.concatenate([np.stack([h, following[g]], axis=1), np.stack([following[h], g], axis=1)])
+    labels = connected_labels(len(tail), corners)
+    roots, corner_vertex = np.unique(labels, return_inverse=True)
+    if len(roots) == len(np.unique(tail)) and not crowded:
+        return grid, source, faces
+    grid, source = grid[tail[roots]], source[tail[roots]]
+    faces = corner_vertex.reshape(-1, 3)
+
+    # Ребро между одними и теми же копиями вершин у двух листов: делим серединой в каждом
+    tail = faces.ravel()
+    head = tail[following]
+    key = np.minimum(tail, head) * len(grid) + np.maximum(tail, head)
+    split = {}
+    for a, b in pairs.tolist():
+        if np.count_nonzero(key == key[a]) > 2:
+            split[a] = split[b] = len(grid) + len(split) // 2
+    if not split:
+        return grid, source, faces
+    extra_grid, extra_source, new_faces, done = [], [], [], set()
+    for half, middle in sorted(split.items(), key=lambda item: item[1]):
+        if middle >= len(grid) + len(extra_grid):
+            u, v = tail[half], head[half]
+            extra_grid.append((grid[u] + grid[v]) // 2)
+            extra_source.append((source[u, 0], source[v, 0]))
+    for half, middle in split.items():
+        face, k = divmod(half, 3)
+        if face in done:
+            continue
+        done.add(face)
+        a, b, c = faces[face, k], faces[face, (k + 1) % 3], faces[face, (k + 2) % 3]
+        new_faces += [(a, middle, c), (middle, b, c)]
+    keep = np.ones(len(faces), dtype=bool)
+    keep[list(done)] = False
+    return (np.concatenate([grid, np.array(extra_grid, dtype=np.int64)]),
+            np.concatenate([source, np.array(extra_source, dtype=np.int64)]),
+            np.concatenate([faces[keep], np.array(new_faces, dtype=np.int64)]))
+
+
+def _clean(grid, faces, merged=True):
+    """Стягивает ребра нулевой длины, разводит касающиеся листы и убирает плоские грани.
+
+    Возвращает вершины на сетке, для каждой - пару исходных вершин (середина
+    ребра - между ними, иначе одна и та же) и грани по новым номерам.
+    merged - как разводить листы, сошедшиеся в ребре (см. _pair_around).
+    """
+    source = np.stack([np.arange(len(grid))] * 2, axis=1)
+    merges = np.zeros((0, 2), dtype=np.int64)
+    for _ in range(64):
+        edges = np.concatenate([faces[:, :2], faces[:, 1:], faces[:, ::2]])
+        short = np.concatenate([edges[(grid[edges[:, 0]] == grid[edges[:, 1]]).all(axis=1)], merges])
+        if len(short):
+            faces = connected_labels(len(grid), short)[faces]
+            faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+            faces = _cancel_pairs(faces)
+        grid, source, faces = _separate(grid, source, faces, merged)
+        if not len(faces) or not _thin(grid, faces).any():
+            break
+        faces, merges, changed = _flip_slivers(grid, faces)
+        merges = np.array(merges, dtype=np.int64).reshape(-1, 2)
+        if not changed:
+            break
+    if len(faces) and _flat(grid, faces).any():
+        raise ValueError("После привязки к сетке остались вырожденные грани: детали меньше шага сетки.")
+    used, local = np.unique(faces, return_inverse=True)
+    return grid[used], source[used], local.reshape(-1, 3)
+
+
+def snap(mesh, quantum=DEFAULT_QUANTUM):
+    """Вершины на целочисленной сетке (int64) и грани.
+
+    Ребра, ставшие нулевой длины, стягиваются, а плоские грани убираются
+    переворотом ребра (_clean).
+    """
+    grid, _, faces = _clean(np.rint(mesh.vertices / quantum).astype(np.int64), np.asarray(mesh.faces, dtype=np.int64))
+    return grid, faces
+
+
+def _cross(u, v):
+    return np.stack([u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1],
+                     u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2],
+                     u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]], axis=1)
+
+
+def _dot(u, v):
+    return np.einsum("ij,ij->i", u, v)
+
+
+def _lifts(grid, faces, sign):
+    """Целые векторы раздувания вершин: нормаль, взвешенная углами граней, длиной около _LIFT."""
+    tris = grid[faces].astype(np.float64)
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    total = np.zeros((len(grid), 3))
+    for k in range(3):
+        u, v = tris[:, (k + 1) % 3] - tris[:, k], tris[:, k - 1] - tris[:, k]
+        angle = np.arctan2(np.linalg.norm(np.cross(u, v), axis=1), _dot(u, v))
+        np.add.at(total, faces[:, k], angle[:, None] * normals)
+    length = np.maximum(np.linalg.norm(total, axis=1), 1e-12)
+    return sign * np.rint(total * (_LIFT / length)[:, None]).astype(np.int64)
+
+
+def orient(points, lifts, moved, full=False):
+    """Знак det(p1 - p0, p2 - p0, p3 - p0) для целых точек (k, 3) при возмущении и его разложение.
+
+    Точка pi смещена на e * lifts[i] (раздувание второго операнда, у первого
+    нули), а точки второго операнда (флаги moved) еще и на d w + d^2 y + d^3 z.
+    Определитель - многочлен по e и d; коэффициенты (k, 13) идут по убыванию
+    одночленов _MONOMIALS, знак - у первого ненулевого. Без full высшие
+    коэффициенты считаются только там, где определитель без возмущения равен нулю.
+    """
+    p0, p1, p2, p3 = points
+    coeffs = np.zeros((len(p0), len(_MONOMIALS)), dtype=np.int64)
+    coeffs[:, 0] = _dot(p1 - p0, _cross(p2 - p0, p3 - p0))
+    tie = np.arange(len(p0)) if full else np.flatnonzero(coeffs[:, 0] == 0)
+    if len(tie):
+        p0, p1, p2, p3 = (p[tie] for p in points)
+        l0, l1, l2, l3 = (lift[tie] for lift in lifts)
+        u, v, w = p1 - p0, p2 - p0, p3 - p0
+        du, dv, dw = l1 - l0, l2 - l0, l3 - l0
+        # Кофакторы v x w, w x u, u x v - многочлены по e степени 2
+        vw = (_cross(v, w), _cross(dv, w) + _cross(v, dw), _cross(dv, dw))
+        wu = (_cross(w, u), _cross(dw, u) + _cross(w, du), _cross(dw, du))
+        uv = (_cross(u, v), _cross(du, v) + _cross(u, dv), _cross(du, dv))
+        coeffs[tie, 1] = _dot(du, vw[0]) + _dot(u, vw[1])
+        coeffs[tie, 2] = _dot(du, vw[1]) + _dot(u, vw[2])
+        coeffs[tie, 3] = _dot(du, vw[2])
+        # Определитель аффинен по сдвигу: градиент - сумма кофакторов сдвинутых разностей
+        shift = [int(moved[k]) - int(moved[0]) for k in (1, 2, 3)]
+        for order in range(3):
+            grad = shift[0] * vw[order] + shift[1] * wu[order] + shift[2] * uv[order]
+            coeffs[tie, 4 + order] = grad @ _WEIGHTS
+            coeffs[tie, 7 + order] = grad[:, 1]
+            coeffs[tie, 10 + order] = grad[:, 2]
+    first = (coeffs != 0).argmax(axis=1)
+    return np.sign(coeffs[np.arange(len(coeffs)), first]), coeffs
+
+
+def _crossings(p, q, a, b, c, lifts, edge_moved):
+    """Пересекает ли отрезок pq треугольник abc при возмущении.
+
+    lifts - смещения раздувания точек p, q, a, b, c. Возвращает флаги,
+    параметр t точки на pq в пределе e, d -> 0 и при настоящих _E, _D, а для
+    пересечений - разложения определителей для p и q (для _compare_t).
+    """
+    lp, lq, la, lb, lc = lifts
+    tri_moved = not edge_moved
+    moved = (tri_moved, tri_moved, tri_moved, edge_moved)
+    sp, _ = orient((a, b, c, p), (la, lb, lc, lp), moved)
+    sq, _ = orient((a, b, c, q), (la, lb, lc, lq), moved)
+    hit = sp != sq
+    maybe = np.flatnonzero(hit)
+    moved = (edge_moved, edge_moved, tri_moved, tri_moved)
+    p_, q_, a_, b_, c_ = (x[maybe] for x in (p, q, a, b, c))
+    lp_, lq_, la_, lb_, lc_ = (x[maybe] for x in lifts)
+    s1, _ = orient((p_, q_, a_, b_), (lp_, lq_, la_, lb_), moved)
+    s2, _ = orient((p_, q_, b_, c_), (lp_, lq_, lb_, lc_), moved)
+    s3, _ = orient((p_, q_, c_, a_), (lp_, lq_, lc_, la_), moved)
+    hit[maybe] = (s1 == s2) & (s2 == s3)
+    # Предел t - по первому порядку, где хотя бы один из двух определителей не ноль;
+    # настоящее t разносит точки, совпавшие в пределе, поэтому нужно полное разложение
+    points = (a[hit], b[hit], c[hit])
+    lifts = (la[hit], lb[hit], lc[hit])
+    moved = (tri_moved, tri_moved, tri_moved, edge_moved)
+    cp = orient(points + (p[hit],), lifts + (lp[hit],), moved, full=True)[1]
+    cq = orient(points + (q[hit],), lifts + (lq[hit],), moved, full=True)[1]
+    first = ((cp != 0) | (cq != 0)).argmax(axis=1)
+    rows = np.arange(len(first))
+    fp, fq = cp[rows, first].astype(np.float64), cq[rows, first].astype(np.float64)
+    real_p, real_q = cp @ _MONOMIALS, cq @ _MONOMIALS
+    limit, real = np.zeros(len(hit)), np.zeros(len(hit))
+    limit[hit] = fp / (fp - fq)
+    real[hit] = real_p / (real_p - real_q)
+    return hit, limit, real, np.stack([cp, cq], axis=1)
+
+
+def _separated(tris_p, tris_q):
+    """Лежат ли все вершины tris_q строго по одну сторону плоскости tris_p (float с запасом на ошибку)."""
+    p = tris_p.astype(np.float64)
+    q = tris_q.astype(np.float64) - p[:, :1]
+    normal = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    side = np.einsum("kvi,ki->kv", q, normal)
+    # Разности и нормали - целые числа ниже 2^53, ошибка только в скалярном произведении
+    error = np.einsum("kvi,ki->kv", np.abs(q), np.abs(normal)) * 1e-14
+    return (side > error).all(axis=1) | (side < -error).all(axis=1)
+
+
+# --- 2. Ребра и пересечения ---
+def _edge_table(faces, n):
+    """Уникальные ребра (k, 2) с меньшим индексом первым и номера ребер граней (f, 3)."""
+    e = np.stack([faces, np.roll(faces, -1, axis=1)], axis=2).reshape(-1, 2)
+    e.sort(axis=1)
+    keys, inverse = np.unique(e[:, 0] * n + e[:, 1], return_inverse=True)
+    return np.stack([keys // n, keys % n], axis=1), inverse.reshape(-1, 3)
+
+
+def _edge_hits(grid_e, lifts_e, edges_e, face_edges_e, grid_o, lifts_o, faces_o, pair_e, pair_o, edge_moved):
+    """Пересечения ребер граней pair_e с гранями pair_o: ребро, грань, t (см. _crossings) и число на пару."""
+    candidate_edge = face_edges_e[pair_e].ravel()
+    candidate_face = np.repeat(pair_o, 3)
+    n_faces = max(len(faces_o), 1)
+    keys, inverse = np.unique(candidate_edge * n_faces + candidate_face, return_inverse=True)
+    edge, face = keys // n_faces, keys % n_faces
+    ends = [edges_e[edge, 0], edges_e[edge, 1]]
+    corners = [faces_o[face, 0], faces_o[face, 1], faces_o[face, 2]]
+    points = [grid_e[i] for i in ends] + [grid_o[i] for i in corners]
+    lifts = [lifts_e[i] for i in ends] + [lifts_o[i] for i in corners]
+    hit, limit, real, series = _crossings(*points, lifts, edge_moved)
+    per_pair = hit[inverse].reshape(-1, 3)
+    return (edge[hit], face[hit], limit[hit], real[hit], series, np.flatnonzero(hit), inverse.reshape(-1, 3),
+            per_pair)
+
+
+# Порядок одночленов _MONOMIALS: (степень d, степень e)
+_POWERS = [(j, i) for j in range(4) for i in range(4 if j == 0 else 3)]
+
+
+def _leading(series):
+    """Знак ряда {(степень d, степень e): коэффициент} по старшему ненулевому одночлену."""
+    return next((1 if series[key] > 0 else -1 for key in sorted(series) if series[key]), 0)
+
+
+def _compare_t(first, second):
+    """Точное сравнение t = P / (P - Q) двух точек одного ребра; first, second - пары рядов (P, Q) из _crossings."""
+    terms = []
+    for (p, q) in (first, second):
+        p, d = [int(x) for x in p], [int(x) - int(y) for x, y in zip(p, q)]
+        terms.append((p, d))
+    (p1, d1), (p2, d2) = terms
+    # t1 - t2 = (P1 D2 - P2 D1) / (D1 D2)
+    product = {}
+    for i, (a, b) in enumerate(_POWERS):
+        for j, (c, e) in enumerate(_POWERS):
+            value = p1[i] * d2[j] - p2[i] * d1[j]
+            if value:
+                product[a + c, b + e] = product.get((a + c, b + e), 0) + value
+    sign = lambda values: _leading({power: value for power, value in zip(_POWERS, values)})
+    return _leading(product) * sign(d1) * sign(d2)
+
+
+def _order_on_edges(edge_key, t, series, tolerance=1e-9):
+    """Порядок точек по ребрам и вдоль ребра: по пределу t, почти равные - точным сравнением рядов.
+
+    Порядок при настоящих _E, _D может расходиться с символическим, если точки
+    в пределе ближе, чем их разносит возмущение, поэтому он не используется.
+    """
+    order = np.lexsort((t, edge_key))
+    close = (edge_key[order][1:] == edge_key[order][:-1]) & (np.diff(t[order]) <= tolerance)
+    if not close.any():
+        return order
+    # Цепочки близких соседей образуют группы, внутри группы - точное сравнение
+    group = np.concatenate([[0], np.cumsum(~close)])
+    compare = functools.cmp_to_key(lambda i, j: _compare_t(series[i], series[j]))
+    order = order.tolist()
+    for label in np.unique(group[1:][close]).tolist():
+        run = np.flatnonzero(group == label)
+        order[run[0]:run[-1] + 1] = sorted(order[run[0]:run[-1] + 1], key=compare)
+    return np.array(order)
+
+
+# --- 3. Разбиение граней ---
+def _project(points, normal):
+    """2D-координаты точек в плоскости с нормалью normal (обход против часовой стрелки сохраняется)."""
+    axis = int(np.argmax(np.abs(normal)))
+    u, v = [(1, 2), (2, 0), (0, 1)][axis]
+    if normal[axis] < 0:
+        u, v = v, u
+    return points[:, [u, v]]
+
+
+def _split_face(boundary, segments, coords, normal):
+    """Делит грань ломаными пересечения и триангулирует куски.
+
+    boundary - обход грани (углы и точки на ребрах), segments - пары точек.
+    Ломаная с концами на границе делит кусок на два, замкнутая - вырезает отверстие.
+    Возвращает список областей: (контуры [внешний, отверстия...], треугольники).
+    """
+    neighbors = {}
+    for u, v in segments:
+        neighbors.setdefault(u, []).append(v)
+        neighbors.setdefault(v, []).append(u)
+    chords = []
+    loops = []
+    seen = set()
+    on_boundary = set(boundary)
+    for start in [u for u in neighbors if u in on_boundary] + list(neighbors):
+        if start in seen:
+            continue
+        path = [start]
+        seen.add(start)
+        previous, current = None, start
+        while True:
+            following = [w for w in neighbors[current] if w != previous and w not in seen]
+            if not following:
+                break
+            previous, current = current, following[0]
+            path.append(current)
+            seen.add(current)
+        (chords if start in on_boundary else loops).append(path)
+
+    regions = [[list(boundary), []]]
+    for path in chords:
+        u, v = path[0], path[-1]
+        region = next((r for r in regions if u in r[0] and v in r[0]), None)
+        if region is None:
+            # Ломаные пересекаются только у самопересекающегося операнда: например, результат
+            # прошлой операции с совпадающими поверхностями, сложившийся при привязке к сетке
+            raise RuntimeError("Линии пересечения внутри грани пересекаются: операнд самопересекается.")
+        cycle = region[0]
+        k = cycle.index(u)
+        cycle = cycle[k:] + cycle[:k]
+        j = cycle.index(v)
+        inner = path[1:-1]
+        region[0] = cycle[:j + 1] + inner[::-1]
+        regions.append([cycle[j:] + [u] + inner, []])
+
+    # Проекция только точек этой грани, от ее первого угла (меньше потеря точности)
+    local = {v: k for k, v in enumerate(dict.fromkeys(boundary + list(neighbors)))}
+    flat = _project(coords[list(local)] - coords[boundary[0]], normal)
+
+    def xy(ids):
+        return flat[[local[v] for v in ids]]
+
+    # Вложенные петли обрабатываются от больших к меньшим: меньшая не может содержать большую
+    loops.sort(key=lambda loop: -abs(signed_area(xy(loop))))
+    for loop in loops:
+        point = xy(loop[:1])
+        for region in reversed(regions):
+            if points_in_polygon(point, xy(region[0]))[0] and not any(
+                    points_in_polygon(point, xy(hole))[0] for hole in region[1]):
+                region[1].append(loop)
+                break
+        regions.append([loop, []])
+
+    result = []
+    for k, (outer, holes) in enumerate(regions):
+        ids = np.array(outer + [i for hole in holes for i in hole])
+        # Куски от хорд обходят грань как она сама, петля - в любую сторону;
+        # у тонких кусков знак площади в float ненадежен, поэтому он решает только для петель
+        from_chords = k <= len(chords)
+        area = signed_area(xy(outer))
+        if len(outer) == 3 and not holes:
+            tris = ids[None] if from_chords or area > 0 else ids[None, ::-1]
+        else:
+            tris = ids[triangulate(xy(outer), [xy(hole) for hole in holes])]
+            if from_chords and area < 0:
+                tris = tris[:, ::-1]
+        result.append(([outer] + holes, tris))
+    return result
+
+
+# --- 4. Классификация ---
+def _patches(edges, owner, cut_edges, n, n_regions):
+    """Метки кусков поверхности: области граней связаны через общие ребра, кроме ребер разреза.
+
+    edges - ребра границ областей (k, 2), owner - номер области для каждого ребра.
+    Диагонали триангуляции не учитываются: при совпадающих точках пересечения
+    одна и та же пара вершин может оказаться диагональю в соседних областях.
+    """
+    edges = np.sort(edges, axis=1)
+    keys = edges[:, 0] * n + edges[:, 1]
+    keep = ~np.isin(keys, cut_edges)
+    keys, owner = keys[keep], owner[keep]
+    order = np.argsort(keys, kind="stable")
+    keys, owner = keys[order], owner[order]
+    same = keys[1:] == keys[:-1]
+    return connected_labels(n_regions, np.stack([owner[:-1][same], owner[1:][same]], axis=1))
+
+
+def _inside(vertices, faces, labels, other_vertices, other_faces):
+    """Для каждой грани: лежит ли ее кусок внутри другого операнда.
+
+    Второй операнд в vertices раздут на _E и сдвинут на _D, поэтому совпадающие
+    грани операндов разнесены и центр грани не лежит на чужой поверхности.
+    """
+    tris = vertices[faces]
+    area = np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1)
+    # Представитель куска - центр его самой большой грани
+    order = np.lexsort((-area, labels))
+    first = order[np.r_[True, labels[order][1:] != labels[order][:-1]]]
+    points = tris[first].mean(axis=1)
+    inside = winding_numbers(points, other_vertices[other_faces]) > 0.5
+    patch_inside = np.zeros(labels.max() + 1 if len(labels) else 0, dtype=bool)
+    patch_inside[labels[first]] = inside
+    return patch_inside[labels]
+
+
+# --- 5. Булева операция ---
+def boolean(mesh_a, mesh_b, operation, quantum=DEFAULT_QUANTUM):
+    """operation: "union", "intersection" или "difference" (a - b). Возвращает замкнутый Mesh.
+
+    RuntimeError, если результат после привязки к сетке не многообразие.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Неизвестная операция {operation!r}.")
+    grid_a, faces_a = snap(mesh_a, quantum)
+    grid_b, faces_b = snap(mesh_b, quantum)
+    both = np.concatenate([grid_a, grid_b])
+    if len(both) and (both.max(axis=0) - both.min(axis=0)).max() >= MAX_EXTENT:
+        raise ValueError(f"Операнды больше {MAX_EXTENT * quantum:.0f} мм: увеличьте шаг сетки.")
+    na, nb = len(grid_a), len(grid_b)
+    tris_a, tris_b = grid_a[faces_a], grid_b[faces_b]
+    # Для пересечения второй операнд сдувается: совпадающие грани уходят внутрь первого
+    lifts_a = np.zeros_like(grid_a)
+    lifts_b = _lifts(grid_b, faces_b, -1 if operation == "intersection" else 1)
+
+    # Кандидаты - пары треугольников с пересекающимися боксами (запас в шаг сетки)
+    pair_a, pair_b = overlapping_pairs(BVH(tris_a.astype(np.float64)), BVH(tris_b.astype(np.float64)), margin=1.0)
+    # Боксы длинных треугольников велики: явно разделенные плоскостью пары отсеиваются до точных предикатов
+    apart = _separated(tris_a[pair_a], tris_b[pair_b]) | _separated(tris_b[pair_b], tris_a[pair_a])
+    pair_a, pair_b = pair_a[~apart], pair_b[~apart]
+    edges_a, face_edges_a = _edge_table(faces_a, na)
+    edges_b, face_edges_b = _edge_table(faces_b, nb)
+    hits_a = _edge_hits(grid_a, lifts_a, edges_a, face_edges_a, grid_b, lifts_b, faces_b, pair_a, pair_b, False)
+    hits_b = _edge_hits(grid_b, lifts_b, edges_b, face_edges_b, grid_a, lifts_a, faces_a, pair_b, pair_a, True)
+    count = hits_a[-1].sum(axis=1) + hits_b[-1].sum(axis=1)
+    if np.any((count != 0) & (count != 2)):
+        raise RuntimeError("Пересечение пары треугольников не общего положения (ошибка предикатов).")
+
+    # Точки пересечения: сначала ребра a, затем ребра b; вершины - [a, b, точки]
+    edge_a, face_on_b, limit_a, t_a, series_a, hit_index_a, inverse_a, flags_a = hits_a
+    edge_b, face_on_a, limit_b, t_b, series_b, hit_index_b, inverse_b, flags_b = hits_b
+    id_a = np.full(inverse_a.max(initial=-1) + 1, -1)
+    id_a[hit_index_a] = na + nb + np.arange(len(edge_a))
+    id_b = np.full(inverse_b.max(initial=-1) + 1, -1)
+    id_b[hit_index_b] = na + nb + len(edge_a) + np.arange(len(edge_b))
+    # coords - при настоящих _E, _D (разбиение граней и классификация), limit - в пределе (результат)
+    real_b = grid_b + _E * lifts_b + _D * _WEIGHTS
+    coords, limit = [grid_a.astype(np.float64), real_b], [grid_a, grid_b]
+    for grid, real, edges, edge, t, t_limit in ((grid_a, grid_a, edges_a, edge_a, t_a, limit_a),
+                                                (grid_b, real_b, edges_b, edge_b, t_b, limit_b)):
+        p, q = edges[edge, 0], edges[edge, 1]
+        coords.append(real[p] + (real[q] - real[p]) * t[:, None])
+        limit.append(grid[p] + (grid[q] - grid[p]) * t_limit[:, None])
+    coords, limit = np.concatenate(coords), np.concatenate(limit)
+
+    # Отрезки: у каждой пересекающейся пары ровно две точки
+    ids = np.concatenate([np.where(flags_a, id_a[inverse_a], -1), np.where(flags_b, id_b[inverse_b], -1)], axis=1)
+    crossing = count == 2
+    ends = np.sort(ids[crossing], axis=1)[:, -2:]
+    segment_face_a, segment_face_b = pair_a[crossing], pair_b[crossing]
+
+    faces_b_global = faces_b + na
+    all_faces = np.concatenate([faces_a, faces_b_global])
+    n_faces_a = len(faces_a)
+    # Точки на ребрах по порядку вдоль ребра (от меньшего индекса вершины)
+    edge_points = {}
+    edge_key = np.concatenate([edge_a, len(edges_a) + edge_b])
+    point_t = np.concatenate([limit_a, limit_b])
+    order = _order_on_edges(edge_key, point_t, np.concatenate([series_a, series_b]))
+    for key, point in zip(edge_key[order].tolist(), (na + nb + order).tolist()):
+        edge_points.setdefault(key, []).append(point)
+    all_edges = np.concatenate([edges_a, edges_b + na])
+    all_face_edges = np.concatenate([face_edges_a, face_edges_b + len(edges_a)])
+
+    segments = {}
+    for face, (u, v) in zip(np.concatenate([segment_face_a, n_faces_a + segment_face_b]).tolist(),
+                            np.concatenate([ends, ends]).tolist()):
+        segments.setdefault(face, []).append((u, v))
+    # Перестраиваются грани с отрезками и грани, на чьих ребрах есть точки
+    cut_faces = set(segments) | set(np.flatnonzero(np.isin(all_face_edges, list(edge_points)).any(axis=1)).tolist())
+
+    new_faces = []
+    cut_order = sorted(cut_faces)
+    corner_points = coords[all_faces[cut_order]]
+    normals = np.cross(corner_points[:, 1] - corner_points[:, 0], corner_points[:, 2] - corner_points[:, 0])
+    for face, normal in zip(cut_order, normals):
+        corners = all_faces[face].tolist()
+        boundary = []
+        for k in range(3):
+            start, end = corners[k], corners[(k + 1) % 3]
+            boundary.append(start)
+            points = edge_points.get(int(all_face_edges[face, k]), [])
+            boundary.extend(points if all_edges[all_face_edges[face, k], 0] == start else points[::-1])
+        new_faces.append((face, _split_face(boundary, segments.get(face, []), coords, normal)))
+
+    keep = np.ones(len(all_faces), dtype=bool)
+    keep[cut_order] = False
+    side = np.concatenate([np.zeros(n_faces_a, dtype=bool), np.ones(len(faces_b), dtype=bool)])
+    # Области: целые грани, затем куски разрезанных граней; у каждой - ребра границы
+    kept = all_faces[keep]
+    region_edges = [np.stack([kept, np.roll(kept, -1, axis=1)], axis=2).reshape(-1, 2)]
+    region_owner = [np.repeat(np.arange(len(kept)), 3)]
+    region_side = [side[keep]]
+    result_faces = [kept]
+    triangle_region = [np.arange(len(kept))]
+    n_regions = len(kept)
+    for face, regions in new_faces:
+        for cycles, tris in regions:
+            edges = [(u, v) for cycle in cycles for u, v in zip(cycle, cycle[1:] + cycle[:1])]
+            region_edges.append(np.array(edges).reshape(-1, 2))
+            region_owner.append(np.full(len(edges), n_regions))
+            region_side.append([side[face]])
+            result_faces.append(tris)
+            triangle_region.append(np.full(len(tris), n_regions))
+            n_regions += 1
+    result_faces = np.concatenate(result_faces)
+    triangle_region = np.concatenate(triangle_region)
+
+    n = len(coords)
+    cut_edges = ends[:, 0] * n + ends[:, 1]
+    labels = _patches(np.concatenate(region_edges), np.concatenate(region_owner), cut_edges, n, n_regions)
+    labels = labels[triangle_region]
+    on_b = np.concatenate(region_side).astype(bool)[triangle_region]
+    inside = np.empty(len(result_faces), dtype=bool)
+    if (~on_b).any():
+        inside[~on_b] = _inside(coords, result_faces[~on_b], labels[~on_b], coords, faces_b_global)
+    if on_b.any():
+        inside[on_b] = _inside(coords, result_faces[on_b], labels[on_b], coords, faces_a)
+
+    if operation == "union":
+        selected, flip = ~inside, np.zeros(len(result_faces), dtype=bool)
+    elif operation == "intersection":
+        selected, flip = inside, np.zeros(len(result_faces), dtype=bool)
+    else:
+        selected, flip = np.where(on_b, inside, ~inside), on_b
+    faces = np.where(flip[:, None], result_faces[:, ::-1], result_faces)[selected]
+    # В пределе стенки толщиной в раздувание схлопываются: связность чистится на сетке,
+    # а координаты остаются точными, чтобы не терять объем на округлении
+    # (касание после объединения склеивается, после разности и пересечения - разводится)
+    grid, source, faces = _clean(np.rint(limit).astype(np.int64), faces, merged=operation == "union")
+    faces = _drop_flat_shells(grid, faces)
+    used, local = np.unique(faces, return_inverse=True)
+    result = make_mesh(limit[source[used]].mean(axis=1) * quantum, local.reshape(-1, 3))
+    if not is_manifold(result):
+        raise RuntimeError(f"Результат {operation} не многообразие: операнды не замкнуты или самопересекаются.")
+    return result
+
+
+def _drop_flat_shells(grid, faces):
+    """Убирает оболочки тоньше половины шага сетки (объем < площадь / 2 в шагах сетки).
+
+    Такие оболочки остаются от касаний, схлопнувшихся при привязке к сетке;
+    настоящая деталь такой толщины не печатается.
+    """
+    if len(faces) == 0:
+        return faces
+    labels = connected_labels(len(grid), np.concatenate([faces[:, :2], faces[:, 1:]]))[faces[:, 0]]
+    tris = grid[faces].astype(np.float64)
+    volume = np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])) / 6
+    area = np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1) / 2
+    volume = np.bincount(labels, weights=volume, minlength=len(grid))
+    area = np.bincount(labels, weights=area, minlength=len(grid))
+    return faces[np.abs(volume[labels]) >= area[labels] / 2]
+
+
+def union(*meshes, quantum=DEFAULT_QUANTUM):
+    """Объединение нескольких тел (попарно, слева направо)."""
+    return functools.reduce(lambda a, b: boolean(a, b, "union", quantum), meshes)
+
+
+def difference(mesh, *cutters, quantum=DEFAULT_QUANTUM):
+    return functools.reduce(lambda a, b: boolean(a, b, "difference", quantum), cutters, mesh)
+
+
+def intersection(*meshes, quantum=DEFAULT_QUANTUM):
+    return functools.reduce(lambda a, b: boolean(a, b, "intersection", quantum), meshes)
+
+
+def combine(positive, negative=(), quantum=DEFAULT_QUANTUM):
+    """union(positive) - union(negative): тела и вырезаемые объемы одной операцией для вызывающего."""
+    body = union(*positive, quantum=quantum)
+    if not negative:
+        return body
+    return boolean(body, union(*negative, quantum=quantum), "difference", quantum)
+
+
+def is_manifold(mesh):
+    """Каждое ориентированное ребро встречается ровно раз, и есть обратное к нему."""
+    n = max(len(mesh.vertices), 1)
+    keys = (mesh.faces * n + np.roll(mesh.faces, -1, axis=1)).ravel()
+    reverse = (np.roll(mesh.faces, -1, axis=1) * n + mesh.faces).ravel()
+    return len(np.unique(keys)) == len(keys) and bool(np.isin(reverse, keys).all())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Булевы операции над замкнутыми STL.")
+    parser.add_argument("--quantum", type=float, default=DEFAULT_QUANTUM, help="шаг сетки в мм")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("union", "объединение всех входов"), ("difference", "первый вход минус остальные"),
+                       ("intersection", "пересечение всех входов")):
+        operation = commands.add_parser(name, help=text)
+        operation.add_argument("inputs", nargs="+")
+        operation.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    meshes = [read_stl(path) for path in args.inputs]
+    operation = {"union": union, "difference": difference, "intersection": intersection}[args.command]
+    result = operation(*meshes, quantum=args.quantum)
+    elapsed = time.perf_counter() - start
+    print(f"{len(result.faces)} треугольников за {elapsed * 1000:.0f} мс, "
+          f"{'многообразие' if is_manifold(result) else 'НЕ многообразие'}")
+    write_stl(args.output, result)
+    return 0 if is_manifold(result) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Параллельный экспорт множества деталей через общую память.
+
+Пример (перебор параметров генератора, все сочетания):
+    python -m meshtools.export corner -p internal_diameter=2.7,2.78,2.85 -p z_offset=-2,0 -o sweep/ --format 3mf
+
+Вершины и грани всех деталей копируются в один блок multiprocessing.shared_memory;
+рабочим процессам передаются только имя блока и смещения, сами массивы не
+сериализуются. Каждый процесс пишет пачку файлов во временные имена, делает
+fsync всей пачки, переименовывает файлы и один раз синхронизирует каталог.
+Формат выбирается по расширению: .stl, .3mf или .meshz.
+"""
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from meshtools.archive import ARCHIVE_SUFFIX, encode
+from meshtools.buildgraph import BuildGraph
+from meshtools.generators import GENERATORS, resolve_params
+from meshtools.mesh import make_mesh
+from meshtools.stl_io import stl_bytes
+from meshtools.threemf_io import write_3mf
+
+DEFAULT_BATCH = 16
+FORMATS = (".stl", ".3mf", ARCHIVE_SUFFIX)
+
+
+# --- 1. Запись одного файла ---
+def _write_part(f, path, mesh, name):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".3mf":
+        write_3mf(f, [(name, mesh)])
+    elif ext == ARCHIVE_SUFFIX:
+        f.write(encode(mesh, params={"name": name}))
+    else:
+        f.write(stl_bytes(mesh))
+
+
+def _release(block):
+    try:
+        block.close()
+    except BufferError:
+        # Представления еще живы в трассировке исключения; отображение закроется вместе с процессом
+        pass
+
+
+def _sync_dirs(paths):
+    for directory in {os.path.dirname(os.path.abspath(p)) for p in paths}:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# --- 2. Рабочий процесс ---
+def _write_files(buffer, n_vertices, n_faces, batch, fsync):
+    # Представления поверх общей памяти: массивы не копируются
+    vertices = np.ndarray((n_vertices, 3), dtype=np.float64, buffer=buffer)
+    faces = np.ndarray((n_faces, 3), dtype=np.int64, buffer=buffer, offset=vertices.nbytes)
+    files = []
+    sizes = []
+    try:
+        try:
+            for path, name, v0, v1, f0, f1 in batch:
+                f = open(f"{path}.{os.getpid()}.tmp", "wb")
+                files.append((f, path))
+                _write_part(f, path, make_mesh(vertices[v0:v1], faces[f0:f1]), name)
+                sizes.append(f.tell())
+            for f, _ in files:
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+        finally:
+            for f, _ in files:
+                f.close()
+        for f, path in files:
+            os.replace(f.name, path)
+    finally:
+        # После сбоя временные файлы пачки не должны оставаться рядом с результатами
+        for f, _ in files:
+            try:
+                os.remove(f.name)
+            except FileNotFoundError:
+                pass
+    if fsync:
+        _sync_dirs([path for _, path in files])
+    return sizes
+
+
+def _write_batch(block_name, n_vertices, n_faces, batch, fsync):
+    """Пишет пачку деталей из общего блока; batch - список (путь, имя, v0, v1, f0, f1)."""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        return _write_files(block.buf, n_vertices, n_faces, batch, fsync)
+    finally:
+        _release(block)
+
+
+# --- 3. Экспорт ---
+def export_parts(parts, workers=None, batch=DEFAULT_BATCH, fsync=True):
+    """Пишет детали параллельно; parts - список (путь, Mesh) или (путь, Mesh, имя).
+
+    workers=0 - запись в текущем процессе (для сравнения и отладки).
+    Возвращает размеры файлов в байтах в порядке parts.
+    """
+    entries = []
+    for part in parts:
+        path, mesh = part[:2]
+        name = part[2] if len(part) > 2 else os.path.splitext(os.path.basename(path))[0]
+        if os.path.splitext(path)[1].lower() not in FORMATS:
+            raise ValueError(f"{path}: неизвестный формат, ожидается один из {', '.join(FORMATS)}.")
+        entries.append((path, name, mesh))
+    if not entries:
+        return []
+    n_vertices = sum(len(mesh.vertices) for _, _, mesh in entries)
+    n_faces = sum(len(mesh.faces) for _, _, mesh in entries)
+    block = shared_memory.SharedMemory(create=True, size=max((n_vertices + n_faces) * 3 * 8, 1))
+    try:
+        vertices = np.ndarray((n_vertices, 3), dtype=np.float64, buffer=block.buf)
+        faces = np.ndarray((n_faces, 3), dtype=np.int64, buffer=block.buf, offset=vertices.nbytes)
+        manifest = []
+        v0 = f0 = 0
+        for path, name, mesh in entries:
+            v1, f1 = v0 + len(mesh.vertices), f0 + len(mesh.faces)
+            vertices[v0:v1] = mesh.vertices
+            faces[f0:f1] = mesh.faces
+            manifest.append((path, name, v0, v1, f0, f1))
+            v0, f0 = v1, f1
+        del vertices, faces
+        batches = [manifest[i:i + batch] for i in range(0, len(manifest), batch)]
+        args = (block.name, n_vertices, n_faces)
+        if workers == 0:
+            results = [_write_batch(*args, b, fsync) for b in batches]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_write_batch, *zip(*[(*args, b, fsync) for b in batches])))
+        return [size for sizes in results for size in sizes]
+    finally:
+        block.unlink()
+        _release(block)
+
+
+# --- 4. Перебор параметров ---
+def sweep_params(name, grid):
+    """Все сочетания значений: grid - {параметр: [значения]}; возвращает полные наборы параметров."""
+    keys = list(grid)
+    return [resolve_params(name, dict(zip(keys, values))) for values in itertools.product(*grid.values())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Параллельный экспорт перебора параметров генератора.")
+    parser.add_argument("generator", choices=sorted(GENERATORS))
+    parser.add_argument("-p", "--param", action="append", default=[], help="имя=значение[,значение...]")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--format", choices=[ext[1:] for ext in FORMATS], default="stl")
+    parser.add_argument("--workers", type=int, default=None, help="процессы записи (0 - без пула)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="файлов на один fsync")
+    parser.add_argument("--no-fsync", action="store_true")
+    args = parser.parse_args(argv)
+
+    grid = {}
+    try:
+        for item in args.param:
+            key, _, values = item.partition("=")
+            grid[key] = [json.loads(v) for v in values.split(",")]
+        sets = sweep_params(args.generator, grid)
+    except (KeyError, ValueError) as error:
+        parser.error(str(error.args[0]))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    parts = []
+    index = []
+    with BuildGraph(GENERATORS[args.generator][0]) as graph:
+        for k, params in enumerate(sets):
+            path = os.path.join(args.output_dir, f"{args.generator}_{k:03d}.{args.format}")
+            parts.append((path, graph.build(params)))
+            index.append({"file": os.path.basename(path), "params": params})
+    built = time.perf_counter()
+    sizes = export_parts(parts, args.workers, args.batch, not args.no_fsync)
+    with open(os.path.join(args.output_dir, "sweep.json"), "w", encoding="utf-8") as f:
+        json.dump({"generator": args.generator, "parts": index}, f, ensure_ascii=False, indent=2)
+    print(f"{len(parts)} деталей: сборка {built - start:.2f} с, запись {time.perf_counter() - built:.2f} с, "
+          f"{sum(sizes) / 2 ** 20:.1f} МБ -> {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Выдавливание и вращение плоских профилей.
+
+Профиль - внешний контур и отверстия (массивы (k, 2)), собранные из дуг,
+секторов кольца и ломаных. Стенки строятся одной векторной операцией,
+крышки триангулируются; ориентация граней выбирается по знаку площади
+каждого контура, поэтому нормали сразу смотрят наружу и пересчет нормалей
+(normals_make_consistent) не нужен.
+"""
+import collections
+
+import numpy as np
+
+from meshtools.mesh import make_mesh
+from meshtools.primitives import unit_circle
+from meshtools.triangulate import signed_area, triangulate
+
+# cap - готовая триангуляция (t, 3) против часовой стрелки в индексах
+# [outer, holes...]; None - триангулировать отсечением ушей
+Profile = collections.namedtuple("Profile", ["outer", "holes", "cap"], defaults=((), None))
+
+
+# --- 1. Элементы профиля ---
+def arc(radius, start_deg, sweep_deg, segments, center=(0.0, 0.0)):
+    """Точки дуги (segments + 1, 2), включая оба конца."""
+    points = unit_circle(segments, float(start_deg), float(sweep_deg)) * radius
+    if abs(sweep_deg) >= 360.0:
+        points = np.concatenate([points, points[:1]])
+    return points + np.asarray(center, dtype=np.float64)
+
+
+def circle(radius, segments, center=(0.0, 0.0)):
+    """Замкнутая окружность (segments, 2) против часовой стрелки."""
+    return unit_circle(segments) * radius + np.asarray(center, dtype=np.float64)
+
+
+def polygon(*pieces):
+    """Склеивает точки, дуги и ломаные в один замкнутый контур.
+
+    Совпадающие соседние точки (конец одной дуги и начало следующей,
+    повтор первой точки в конце) удаляются.
+    """
+    points = np.concatenate([np.atleast_2d(np.asarray(p, dtype=np.float64)) for p in pieces])
+    keep = np.any(np.abs(points - np.roll(points, 1, axis=0)) > 1e-12, axis=1)
+    return points[keep]
+
+
+def rounded_polygon(points, radius, segments=8):
+    """Многоугольник со скругленными углами (как кронштейны с галтелями).
+
+    radius - скаляр или радиус для каждой вершины (0 - острый угол).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (n,))
+    u = np.roll(points, 1, axis=0) - points
+    v = np.roll(points, -1, axis=0) - points
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    # Половина угла при вершине и точки касания на соседних ребрах
+    half = np.arccos(np.clip(np.einsum("ij,ij->i", u, v), -1.0, 1.0)) / 2
+    bisector = u + v
+    bisector /= np.maximum(np.linalg.norm(bisector, axis=1, keepdims=True), 1e-300)
+    center = points + bisector * (radius / np.sin(half))[:, None]
+    start = points + u * (radius / np.tan(half))[:, None] - center
+    end = points + v * (radius / np.tan(half))[:, None] - center
+    a0 = np.arctan2(start[:, 1], start[:, 0])
+    sweep = np.arctan2(end[:, 1], end[:, 0]) - a0
+    sweep = (sweep + np.pi) % (2 * np.pi) - np.pi
+    t = np.arange(segments + 1) / segments
+    angles = a0[:, None] + sweep[:, None] * t[None]
+    arcs = center[:, None] + radius[:, None, None] * np.stack([np.cos(angles), np.sin(angles)], axis=2)
+    # Острые углы (radius = 0) дают segments + 1 совпадающих точек - их убирает polygon
+    return polygon(arcs.reshape(-1, 2))
+
+
+def annular_sector_profile(inner_radius, outer_radius, start_deg, sweep_deg, segments):
+    """Сектор кольца; крышка - полоса четырехугольников без отсечения ушей."""
+    if abs(sweep_deg) >= 360.0:
+        outer = circle(outer_radius, segments)
+        inner = circle(inner_radius, segments)
+        i = np.arange(segments)
+        j = (i + 1) % segments
+        o, h = i, segments + i
+        oj, hj = j, segments + j
+        cap = np.concatenate([np.stack([o, oj, hj], axis=1), np.stack([o, hj, h], axis=1)])
+        return Profile(outer, [inner], cap)
+    outer = arc(outer_radius, start_deg, sweep_deg, segments)
+    inner = arc(inner_radius, start_deg, sweep_deg, segments)[::-1]
+    k = segments + 1
+    i = np.arange(segments)
+    # Внутренняя дуга идет в обратном порядке: точка i наружной дуги напротив 2k-1-i
+    o, oj = i, i + 1
+    h, hj = 2 * k - 1 - i, 2 * k - 2 - i
+    cap = np.concatenate([np.stack([o, oj, hj], axis=1), np.stack([o, hj, h], axis=1)])
+    if sweep_deg < 0:
+        cap = cap[:, ::-1]
+    return Profile(np.concatenate([outer, inner]), (), cap)
+
+
+# --- 2. Крышки и стенки ---
+def _loops(profile):
+    return [np.asarray(profile.outer, dtype=np.float64)] + [np.asarray(h, dtype=np.float64) for h in profile.holes]
+
+
+def profile_triangles(profile):
+    """Триангуляция крышки (t, 3) против часовой стрелки."""
+    if profile.cap is not None:
+        return np.asarray(profile.cap, dtype=np.int64)
+    return triangulate(profile.outer, profile.holes)
+
+
+def _wall_edges(loops):
+    """Ребра (i, j) всех контуров, ориентированные так, что материал слева."""
+    sizes = [len(loop) for loop in loops]
+    offsets = np.cumsum([0] + sizes)
+    i = np.arange(offsets[-1])
+    j = i + 1
+    j[offsets[1:] - 1] = offsets[:-1]
+    # Внешний контур - против часовой стрелки, отверстия - по часовой
+    flip = np.repeat([(signed_area(loop) < 0) == (k == 0) for k, loop in enumerate(loops)], sizes)
+    return np.where(flip, j, i), np.where(flip, i, j)
+
+
+def extrude(profile, height, z=0.0):
+    """Выдавливает профиль вдоль Z от z до z + height."""
+    loops = _loops(profile)
+    points = np.concatenate(loops)
+    n = len(points)
+    vertices = np.empty((2 * n, 3))
+    vertices[:n, :2] = vertices[n:, :2] = points
+    vertices[:n, 2] = z
+    vertices[n:, 2] = z + height
+    a, b = _wall_edges(loops)
+    cap = profile_triangles(profile)
+    faces = np.concatenate([
+        np.stack([a, b, b + n], axis=1),
+        np.stack([a, b + n, a + n], axis=1),
+        cap[:, ::-1],
+        cap + n,
+    ])
+    if height < 0:
+        faces = faces[:, ::-1]
+    return make_mesh(vertices, faces)
+
+
+def revolve(profile, segments, start_deg=0.0, sweep_deg=360.0):
+    """Вращает профиль в плоскости (r, z) вокруг оси Z.
+
+    Все точки профиля должны иметь r > 0. При неполном обороте торцы
+    заделываются крышками профиля.
+    """
+    loops = _loops(profile)
+    points = np.concatenate(loops)
+    if (points[:, 0] <= 0).any():
+        raise ValueError("Профиль вращения должен лежать при r > 0.")
+    closed = abs(sweep_deg) >= 360.0
+    ring = unit_circle(segments, float(start_deg), float(sweep_deg))
+    m, n = len(ring), len(points)
+    vertices = np.empty((m, n, 3))
+    vertices[:, :, 0] = ring[:, 0:1] * points[None, :, 0]
+    vertices[:, :, 1] = ring[:, 1:2] * points[None, :, 0]
+    vertices[:, :, 2] = points[None, :, 1]
+
+    a, b = _wall_edges(loops)
+    steps = np.arange(m if closed else m - 1)
+    this = (steps * n)[:, None]
+    other = (((steps + 1) % m) * n)[:, None]
+    faces = [
+        np.stack([a + this, b + other, b + this], axis=2).reshape(-1, 3),
+        np.stack([a + this, a + other, b + other], axis=2).reshape(-1, 3),
+    ]
+    if not closed:
+        # Начальный торец смотрит против направления вращения, конечный - по нему
+        cap = profile_triangles(profile)
+        faces += [cap, cap[:, ::-1] + (m - 1) * n]
+    faces = np.concatenate(faces)
+    if sweep_deg < 0:
+        faces = faces[:, ::-1]
+    return make_mesh(vertices.reshape(-1, 3), faces)
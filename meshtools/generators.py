@@ -0,0 +1,224 @@
+"""Безголовые генераторы деталей: те же шаги, что в Blender-скриптах, но на NumPy.
+
+Каждый генератор - рецепт из шагов buildgraph.Step; BuildGraph пересчитывает
+шаг только если изменились его параметры или результаты шагов, от которых он
+зависит, а независимые шаги (сектор и две трубки уголка) считает параллельно.
+"""
+import math
+
+from meshtools.buildgraph import BuildGraph, Step
+from meshtools.clip import cut_slab
+from meshtools.extrude import Profile, annular_sector_profile, extrude, polygon, revolve
+from meshtools.hub import HUB_DEFAULTS, PRESETS as HUB_PRESETS, hub_steps
+from meshtools.mesh import merge, transformed
+from meshtools.primitives import instantiate, instantiate_many, rotation_matrix, tube_template
+
+
+# --- 1. Общие шаги ---
+def slab_cut(joined, p):
+    """Вычитание куба из create_cut_plane: масштаб по Z равен cut_thickness / 2."""
+    half = p["cut_thickness"] / 4
+    return cut_slab(joined, p["z_offset"] - half, p["z_offset"] + half, half_size=p["cut_size"] / 2)
+
+
+# --- 2. Уголок (PythonScript Creating new corner.py) ---
+CORNER_DEFAULTS = {
+    # Трубки
+    "internal_diameter": 2.78,
+    "external_diameter_ratio": 1.5,
+    "external_height": 28.0,
+    "tube_segments": 32,
+    # Сектор
+    "inner_diameter": 28.0,
+    "outer_diameter": 35.0,
+    "height": 25.0,
+    "missing_sector_start": 0.0,
+    "missing_sector_end": 90.0,
+    "segments": 1024,
+    # Объединение и разрез
+    "offset_of_joinded": 10.0,
+    "cut_thickness": 10.0,
+    "cut_size": 100.0,
+    "z_offset": -3.0,
+}
+
+SECTOR_PARAMS = ("inner_diameter", "outer_diameter", "height", "missing_sector_start", "missing_sector_end", "segments")
+TUBE_PARAMS = ("internal_diameter", "external_diameter_ratio", "external_height", "tube_segments", "inner_diameter")
+JOIN_PARAMS = ("offset_of_joinded",)
+CUT_PARAMS = ("cut_thickness", "cut_size", "z_offset")
+
+
+def corner_sector(p):
+    """Полый цилиндр с отсутствующим сектором: выдавленный профиль сектора кольца."""
+    sweep = (p["missing_sector_start"] - p["missing_sector_end"]) % 360.0
+    profile = annular_sector_profile(p["inner_diameter"] / 2, p["outer_diameter"] / 2,
+                                     p["missing_sector_end"], sweep, int(p["segments"]))
+    return extrude(profile, p["height"])
+
+
+def _corner_tube(p, translation, rotation):
+    height = p["external_height"]
+    external_diameter = p["external_diameter_ratio"] * p["internal_diameter"]
+    return instantiate(tube_template(int(p["tube_segments"])), (external_diameter / 2, p["internal_diameter"] / 2),
+                       height, translation, rotation)
+
+
+def corner_tube_x(p):
+    """Трубка-заглушка main_cyl1; pos_tube = outer_diameter - width = inner_diameter."""
+    return _corner_tube(p, (-p["inner_diameter"], 0.0, p["external_height"] / 2), rotation_matrix(90, 0, 90))
+
+
+def corner_tube_y(p):
+    """Трубка-заглушка main_cyl2."""
+    return _corner_tube(p, (0.0, -p["inner_diameter"], p["external_height"] / 2), rotation_matrix(90, 0, 180))
+
+
+def corner_joined(sector, tube_x, tube_y, p):
+    """join_objects + rotate_object(-90, 45, 0) + move_object(z=offset_of_joinded)."""
+    return transformed(merge([sector, tube_x, tube_y]), rotation_matrix(-90, 45, 0), (0.0, 0.0, p["offset_of_joinded"]))
+
+
+CORNER_STEPS = (
+    Step("sector", corner_sector, SECTOR_PARAMS),
+    Step("tube_x", corner_tube_x, TUBE_PARAMS),
+    Step("tube_y", corner_tube_y, TUBE_PARAMS),
+    Step("joined", corner_joined, JOIN_PARAMS, deps=("sector", "tube_x", "tube_y")),
+    Step("cut", slab_cut, CUT_PARAMS, deps=("joined",)),
+)
+
+
+def build_corner(params, graph=None):
+    """Собирает уголок; graph - BuildGraph(CORNER_STEPS) с кэшами, переживающими вызовы."""
+    if graph is None:
+        with BuildGraph(CORNER_STEPS) as graph:
+            return graph.build({**CORNER_DEFAULTS, **params})
+    return graph.build({**CORNER_DEFAULTS, **params})
+
+
+# --- 3. Шестилучевая трубка (PythonScript Creating new 6 ray tube.2024.12.18.py) ---
+SIX_RAY_DEFAULTS = {
+    "internal_diameter": 2.85,
+    "external_diameter_ratio": 1.75,
+    "external_height": 33.0,
+    "tube_segments": 32,
+    "rotate_x": 45.0,
+    "rotate_y": -35.26,
+    "cut_thickness": 6.5,
+    "cut_size": 100.0,
+    "z_offset": 6.5,
+}
+
+SIX_RAY_TUBE_PARAMS = ("internal_diameter", "external_diameter_ratio", "external_height", "tube_segments")
+SIX_RAY_JOIN_PARAMS = ("external_height", "rotate_x", "rotate_y")
+
+
+def six_ray_tubes(p):
+    """Трубка и две ее копии, повернутые на 90 градусов вокруг X и Y (create_rotated_copies)."""
+    external_diameter = p["external_diameter_ratio"] * p["internal_diameter"]
+    return instantiate_many(
+        tube_template(int(p["tube_segments"])),
+        radii=[[external_diameter / 2, p["internal_diameter"] / 2]] * 3,
+        heights=[p["external_height"]] * 3,
+        rotations=[rotation_matrix(), rotation_matrix(90, 0, 0), rotation_matrix(0, 90, 0)],
+    )
+
+
+def six_ray_joined(tubes, p):
+    """join_objects + rotate_object вокруг общего центра трубок на высоте external_height / 2."""
+    rotation = rotation_matrix(p["rotate_x"], p["rotate_y"], 0)
+    return transformed(tubes, rotation, (0.0, 0.0, p["external_height"] / 2))
+
+
+SIX_RAY_STEPS = (
+    Step("tubes", six_ray_tubes, SIX_RAY_TUBE_PARAMS),
+    Step("joined", six_ray_joined, SIX_RAY_JOIN_PARAMS, deps=("tubes",)),
+    Step("cut", slab_cut, CUT_PARAMS, deps=("joined",)),
+)
+
+
+# --- 4. Вентиляционный переходник (Vent/PythonScript Creating vent connector.py) ---
+# Размеры в мм (в скрипте - в метрах); по умолчанию - переходник на 100 мм
+VENT_DEFAULTS = {
+    "body_height": 40.0,
+    "body_diameter": 95.0,
+    "flange_height": 3.0,
+    "flange_diameter": 115.0,
+    "lip_height": 3.0,
+    "lip_diameter": 98.0,
+    "bore_diameter": 92.0,
+    "segments": 32,
+}
+
+VENT_PARAMS = tuple(VENT_DEFAULTS)
+
+
+def vent_connector(p):
+    """Корпус, фланец посередине и два бортика минус сквозное отверстие - как тело вращения.
+
+    Профиль (r, z) - объединение прямоугольников от отверстия до каждого цилиндра.
+    Solidify из скрипта не повторяется: стенка корпуса тоньше толщины оболочки.
+    """
+    bore = p["bore_diameter"] / 2
+    body, flange, lip = p["body_diameter"] / 2, p["flange_diameter"] / 2, p["lip_diameter"] / 2
+    top = p["body_height"] / 2
+    rim = top + p["lip_height"]
+    half_flange = p["flange_height"] / 2
+    outline = polygon(
+        (bore, -rim), (lip, -rim), (lip, -top), (body, -top), (body, -half_flange), (flange, -half_flange),
+        (flange, half_flange), (body, half_flange), (body, top), (lip, top), (lip, rim), (bore, rim),
+    )
+    return revolve(Profile(outline), int(p["segments"]))
+
+
+VENT_STEPS = (
+    Step("connector", vent_connector, VENT_PARAMS),
+)
+
+
+# --- 5. Реестр ---
+# Имя -> (шаги рецепта, параметры по умолчанию)
+GENERATORS = {
+    "corner": (CORNER_STEPS, CORNER_DEFAULTS),
+    "six_ray_tube": (SIX_RAY_STEPS, SIX_RAY_DEFAULTS),
+    "vent_connector": (VENT_STEPS, VENT_DEFAULTS),
+    # Пресеты хабов (hub.py): hub_4+, hub_4-1, hub_5+, hub_6+
+    **{f"hub_{name}": (hub_steps(directions), HUB_DEFAULTS) for name, directions in HUB_PRESETS.items()},
+}
+
+
+# Углы и сдвиги; остальные параметры - положительные размеры, *segments - число сегментов
+SIGNED_PARAMS = {"missing_sector_start", "missing_sector_end", "offset_of_joinded", "rotate_x", "rotate_y", "z_offset"}
+
+
+def resolve_params(name, params):
+    """Проверяет имя генератора и параметры; возвращает полный набор параметров."""
+    if name not in GENERATORS:
+        raise KeyError(f"неизвестный генератор {name!r}, доступны: {', '.join(GENERATORS)}")
+    defaults = GENERATORS[name][1]
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValueError(f"неизвестные параметры: {', '.join(sorted(unknown))}")
+    resolved = {**defaults, **params}
+    for key, value in resolved.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+            raise ValueError(f"параметр {key} должен быть числом, получено {value!r}")
+        if key.endswith("segments"):
+            if value != int(value) or value < 3:
+                raise ValueError(f"параметр {key} должен быть целым не меньше 3, получено {value!r}")
+        elif key not in SIGNED_PARAMS and value <= 0:
+            raise ValueError(f"параметр {key} должен быть положительным, получено {value!r}")
+    sector = resolved.get("missing_sector_start", 0) - resolved.get("missing_sector_end", 1)
+    if sector % 360 == 0:
+        raise ValueError("missing_sector_start и missing_sector_end совпадают: сектор нулевой ширины")
+    # Согласованность размеров: иначе стенки нулевой или отрицательной толщины
+    if resolved.get("external_diameter_ratio", 2) <= 1:
+        raise ValueError("external_diameter_ratio должен быть больше 1: иначе у трубок нет стенки")
+    if "outer_diameter" in resolved and resolved["inner_diameter"] >= resolved["outer_diameter"]:
+        raise ValueError("inner_diameter должен быть меньше outer_diameter")
+    if "bore_diameter" in resolved:
+        for key in ("body_diameter", "lip_diameter", "flange_diameter"):
+            if resolved[key] <= resolved["bore_diameter"]:
+                raise ValueError(f"{key} должен быть больше bore_diameter")
+        if resolved["flange_height"] >= resolved["body_height"]:
+            raise ValueError("flange_height должен быть меньше body_height: фланец стоит на корпусе")
+    return resolved
@@ -0,0 +1,214 @@
+"""Узлы-хабы для сетки SCROG с любым числом и направлением лучей.
+
+Пример:
+    python -m meshtools.hub 4+ 4-1 5+ 6+ -o hubs/
+    python -m meshtools.hub all -o hubs/ --format 3mf -p internal_diameter=2.7
+    python -m meshtools.hub -d=1,0,0 -d=-0.5,0.866,0 -d=-0.5,-0.866,0 -o hubs/   # свой хаб
+
+Обобщение шестилучевой трубки (rotation_angles = [(90, 'X'), (90, 'Y')]):
+хаб задается списком направлений лучей. Два противоположных луча становятся
+одной сквозной трубкой, как в скрипте, одиночный луч - трубкой от центра.
+Хаб - объединение сплошных тел трубок минус их отверстия (csg), а не
+склейка пересекающихся оболочек, как join_objects в Blender: стенки одной
+трубки не перегораживают отверстие другой. Тела и отверстия - экземпляры
+одного шаблона цилиндра, собранные одной векторной операцией
+(instantiate_many). Тело одиночного луча начинается в центре и целиком лежит
+внутри сквозной трубки; если сквозных трубок нет, стык закрывает шар-узел
+радиусом JOINT_RATIO наружных радиусов.
+
+Пресеты есть и в generators.GENERATORS (hub_4+, hub_4-1, hub_5+, hub_6+),
+поэтому service, export и regress собирают их с кэшем шагов. Булевы
+операции идут в Python, а не за миллисекунды: пресет собирается за
+0.2-0.5 с, хаб из одиночных лучей с шаром-узлом (нечетное число лучей в
+плоскости) - за 1-3 с. Повторная сборка с теми же параметрами берется из
+кэша BuildGraph.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from meshtools.buildgraph import Step
+from meshtools.csg import difference, union
+from meshtools.mesh import make_mesh
+from meshtools.primitives import cylinder_template, instantiate_many, sphere
+
+HUB_DEFAULTS = {
+    "internal_diameter": 2.85,
+    "external_diameter_ratio": 1.75,
+    # Половина external_height шестилучевой трубки
+    "arm_length": 16.5,
+    "tube_segments": 32,
+}
+
+# Радиус шара-узла хаба без сквозных трубок в наружных радиусах трубки
+JOINT_RATIO = 1.2
+
+_X, _Y, _Z = (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)
+_NX, _NY = (-1.0, 0.0, 0.0), (0.0, -1.0, 0.0)
+
+# Хабы, которые раньше моделировались вручную (3DScrog/4+.stl, 4-1.stl, 5+.stl, 6+.stl)
+PRESETS = {
+    "4+": [_X, _NX, _Y, _NY],            # плоский крест
+    "4-1": [_X, _NX, _Y, _Z],            # 5+ без одного луча в плоскости
+    "5+": [_X, _NX, _Y, _NY, _Z],        # крест и луч вверх
+    "6+": [_X, _NX, _Y, _NY, _Z, (0.0, 0.0, -1.0)],  # три сквозные трубки, как шестилучевая
+}
+
+
+# --- 1. Лучи ---
+def rotations_to(directions):
+    """Матрицы (k, 3, 3), переводящие ось Z шаблона в каждое из направлений (формула Родрига)."""
+    d = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    d = d / np.linalg.norm(d, axis=1, keepdims=True)
+    c = d[:, 2]
+    k = np.zeros((len(d), 3, 3))
+    # Кососимметричная матрица оси z x d = (-d_y, d_x, 0)
+    k[:, 0, 2], k[:, 1, 2] = d[:, 0], d[:, 1]
+    k[:, 2, 0], k[:, 2, 1] = -d[:, 0], -d[:, 1]
+    opposite = c < -1 + 1e-12
+    scale = np.where(opposite, 0.0, 1.0 / np.where(opposite, 1.0, 1.0 + c))
+    result = np.eye(3)[None] + k + (k @ k) * scale[:, None, None]
+    # Для -Z формула вырождается: поворот на 180 градусов вокруг X
+    result[opposite] = np.diag([1.0, -1.0, -1.0])
+    return result
+
+
+def arm_layout(directions, p):
+    """Оси трубок, отрезки тел и отверстий вдоль осей (k, 2) и флаги сквозных трубок.
+
+    Противоположные лучи сливаются в одну сквозную трубку. Тело одиночного луча
+    начинается в центре (в хабе без сквозных трубок - за центром, внутри
+    шара-узла), а его отверстие - чуть за центром, на расстоянии s:
+    точки отверстия не дальше sqrt(s^2 + r_in^2) < r_out от центра, то есть
+    внутри тела любой сквозной трубки (или шара-узла), и наружу не выходят.
+    Отверстия длиннее тел на r_in с каждого открытого конца, чтобы торцы не совпадали.
+    """
+    d = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    if len(d) == 0:
+        raise ValueError("Нужен хотя бы один луч.")
+    lengths = np.linalg.norm(d, axis=1)
+    if (lengths == 0).any():
+        raise ValueError("Нулевое направление луча.")
+    d = d / lengths[:, None]
+    cos = d @ d.T
+    if (np.triu(cos, 1) > 1 - 1e-9).any():
+        raise ValueError("Два луча с одинаковым направлением.")
+    length = p["arm_length"]
+    r_in = p["internal_diameter"] / 2
+    r_out = r_in * p["external_diameter_ratio"]
+    behind = np.sqrt(r_out ** 2 - r_in ** 2) / 2
+    axes, solids, bores, through = [], [], [], []
+    used = set()
+    for i in range(len(d)):
+        if i in used:
+            continue
+        partner = next((j for j in range(i + 1, len(d)) if j not in used and cos[i, j] < -1 + 1e-9), None)
+        used.add(i)
+        axes.append(d[i])
+        through.append(partner is not None)
+        if partner is not None:
+            used.add(partner)
+            solids.append((-length, length))
+            bores.append((-length - r_in, length + r_in))
+        else:
+            solids.append((0.0, length))
+            bores.append((-behind, length + r_in))
+    solids = np.array(solids)
+    if not any(through):
+        # Без сквозной трубки торцы в центре сходятся в одной точке (вырожденный случай для csg):
+        # тела начинаются за центром, торцы sqrt(1.25) r_out от центра - внутри шара-узла
+        solids[:, 0] = -r_out / 2
+    return np.array(axes), solids, np.array(bores), np.array(through)
+
+
+def _cylinders(axes, spans, radius, segments):
+    """Цилиндры по осям на отрезках spans - одна векторная операция, затем меш на каждую трубку."""
+    template = cylinder_template(segments)
+    heights = spans[:, 1] - spans[:, 0]
+    centers = axes * spans.mean(axis=1)[:, None]
+    both = instantiate_many(template, [[radius]] * len(axes), heights, centers, rotations_to(axes))
+    # Экземпляры идут подряд: режем общий меш обратно на цилиндры для булевых операций
+    n, f = len(template.z), len(template.faces)
+    return [make_mesh(both.vertices[k * n:(k + 1) * n], both.faces[k * f:(k + 1) * f] - k * n)
+            for k in range(len(axes))]
+
+
+# --- 2. Хаб ---
+def hub(directions, params=None):
+    """Меш хаба: тела трубок (и шар-узел без сквозных трубок) минус их отверстия."""
+    params = params or {}
+    unknown = set(params) - set(HUB_DEFAULTS)
+    if unknown:
+        raise ValueError(f"неизвестные параметры: {', '.join(sorted(unknown))}; доступны: {', '.join(HUB_DEFAULTS)}")
+    p = {**HUB_DEFAULTS, **params}
+    if p["external_diameter_ratio"] <= 1:
+        raise ValueError("external_diameter_ratio должен быть больше 1: иначе у трубок нет стенки.")
+    axes, solids, bores, through = arm_layout(directions, p)
+    segments = int(p["tube_segments"])
+    r_in = p["internal_diameter"] / 2
+    r_out = r_in * p["external_diameter_ratio"]
+    positive = _cylinders(axes, solids, r_out, segments)
+    if not through.any():
+        # Одиночные лучи сходятся у центра: шар закрывает стык, отверстия внутри него
+        positive.append(sphere(JOINT_RATIO * r_out, segments))
+    return difference(union(*positive), *_cylinders(axes, bores, r_in, segments))
+
+
+def hub_steps(directions):
+    """Рецепт BuildGraph для хаба с данными лучами; лучи входят в ключ шага через version."""
+    def build(p):
+        return hub(directions, p)
+
+    arms = np.round(np.asarray(directions, dtype=np.float64), 9).tolist()
+    return (Step("hub", build, tuple(HUB_DEFAULTS), version=json.dumps(arms)),)
+
+
+def main(argv=None):
+    # export импортирует generators, а generators - этот модуль (хабы в GENERATORS)
+    from meshtools.export import FORMATS, export_parts
+
+    parser = argparse.ArgumentParser(description="Хабы SCROG с произвольными лучами.")
+    parser.add_argument("presets", nargs="*", help=f"{', '.join(PRESETS)} или all")
+    parser.add_argument("-d", "--direction", action="append", default=[], help="свой хаб: луч x,y,z (повторять)")
+    parser.add_argument("-p", "--param", action="append", default=[], help="имя=значение")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--format", choices=[ext[1:] for ext in FORMATS], default="stl")
+    args = parser.parse_args(argv)
+
+    names = list(PRESETS) if args.presets == ["all"] else args.presets
+    unknown = [name for name in names if name not in PRESETS]
+    if unknown:
+        parser.error(f"неизвестные хабы: {', '.join(unknown)}; доступны: {', '.join(PRESETS)}, all")
+    jobs = [(name, PRESETS[name]) for name in names]
+    try:
+        if args.direction:
+            jobs.append(("custom", [[float(v) for v in item.split(",")] for item in args.direction]))
+        params = {}
+        for item in args.param:
+            key, _, value = item.partition("=")
+            params[key] = json.loads(value)
+    except ValueError as error:
+        parser.error(str(error.args[0]))
+    if not jobs:
+        parser.error("укажите хабы или лучи (-d)")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    parts = []
+    for name, directions in jobs:
+        start = time.perf_counter()
+        try:
+            mesh = hub(directions, params)
+        except (ValueError, RuntimeError) as error:
+            parser.error(f"{name}: {error.args[0]}")
+        print(f"{name}: {len(mesh.faces)} треугольников за {(time.perf_counter() - start) * 1000:.0f} мс")
+        parts.append((os.path.join(args.output_dir, f"{name}.{args.format}"), mesh))
+    export_parts(parts, workers=0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
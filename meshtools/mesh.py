@@ -0,0 +1,117 @@
+import collections
+
+import numpy as np
+
+# --- 1. Представление меша ---
+# Индексированный треугольный меш: вершины (n, 3) float64 в мм и грани (m, 3) int64.
+Mesh = collections.namedtuple("Mesh", ["vertices", "faces"])
+
+
+def make_mesh(vertices, faces):
+    """Создает меш, приводя массивы к float64 / int64."""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.ascontiguousarray(faces, dtype=np.int64).reshape(-1, 3)
+    return Mesh(vertices, faces)
+
+
+def triangles(mesh):
+    """Возвращает "суп" треугольников (m, 3, 3) для индексированного меша."""
+    return mesh.vertices[mesh.faces]
+
+
+def from_triangles(tris, tolerance=1e-5):
+    """Сваривает совпадающие вершины треугольного супа в индексированный меш.
+
+    Вершины ближе `tolerance` (мм) друг к другу по всем осям объединяются,
+    вырожденные после сварки грани отбрасываются.
+    """
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+    points = tris.reshape(-1, 3)
+    keys = np.round(points / tolerance).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    faces = inverse.reshape(-1, 3)
+    valid = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    return make_mesh(points[first], faces[valid])
+
+
+def merge(meshes):
+    """Объединяет несколько мешей в один (аналог join_objects без булевых операций)."""
+    meshes = list(meshes)
+    if not meshes:
+        return make_mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64))
+    offsets = np.cumsum([0] + [len(m.vertices) for m in meshes[:-1]])
+    vertices = np.concatenate([m.vertices for m in meshes])
+    faces = np.concatenate([m.faces + off for m, off in zip(meshes, offsets)])
+    return make_mesh(vertices, faces)
+
+
+def transformed(mesh, matrix=None, translation=(0.0, 0.0, 0.0)):
+    """Применяет к вершинам матрицу 3x3 и сдвиг; при отражении меняет порядок обхода граней."""
+    vertices = mesh.vertices
+    faces = mesh.faces
+    if matrix is not None:
+        matrix = np.asarray(matrix, dtype=np.float64)
+        vertices = vertices @ matrix.T
+        if np.linalg.det(matrix) < 0:
+            faces = faces[:, ::-1]
+    return make_mesh(vertices + np.asarray(translation, dtype=np.float64), faces)
+
+
+def bounds(mesh):
+    """Возвращает (min, max) габаритного бокса меша."""
+    if len(mesh.vertices) == 0:
+        return np.zeros(3), np.zeros(3)
+    return mesh.vertices.min(axis=0), mesh.vertices.max(axis=0)
+
+
+def face_normals(tris):
+    """Единичные нормали треугольников (m, 3, 3); у вырожденных нормаль нулевая."""
+    n = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    return np.divide(n, length, out=np.zeros_like(n), where=length > 0)
+
+
+# --- 2. Связность ---
+def edges(mesh):
+    """Уникальные неориентированные ребра меша (k, 2)."""
+    e = np.concatenate([mesh.faces[:, [0, 1]], mesh.faces[:, [1, 2]], mesh.faces[:, [2, 0]]])
+    e.sort(axis=1)
+    # Пара индексов кодируется одним числом: np.unique по 1D намного быстрее, чем по строкам
+    n = max(len(mesh.vertices), 1)
+    keys = np.unique(e[:, 0] * n + e[:, 1])
+    return np.stack([keys // n, keys % n], axis=1)
+
+
+def connected_labels(n_nodes, pairs):
+    """Метки связных компонент графа (векторизованное объединение с "прыжками по указателям")."""
+    labels = np.arange(n_nodes, dtype=np.int64)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        return labels
+    u, v = pairs[:, 0], pairs[:, 1]
+    while True:
+        lu, lv = labels[u], labels[v]
+        differ = lu != lv
+        if not differ.any():
+            return labels
+        low = np.minimum(lu[differ], lv[differ])
+        np.minimum.at(labels, lu[differ], low)
+        np.minimum.at(labels, lv[differ], low)
+        # Сжимаем пути, пока каждая метка не укажет на корень
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def components(mesh):
+    """Разбивает меш на связные по вершинам части (оболочки)."""
+    labels = connected_labels(len(mesh.vertices), edges(mesh))
+    face_labels = labels[mesh.faces[:, 0]]
+    parts = []
+    for label in np.unique(face_labels):
+        faces = mesh.faces[face_labels == label]
+        used, local = np.unique(faces, return_inverse=True)
+        parts.append(make_mesh(mesh.vertices[used], local.reshape(-1, 3)))
+    return parts
@@ -0,0 +1,116 @@
+"""Геометрическое сравнение двух ревизий детали.
+
+Пример:
+    python -m meshtools.mesh_diff "Corner 2.78mm.v2024.12.09.stl" "Corner 2.85mm.v2024.12.18.stl" --tolerance 0.05
+"""
+import argparse
+import collections
+import sys
+import time
+
+import numpy as np
+
+from meshtools.bvh import BVH
+from meshtools.mesh import connected_labels, edges, triangles
+from meshtools.stl_io import read_stl
+
+# Область изменений: связный набор вершин с отклонением больше допуска
+Region = collections.namedtuple("Region", ["vertex_count", "bounds_min", "bounds_max", "max_deviation"])
+
+DiffReport = collections.namedtuple(
+    "DiffReport",
+    ["distances", "reverse_distances", "max_deviation", "mean_deviation", "rms_deviation", "hausdorff", "regions"],
+)
+
+
+# --- 1. Расстояния ---
+def signed_distances(reference, candidate, batch=16384):
+    """Расстояние со знаком от каждой вершины `candidate` до поверхности `reference`."""
+    tree = BVH(triangles(reference))
+    distance, _, _ = tree.signed_distance(candidate.vertices, batch=batch)
+    return distance
+
+
+def changed_regions(mesh, distances, tolerance):
+    """Группирует вершины с |отклонением| > tolerance в связные области, от крупных к мелким."""
+    changed = np.abs(distances) > tolerance
+    if not changed.any():
+        return []
+    e = edges(mesh)
+    e = e[changed[e[:, 0]] & changed[e[:, 1]]]
+    labels = connected_labels(len(mesh.vertices), e)[changed]
+    points = mesh.vertices[changed]
+    values = distances[changed]
+    regions = []
+    for label in np.unique(labels):
+        mask = labels == label
+        worst = np.argmax(np.abs(values[mask]))
+        regions.append(Region(
+            vertex_count=int(mask.sum()),
+            bounds_min=points[mask].min(axis=0),
+            bounds_max=points[mask].max(axis=0),
+            max_deviation=float(values[mask][worst]),
+        ))
+    regions.sort(key=lambda r: (-r.vertex_count, -abs(r.max_deviation)))
+    return regions
+
+
+def compare_meshes(reference, candidate, tolerance=0.01, symmetric=True):
+    """Сравнивает `candidate` с `reference` и возвращает DiffReport.
+
+    При symmetric=True считается и обратное направление: это ловит элементы,
+    которые исчезли из новой ревизии (хаусдорфово расстояние).
+    """
+    distances = signed_distances(reference, candidate)
+    reverse = signed_distances(candidate, reference) if symmetric else np.zeros(0)
+    absolute = np.abs(distances)
+    max_deviation = float(absolute.max()) if len(absolute) else 0.0
+    hausdorff = max(max_deviation, float(np.abs(reverse).max()) if len(reverse) else 0.0)
+    return DiffReport(
+        distances=distances,
+        reverse_distances=reverse,
+        max_deviation=max_deviation,
+        mean_deviation=float(absolute.mean()) if len(absolute) else 0.0,
+        rms_deviation=float(np.sqrt(np.mean(distances ** 2))) if len(distances) else 0.0,
+        hausdorff=hausdorff,
+        regions=changed_regions(candidate, distances, tolerance),
+    )
+
+
+# --- 2. Командная строка ---
+def format_report(report, tolerance, max_regions=10):
+    lines = [
+        f"Макс. отклонение:     {report.max_deviation:.4f} мм",
+        f"Среднее отклонение:   {report.mean_deviation:.4f} мм",
+        f"СКО отклонения:       {report.rms_deviation:.4f} мм",
+        f"Хаусдорф (в обе стороны): {report.hausdorff:.4f} мм",
+        f"Областей изменений (> {tolerance} мм): {len(report.regions)}",
+    ]
+    for i, region in enumerate(report.regions[:max_regions]):
+        lo = ", ".join(f"{v:.2f}" for v in region.bounds_min)
+        hi = ", ".join(f"{v:.2f}" for v in region.bounds_max)
+        lines.append(f"  {i + 1}. вершин: {region.vertex_count}, макс.: {region.max_deviation:+.4f} мм, бокс: ({lo}) - ({hi})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение двух STL по расстоянию между поверхностями.")
+    parser.add_argument("reference", help="исходный STL (например, закоммиченный)")
+    parser.add_argument("candidate", help="новый STL (например, перегенерированный)")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="допуск в мм (по умолчанию 0.01)")
+    parser.add_argument("--one-way", action="store_true", help="не считать обратное направление")
+    parser.add_argument("--regions", type=int, default=10, help="сколько областей выводить")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    reference = read_stl(args.reference)
+    candidate = read_stl(args.candidate)
+    report = compare_meshes(reference, candidate, tolerance=args.tolerance, symmetric=not args.one_way)
+    print(format_report(report, args.tolerance, max_regions=args.regions))
+    print(f"Время: {time.perf_counter() - start:.2f} с")
+    # Ненулевой код возврата, если детали расходятся сильнее допуска
+    return 0 if report.hausdorff <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
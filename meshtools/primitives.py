@@ -0,0 +1,219 @@
+"""Кэш примитивов: таблицы cos/sin и единичные меши цилиндров, трубок, секторов и сфер.
+
+Шаблон строится один раз на (тип, число сегментов, углы) и дальше только
+масштабируется и переносится одной векторной операцией - в том числе сразу
+для сотен экземпляров. Кэши ограничены 256 записями: углы секторов приходят
+из параметров и в режиме наблюдения иначе копились бы без конца.
+"""
+import collections
+import functools
+
+import numpy as np
+
+from meshtools.mesh import make_mesh
+
+# Единичный меш: xy на окружностях радиуса 1 (или 0 для центров крышек), z в [-0.5, 0.5].
+# slot - номер радиуса, на который масштабируется вершина (0 - наружный, 1 - внутренний).
+Template = collections.namedtuple("Template", ["unit_xy", "z", "slot", "faces"])
+
+
+# --- 1. Таблицы окружности ---
+@functools.lru_cache(maxsize=256)
+def unit_circle(segments, start_deg=0.0, sweep_deg=360.0):
+    """Точки единичной дуги (k, 2); для полной окружности k = segments, иначе segments + 1."""
+    closed = abs(sweep_deg) >= 360.0
+    count = segments if closed else segments + 1
+    angles = np.radians(start_deg) + np.radians(sweep_deg) * np.arange(count) / segments
+    table = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    table.flags.writeable = False
+    return table
+
+
+def circle_points(radius, segments, z=0.0, start_deg=0.0, sweep_deg=360.0):
+    """Векторная замена polar_to_cartesian в цикле: точки дуги (k, 3)."""
+    xy = unit_circle(segments, start_deg, sweep_deg) * radius
+    return np.column_stack([xy, np.full(len(xy), z)])
+
+
+def _quads(a, b, c, d):
+    """Четырехугольники (a, b, c, d) против часовой стрелки -> пары треугольников."""
+    return np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+
+
+# --- 2. Единичные шаблоны ---
+@functools.lru_cache(maxsize=256)
+def cylinder_template(segments):
+    """Сплошной цилиндр (как primitive_cylinder_add): боковина и две крышки веером."""
+    ring = unit_circle(segments)
+    n = len(ring)
+    i = np.arange(n)
+    j = (i + 1) % n
+    unit_xy = np.concatenate([ring, ring, np.zeros((2, 2))])
+    z = np.concatenate([np.full(n, -0.5), np.full(n, 0.5), [-0.5, 0.5]])
+    bottom, top, center_bottom, center_top = 0, n, 2 * n, 2 * n + 1
+    faces = np.concatenate([
+        _quads(bottom + i, bottom + j, top + j, top + i),
+        np.stack([np.full(n, center_bottom), bottom + j, bottom + i], axis=1),
+        np.stack([np.full(n, center_top), top + i, top + j], axis=1),
+    ])
+    return _frozen(Template(unit_xy, z, np.zeros(len(z), dtype=np.int64), faces))
+
+
+@functools.lru_cache(maxsize=256)
+def tube_template(segments):
+    """Полый цилиндр без булевой операции: наружная и внутренняя стенки и два кольца."""
+    ring = unit_circle(segments)
+    n = len(ring)
+    i = np.arange(n)
+    j = (i + 1) % n
+    ob, ot, ib, it = 0, n, 2 * n, 3 * n
+    unit_xy = np.concatenate([ring] * 4)
+    z = np.concatenate([np.full(n, -0.5), np.full(n, 0.5)] * 2)
+    slot = np.concatenate([np.zeros(2 * n, dtype=np.int64), np.ones(2 * n, dtype=np.int64)])
+    faces = np.concatenate([
+        _quads(ob + i, ob + j, ot + j, ot + i),
+        _quads(ib + j, ib + i, it + i, it + j),
+        _quads(ob + j, ob + i, ib + i, ib + j),
+        _quads(ot + i, ot + j, it + j, it + i),
+    ])
+    return _frozen(Template(unit_xy, z, slot, faces))
+
+
+@functools.lru_cache(maxsize=256)
+def sector_template(segments, start_deg, sweep_deg):
+    """Полый сектор кольца (как в скрипте уголка): стенки, кольца и две торцевые крышки.
+
+    Отрицательный sweep_deg - та же дуга, пройденная от конца: грани остаются наружу.
+    """
+    if not 0 < abs(sweep_deg) < 360:
+        raise ValueError(f"угол сектора должен быть в (-360, 0) или (0, 360), получено {sweep_deg}")
+    if sweep_deg < 0:
+        start_deg, sweep_deg = start_deg + sweep_deg, -sweep_deg
+    arc = unit_circle(segments, start_deg, sweep_deg)
+    n = len(arc)
+    i = np.arange(n - 1)
+    j = i + 1
+    ob, ot, ib, it = 0, n, 2 * n, 3 * n
+    unit_xy = np.concatenate([arc] * 4)
+    z = np.concatenate([np.full(n, -0.5), np.full(n, 0.5)] * 2)
+    slot = np.concatenate([np.zeros(2 * n, dtype=np.int64), np.ones(2 * n, dtype=np.int64)])
+    first, last = np.array([0]), np.array([n - 1])
+    faces = np.concatenate([
+        _quads(ob + i, ob + j, ot + j, ot + i),
+        _quads(ib + j, ib + i, it + i, it + j),
+        _quads(ob + j, ob + i, ib + i, ib + j),
+        _quads(ot + i, ot + j, it + j, it + i),
+        # Торцы в начале и в конце дуги
+        _quads(ib + first, ob + first, ot + first, it + first),
+        _quads(ob + last, ib + last, it + last, ot + last),
+    ])
+    return _frozen(Template(unit_xy, z, slot, faces))
+
+
+@functools.lru_cache(maxsize=256)
+def sphere_template(segments):
+    """UV-сфера: segments точек по долготе, segments // 2 поясов, полюса веером.
+
+    Экземпляр радиуса r - radii=[r], height=2r (z шаблона в [-0.5, 0.5]).
+    """
+    ring = unit_circle(segments)
+    n = len(ring)
+    bands = max(segments // 2, 2)
+    polar = np.pi * np.arange(1, bands) / bands
+    i = np.arange(n)
+    j = (i + 1) % n
+    # Пояса сверху вниз, затем верхний и нижний полюса
+    unit_xy = np.concatenate([(np.sin(polar)[:, None, None] * ring[None]).reshape(-1, 2), np.zeros((2, 2))])
+    z = np.concatenate([np.repeat(np.cos(polar) / 2, n), [0.5, -0.5]])
+    top, bottom = len(z) - 2, len(z) - 1
+    last = (bands - 2) * n
+    faces = [_quads(upper + n + i, upper + n + j, upper + j, upper + i) for upper in range(0, last, n)]
+    faces += [np.stack([np.full(n, top), i, j], axis=1), np.stack([np.full(n, bottom), last + j, last + i], axis=1)]
+    return _frozen(Template(unit_xy, z, np.zeros(len(z), dtype=np.int64), np.concatenate(faces)))
+
+
+@functools.lru_cache(maxsize=1)
+def box_template():
+    """Единичный куб [-0.5, 0.5]^3 (как primitive_cube_add(size=1))."""
+    corners = np.array([[x, y, z] for z in (-0.5, 0.5) for y in (-0.5, 0.5) for x in (-0.5, 0.5)])
+    faces = np.concatenate([
+        _quads(*np.array([[0], [2], [3], [1]])),
+        _quads(*np.array([[4], [5], [7], [6]])),
+        _quads(*np.array([[0], [1], [5], [4]])),
+        _quads(*np.array([[2], [6], [7], [3]])),
+        _quads(*np.array([[0], [4], [6], [2]])),
+        _quads(*np.array([[1], [3], [7], [5]])),
+    ])
+    return _frozen(Template(corners[:, :2], corners[:, 2], np.zeros(8, dtype=np.int64), faces))
+
+
+def _frozen(template):
+    for array in template:
+        array.flags.writeable = False
+    return template
+
+
+# --- 3. Экземпляры ---
+def instantiate_many(template, radii, heights, translations=None, rotations=None):
+    """Собирает k экземпляров шаблона в один меш одной векторной операцией.
+
+    radii - (k, число слотов) радиусов, heights - (k,), translations - (k, 3),
+    rotations - (k, 3, 3) матрицы поворота или None.
+    """
+    radii = np.atleast_2d(np.asarray(radii, dtype=np.float64))
+    k = len(radii)
+    heights = np.broadcast_to(np.asarray(heights, dtype=np.float64), (k,))
+    n = len(template.z)
+    vertices = np.empty((k, n, 3))
+    vertices[:, :, :2] = template.unit_xy[None] * radii[:, template.slot][..., None]
+    vertices[:, :, 2] = template.z[None] * heights[:, None]
+    if rotations is not None:
+        vertices = np.einsum("kij,knj->kni", np.asarray(rotations, dtype=np.float64), vertices)
+    if translations is not None:
+        vertices += np.asarray(translations, dtype=np.float64).reshape(-1, 1, 3)
+    faces = template.faces[None] + (np.arange(k) * n)[:, None, None]
+    return make_mesh(vertices.reshape(-1, 3), faces.reshape(-1, 3))
+
+
+def instantiate(template, radii, height, translation=(0.0, 0.0, 0.0), rotation=None):
+    """Один экземпляр шаблона."""
+    return instantiate_many(
+        template, [radii], [height], [translation], None if rotation is None else [rotation],
+    )
+
+
+def cylinder(radius, height, segments=32, location=(0.0, 0.0, 0.0), rotation=None):
+    """Сплошной цилиндр с центром в location (как bpy.ops.mesh.primitive_cylinder_add)."""
+    return instantiate(cylinder_template(segments), [radius], height, location, rotation)
+
+
+def hollow_cylinder(height, diameter, internal_diameter, segments=32, location=(0.0, 0.0, 0.0), rotation=None):
+    """Безголовый аналог create_hollow_cylinder: трубка без булевой операции."""
+    return instantiate(tube_template(segments), [diameter / 2, internal_diameter / 2], height, location, rotation)
+
+
+def annular_sector(inner_radius, outer_radius, height, start_deg, sweep_deg, segments):
+    """Сектор кольца от z=0 до z=height (как сектор в скрипте уголка)."""
+    template = sector_template(segments, float(start_deg), float(sweep_deg))
+    return instantiate(template, [outer_radius, inner_radius], height, (0.0, 0.0, height / 2))
+
+
+def sphere(radius, segments=32, location=(0.0, 0.0, 0.0)):
+    """UV-сфера с центром в location."""
+    return instantiate(sphere_template(segments), [radius], 2 * radius, location)
+
+
+def box(size, location=(0.0, 0.0, 0.0)):
+    """Параллелепипед с размерами size = (x, y, z) и центром в location."""
+    template = box_template()
+    unit = np.column_stack([template.unit_xy, template.z])
+    return make_mesh(unit * np.asarray(size, dtype=np.float64) + np.asarray(location, dtype=np.float64), template.faces)
+
+
+def rotation_matrix(angle_x_deg=0.0, angle_y_deg=0.0, angle_z_deg=0.0):
+    """Матрица поворота по углам Эйлера XYZ в градусах (как rotation_euler в Blender)."""
+    x, y, z = np.radians([angle_x_deg, angle_y_deg, angle_z_deg])
+    rx = np.array([[1, 0, 0], [0, np.cos(x), -np.sin(x)], [0, np.sin(x), np.cos(x)]])
+    ry = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+    rz = np.array([[np.cos(z), -np.sin(z), 0], [np.sin(z), np.cos(z), 0], [0, 0, 1]])
+    return rz @ ry @ rx
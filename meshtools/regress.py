@@ -0,0 +1,277 @@
+"""Отслеживание регрессий генераторов: время, память, размер и геометрия.
+
+Пример:
+    python -m meshtools.regress run               # прогон корпуса, запись в историю, флаги
+    python -m meshtools.regress history corner-2.85
+
+Каждый набор параметров корпуса собирается в отдельном процессе (чистый
+пиковый RSS) несколько раз подряд. В историю .meshcache/regress/history.jsonl
+(не в git) пишутся коммит, времена сборок, пиковый RSS процесса и пик
+выделенной при сборке памяти (tracemalloc), число треугольников,
+размеры STL и .meshz и отклонение от предыдущего результата (хаусдорфово
+расстояние, mesh_diff). Замедление отмечается, если тест Манна - Уитни
+отличает времена от предыдущих прогонов при p < alpha и медиана выросла
+больше порога; разрастание меша, рост пика выделенной памяти и пикового RSS -
+по относительному порогу. Без модуля resource (Windows) RSS берется из
+psutil, а без него не записывается и не сравнивается.
+Код возврата 1, если есть отметки - прогон можно вешать на post-commit.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from meshtools.archive import decode, encode
+from meshtools.buildgraph import DEFAULT_CACHE_DIR
+from meshtools.mesh_diff import compare_meshes
+
+try:
+    import resource
+except ImportError:
+    # Windows: пиковый RSS берется из psutil, если он установлен
+    resource = None
+
+DEFAULT_DIR = os.path.join(DEFAULT_CACHE_DIR, "regress")
+
+# (имя, генератор, параметры поверх значений по умолчанию)
+CORPUS = [
+    ("corner", "corner", {}),
+    ("corner-2.85", "corner", {"internal_diameter": 2.85}),
+    ("six-ray", "six_ray_tube", {}),
+    ("six-ray-2.7x64", "six_ray_tube", {"internal_diameter": 2.7, "tube_segments": 64}),
+    ("vent", "vent_connector", {}),
+    ("vent-150", "vent_connector", {"body_diameter": 145.0, "flange_diameter": 155.0,
+                                    "lip_diameter": 148.0, "bore_diameter": 142.0}),
+    ("hub-4-1", "hub_4-1", {}),
+]
+
+THRESHOLDS = {
+    "alpha": 0.01,       # уровень значимости для времени
+    "slowdown": 0.10,    # минимальный рост медианы времени
+    "memory": 0.20,      # рост пика выделенной памяти
+    "rss": 0.20,         # рост пикового RSS процесса
+    "bloat": 0.02,       # рост числа треугольников и размеров файлов
+    "deviation": 0.001,  # мм, изменение геометрии
+}
+
+
+# --- 1. Замер в отдельном процессе ---
+def peak_rss_mb():
+    """Пиковый RSS текущего процесса в МБ или None, если узнать его нечем."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss в macOS - в байтах, в Linux - в килобайтах
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / 2 ** 20
+
+
+def measure(generator, params, repeats, mesh_path):
+    """Собирает деталь repeats раз без кэшей; возвращает метрики и пишет результат в .meshz."""
+    from meshtools.buildgraph import BuildGraph
+    from meshtools.generators import GENERATORS, resolve_params
+
+    if repeats < 1:
+        raise ValueError(f"repeats должен быть не меньше 1, получено {repeats}")
+    params = resolve_params(generator, params)
+    times = []
+    for _ in range(repeats):
+        with BuildGraph(GENERATORS[generator][0]) as graph:
+            start = time.perf_counter()
+            mesh = graph.build(params)
+            times.append(time.perf_counter() - start)
+    # Пик выделенной памяти - отдельной сборкой: tracemalloc замедляет код и искажал бы время
+    tracemalloc.start()
+    with BuildGraph(GENERATORS[generator][0]) as graph:
+        graph.build(params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    data = encode(mesh, params={"generator": generator, **params})
+    with open(mesh_path, "wb") as f:
+        f.write(data)
+    return {
+        "params": params,
+        "times": times,
+        "rss_mb": peak_rss_mb(),
+        "peak_alloc_mb": peak / 2 ** 20,
+        "triangles": len(mesh.faces),
+        "stl_bytes": 84 + 50 * len(mesh.faces),
+        "meshz_bytes": len(data),
+    }
+
+
+def _measure_subprocess(generator, params, repeats, mesh_path):
+    command = [sys.executable, "-m", "meshtools.regress", "_measure", generator, json.dumps(params),
+               str(repeats), mesh_path]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"{generator}: замер упал:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# --- 2. Статистика ---
+def _ranks(values):
+    """Ранги с усреднением одинаковых значений."""
+    order = np.argsort(values, kind="stable")
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(1, len(values) + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=ranks)
+    return (sums / counts)[inverse], counts
+
+
+def mann_whitney_greater(sample, baseline):
+    """p-значение одностороннего теста Манна - Уитни "sample больше baseline" (нормальное приближение)."""
+    sample, baseline = np.asarray(sample, dtype=np.float64), np.asarray(baseline, dtype=np.float64)
+    n1, n2 = len(sample), len(baseline)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    ranks, ties = _ranks(np.concatenate([sample, baseline]))
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - (ties ** 3 - ties).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def check(record, previous, thresholds=THRESHOLDS):
+    """Отметки регрессий record относительно предыдущих записей того же набора."""
+    if not previous:
+        return []
+    flags = []
+    baseline = [t for entry in previous for t in entry["times"]]
+    ratio = np.median(record["times"]) / np.median(baseline)
+    p_value = mann_whitney_greater(record["times"], baseline)
+    if p_value < thresholds["alpha"] and ratio > 1 + thresholds["slowdown"]:
+        flags.append(f"замедление x{ratio:.2f} (p = {p_value:.1g})")
+    peak = np.median([entry["peak_alloc_mb"] for entry in previous])
+    if record["peak_alloc_mb"] > peak * (1 + thresholds["memory"]):
+        flags.append(f"память {peak:.1f} -> {record['peak_alloc_mb']:.1f} МБ")
+    rss = [entry["rss_mb"] for entry in previous if entry.get("rss_mb") is not None]
+    if record.get("rss_mb") is not None and rss:
+        rss = np.median(rss)
+        if record["rss_mb"] > rss * (1 + thresholds["rss"]):
+            flags.append(f"RSS {rss:.1f} -> {record['rss_mb']:.1f} МБ")
+    last = previous[-1]
+    for key in ("triangles", "stl_bytes", "meshz_bytes"):
+        if record[key] > last[key] * (1 + thresholds["bloat"]):
+            flags.append(f"{key} {last[key]} -> {record[key]}")
+    if record["deviation"] is not None and record["deviation"] > thresholds["deviation"]:
+        flags.append(f"геометрия изменилась на {record['deviation']:.4f} мм")
+    return flags
+
+
+# --- 3. История ---
+def _git(*args):
+    result = subprocess.run(["git", *args], capture_output=True, text=True, check=False)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def load_history(directory):
+    path = os.path.join(directory, "history.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(directory, records):
+    with open(os.path.join(directory, "history.jsonl"), "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def run(corpus=CORPUS, directory=DEFAULT_DIR, repeats=5, window=5, thresholds=THRESHOLDS):
+    """Прогоняет корпус; возвращает список (запись, отметки) и дописывает историю."""
+    if repeats < 1:
+        raise ValueError(f"repeats должен быть не меньше 1, получено {repeats}")
+    os.makedirs(directory, exist_ok=True)
+    history = load_history(directory)
+    commit = _git("rev-parse", "--short", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    results = []
+    for name, generator, params in corpus:
+        latest = os.path.join(directory, f"{name}.meshz")
+        fresh = f"{latest}.new"
+        record = _measure_subprocess(generator, params, repeats, fresh)
+        record.update(id=name, generator=generator, commit=commit, dirty=dirty,
+                      date=time.strftime("%Y-%m-%dT%H:%M:%S"), deviation=None)
+        if os.path.exists(latest):
+            with open(latest, "rb") as f:
+                reference, _ = decode(f.read())
+            with open(fresh, "rb") as f:
+                candidate, _ = decode(f.read())
+            record["deviation"] = compare_meshes(reference, candidate).hausdorff
+        os.replace(fresh, latest)
+        # Сравниваем только с прогонами тех же параметров
+        previous = [entry for entry in history if entry["id"] == name and entry["params"] == record["params"]]
+        results.append((record, check(record, previous[-window:], thresholds)))
+    append_history(directory, [record for record, _ in results])
+    return results
+
+
+def format_row(record):
+    return (f"{record['id']:<16} {record['commit'] or '-':>8}{'*' if record['dirty'] else ' '} "
+            f"{np.median(record['times']) * 1000:8.1f} мс {record['peak_alloc_mb']:7.1f} МБ "
+            f"RSS {'-' if record.get('rss_mb') is None else format(record['rss_mb'], '.0f'):>4} МБ "
+            f"{record['triangles']:>8} тр. {record['meshz_bytes']:>8} Б meshz"
+            + ("" if record["deviation"] is None else f"  откл. {record['deviation']:.4f} мм"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отслеживание регрессий генераторов.")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="каталог истории")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_args = commands.add_parser("run", help="прогнать корпус и записать историю")
+    run_args.add_argument("--corpus", help='JSON: [["имя", "генератор", {параметры}], ...]')
+    run_args.add_argument("--repeats", type=int, default=5, help="сборок на набор параметров")
+    run_args.add_argument("--window", type=int, default=5, help="сколько прошлых прогонов брать за базу")
+    history_args = commands.add_parser("history", help="история по наборам")
+    history_args.add_argument("ids", nargs="*")
+    history_args.add_argument("-n", type=int, default=10, help="последних записей на набор")
+    measure_args = commands.add_parser("_measure")
+    measure_args.add_argument("generator")
+    measure_args.add_argument("params")
+    measure_args.add_argument("repeats", type=int)
+    measure_args.add_argument("mesh_path")
+    args = parser.parse_args(argv)
+
+    if args.command == "_measure":
+        print(json.dumps(measure(args.generator, json.loads(args.params), args.repeats, args.mesh_path)))
+        return 0
+    if args.command == "history":
+        history = load_history(args.dir)
+        for name in args.ids or list(dict.fromkeys(entry["id"] for entry in history)):
+            for record in [entry for entry in history if entry["id"] == name][-args.n:]:
+                print(format_row(record))
+        return 0
+
+    if args.repeats < 1:
+        parser.error("--repeats должен быть не меньше 1")
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [tuple(entry) for entry in json.load(f)]
+    flagged = 0
+    for record, flags in run(corpus, args.dir, args.repeats, args.window):
+        print(format_row(record))
+        for flag in flags:
+            print(f"    ! {flag}")
+        flagged += bool(flags)
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
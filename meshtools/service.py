@@ -0,0 +1,292 @@
+"""Локальный сервис генерации деталей (HTTP по TCP или Unix-сокету).
+
+Пример:
+    python -m meshtools.service serve --port 8765
+    python -m meshtools.service get corner -p z_offset=-2 -o corner.stl --port 8765
+
+Запросы:
+    GET  /generators                     имена генераторов и параметры по умолчанию
+    POST /generate/<имя>[?format=meshz]  тело - JSON с параметрами, ответ - STL или .meshz
+
+Ключ результата - ключ последнего шага рецепта (хэш параметров и кода шагов)
+и хэш кода записи формата.
+Готовые результаты отдаются с диска (объем ограничен, давно не читанные
+удаляются первыми); одинаковые запросы, пришедшие во время
+сборки, ждут одну и ту же задачу; промахи собираются в ограниченном пуле
+процессов. Заголовок X-Cache ответа: hit, miss или coalesced.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import time
+import urllib.parse
+
+from meshtools.archive import encode
+from meshtools.buildgraph import DEFAULT_CACHE_DIR, BuildGraph, DiskCache, code_hash, evict_lru
+from meshtools.generators import GENERATORS, resolve_params
+from meshtools.stl_io import stl_bytes
+
+FORMATS = {"stl": "model/stl", "meshz": "application/octet-stream"}
+# Код записи формата тоже входит в ключ результата
+_WRITERS = {"stl": code_hash(stl_bytes), "meshz": code_hash(encode)}
+MAX_BODY = 1 << 20
+
+
+# --- 1. Сборка в рабочем процессе ---
+_worker_graphs = {}
+
+
+def build_part(name, params, fmt, cache_dir):
+    """Собирает деталь в рабочем процессе; графы и их кэши живут между запросами."""
+    if name not in _worker_graphs:
+        disk = DiskCache(os.path.join(cache_dir, "steps")) if cache_dir else None
+        _worker_graphs[name] = BuildGraph(GENERATORS[name][0], disk=disk, workers=2)
+    mesh = _worker_graphs[name].build(params)
+    if fmt == "meshz":
+        return encode(mesh, params={"generator": name, **params})
+    return stl_bytes(mesh)
+
+
+# --- 2. Сервис ---
+class PartService:
+    """Дисковый кэш результатов, склейка одинаковых запросов и пул сборки."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, workers=2, executor="process", max_bytes=2 ** 30):
+        self.cache_dir = cache_dir
+        self.results_dir = os.path.join(cache_dir, "results")
+        self.max_bytes = max_bytes
+        os.makedirs(self.results_dir, exist_ok=True)
+        cls = (concurrent.futures.ProcessPoolExecutor if executor == "process"
+               else concurrent.futures.ThreadPoolExecutor)
+        self.pool = cls(max_workers=workers)
+        # Графы только для вычисления ключей: сборка идет в пуле
+        self.graphs = {name: BuildGraph(steps) for name, (steps, _) in GENERATORS.items()}
+        self.inflight = {}
+        self.stats = {"hit": 0, "miss": 0, "coalesced": 0}
+
+    def close(self):
+        self.pool.shutdown()
+
+    def key(self, name, params, fmt):
+        graph = self.graphs[name]
+        return f"{graph.keys(params)[graph.order[-1]]}-{_WRITERS[fmt]}.{fmt}"
+
+    def _read(self, key):
+        path = os.path.join(self.results_dir, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Время изменения - отметка последнего использования для вытеснения
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _write(self, key, data):
+        path = os.path.join(self.results_dir, key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        evict_lru(self.results_dir, self.max_bytes, tuple(f".{fmt}" for fmt in FORMATS))
+
+    async def _build(self, key, name, params, fmt):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(self.pool, build_part, name, params, fmt, self.cache_dir)
+            await loop.run_in_executor(None, self._write, key, data)
+            return data
+        finally:
+            del self.inflight[key]
+
+    async def generate(self, name, params, fmt="stl"):
+        """Возвращает (байты детали, источник: hit / miss / coalesced)."""
+        params = resolve_params(name, params)
+        key = self.key(name, params, fmt)
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), "coalesced"
+        data = self._read(key)
+        if data is not None:
+            self.stats["hit"] += 1
+            return data, "hit"
+        self.stats["miss"] += 1
+        task = asyncio.ensure_future(self._build(key, name, params, fmt))
+        self.inflight[key] = task
+        return await asyncio.shield(task), "miss"
+
+
+# --- 3. HTTP ---
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise ValueError("слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, body
+
+
+def _response(status, body, content_type="application/json", extra=None):
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+    head = [f"HTTP/1.1 {status} {reason[status]}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _json(status, value):
+    return _response(status, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def make_handler(service):
+    async def handle_connection(reader, writer):
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            writer.write(await _dispatch(service, *request))
+            await writer.drain()
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            writer.write(_json(400, {"error": str(error)}))
+        finally:
+            writer.close()
+    return handle_connection
+
+
+async def _dispatch(service, method, target, body):
+    url = urllib.parse.urlsplit(target)
+    query = urllib.parse.parse_qs(url.query)
+    parts = [p for p in url.path.split("/") if p]
+    if parts == ["generators"] and method == "GET":
+        return _json(200, {name: defaults for name, (_, defaults) in GENERATORS.items()})
+    if parts == ["stats"] and method == "GET":
+        return _json(200, service.stats)
+    if len(parts) != 2 or parts[0] != "generate":
+        return _json(404, {"error": f"нет такого пути: {url.path}"})
+    if method != "POST":
+        return _json(405, {"error": "используйте POST"})
+    if parts[1] not in GENERATORS:
+        return _json(404, {"error": f"неизвестный генератор {parts[1]!r}, доступны: {', '.join(GENERATORS)}"})
+    fmt = query.get("format", ["stl"])[0]
+    if fmt not in FORMATS:
+        return _json(400, {"error": f"неизвестный формат {fmt!r}"})
+    try:
+        params = json.loads(body or b"{}")
+        if not isinstance(params, dict):
+            raise ValueError("ожидается JSON-объект с параметрами")
+        start = time.perf_counter()
+        data, source = await service.generate(parts[1], params, fmt)
+    except ValueError as error:
+        return _json(400, {"error": str(error)})
+    except Exception as error:  # ошибка сборки не должна ронять сервис
+        return _json(500, {"error": f"{type(error).__name__}: {error}"})
+    elapsed = f"{(time.perf_counter() - start) * 1000:.1f}"
+    return _response(200, data, FORMATS[fmt], {"X-Cache": source, "X-Build-Ms": elapsed})
+
+
+async def serve(service, host="127.0.0.1", port=8765, unix=None):
+    handler = make_handler(service)
+    if unix:
+        server = await asyncio.start_unix_server(handler, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Сервис деталей: {where}, кэш {service.cache_dir}")
+    async with server:
+        await server.serve_forever()
+
+
+# --- 4. Клиент ---
+async def fetch(name, params, fmt="stl", host="127.0.0.1", port=8765, unix=None):
+    """Запрос к сервису; возвращает (статус, заголовки, тело)."""
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(params).encode("utf-8")
+    writer.write((f"POST /generate/{name}?format={fmt} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    data = await reader.readexactly(int(headers.get("content-length", 0)))
+    writer.close()
+    return status, headers, data
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервис генерации деталей.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("serve", "get"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--port", type=int, default=8765)
+        sub.add_argument("--unix", help="путь Unix-сокета вместо TCP")
+    serve_args = commands.choices["serve"]
+    serve_args.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    serve_args.add_argument("--workers", type=int, default=2, help="число процессов сборки")
+    serve_args.add_argument("--max-cache-mb", type=float, default=1024, help="предельный объем готовых результатов")
+    get_args = commands.choices["get"]
+    get_args.add_argument("generator", choices=sorted(GENERATORS))
+    get_args.add_argument("-p", "--param", action="append", default=[], help="имя=значение")
+    get_args.add_argument("--format", choices=sorted(FORMATS), default="stl")
+    get_args.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service = PartService(args.cache_dir, args.workers, max_bytes=int(args.max_cache_mb * 2 ** 20))
+        try:
+            asyncio.run(serve(service, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+        return 0
+
+    params = {}
+    for item in args.param:
+        key, _, value = item.partition("=")
+        params[key] = _parse_value(value)
+    status, headers, data = asyncio.run(fetch(args.generator, params, args.format, args.host, args.port, args.unix))
+    if status != 200:
+        print(f"Ошибка {status}: {data.decode('utf-8', 'replace')}", file=sys.stderr)
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"{args.output}: {len(data)} байт ({headers.get('x-cache')}, {headers.get('x-build-ms')} мс)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
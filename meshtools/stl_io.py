@@ -0,0 +1,62 @@
+import re
+
+import numpy as np
+
+from meshtools.mesh import Mesh, face_normals, from_triangles, triangles
+
+# Запись бинарного STL: нормаль, три вершины и 2 байта атрибутов
+STL_RECORD = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+STL_HEADER_SIZE = 84
+LFS_POINTER_PREFIX = b"version https://git-lfs"
+
+_VERTEX_RE = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+
+# --- 1. Чтение ---
+def read_stl_triangles(path):
+    """Читает STL (бинарный или ASCII) и возвращает треугольники (m, 3, 3) float64."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(LFS_POINTER_PREFIX):
+        raise ValueError(f"{path}: это указатель Git LFS, а не STL. Выполните 'git lfs pull'.")
+    if len(data) >= STL_HEADER_SIZE:
+        count = int(np.frombuffer(data, dtype="<u4", count=1, offset=80)[0])
+        if len(data) == STL_HEADER_SIZE + count * STL_RECORD.itemsize:
+            records = np.frombuffer(data, dtype=STL_RECORD, count=count, offset=STL_HEADER_SIZE)
+            return records["vertices"].astype(np.float64)
+    if data.lstrip().startswith(b"solid"):
+        coords = np.array(_VERTEX_RE.findall(data), dtype=np.float64)
+        return coords.reshape(-1, 3, 3)
+    raise ValueError(f"{path}: не удалось распознать формат STL.")
+
+
+def read_stl(path, tolerance=1e-5):
+    """Читает STL и сваривает вершины в индексированный меш."""
+    return from_triangles(read_stl_triangles(path), tolerance=tolerance)
+
+
+# --- 2. Запись ---
+def stl_records(tris):
+    """Упаковывает треугольники (m, 3, 3) в массив записей бинарного STL."""
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+    records = np.zeros(len(tris), dtype=STL_RECORD)
+    records["normal"] = face_normals(tris)
+    records["vertices"] = tris
+    return records
+
+
+def stl_bytes(mesh_or_triangles, header=b"meshtools"):
+    """Бинарный STL целиком в памяти (для ответа по сети или архива)."""
+    tris = triangles(mesh_or_triangles) if isinstance(mesh_or_triangles, Mesh) else mesh_or_triangles
+    records = stl_records(tris)
+    return header[:80].ljust(80, b"\0") + np.uint32(len(records)).tobytes() + records.tobytes()
+
+
+def write_stl(path, mesh_or_triangles, header=b"meshtools"):
+    """Записывает меш или треугольный суп в бинарный STL."""
+    tris = triangles(mesh_or_triangles) if isinstance(mesh_or_triangles, Mesh) else mesh_or_triangles
+    records = stl_records(tris)
+    with open(path, "wb") as f:
+        f.write(header[:80].ljust(80, b"\0"))
+        f.write(np.uint32(len(records)).tobytes())
+        records.tofile(f)
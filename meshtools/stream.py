@@ -0,0 +1,398 @@
+"""Потоковый конвейер треугольников: источник -> преобразование -> разрез -> запись.
+
+Пример (плита из 200 x 200 трубок, срезанная по z = 8 мм):
+    python -m meshtools.stream -o plate.stl --nx 200 --ny 200 --pitch 5 --clip-z 8
+    python -m meshtools.stream -o corner.stl --generator corner -p z_offset=-2
+
+Источники отдают треугольный суп кусками (k, 3, 3) не больше chunk
+треугольников, стадии - генераторы над такими кусками, запись STL пишет
+куски по мере поступления и в конце вписывает число треугольников в
+заголовок. Пиковая память определяется размером куска, а не числом деталей
+или сегментов. Отрезки сечения копятся только до момента, когда все начатые
+оболочки замкнулись (каждое ребро пришло в обоих направлениях): тогда их
+контуры готовы и крышка отдается сразу. У плиты трубок это происходит в
+конце каждого куска; дольше копится только сечение оболочки, разрезанной
+между кусками.
+
+Уголок и шестилучевая трубка тоже идут потоком (corner_chunks,
+six_ray_chunks): каждая оболочка - трубка или сектор - проходит поворот и
+разрез отдельно, со своими крышками, как clip_plane делит меш на оболочки.
+Трубки и сектор генерируются сегментами дуги. Вентиляционный переходник
+(тело вращения) потоком не строится. Проверка, что деталь помещается в куб-вырезатель (cut_size),
+в потоке не выполняется.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from meshtools.clip import cap_faces, chain_loops
+from meshtools.generators import resolve_params
+from meshtools.primitives import instantiate_many, rotation_matrix
+from meshtools.stl_io import stl_records
+
+DEFAULT_CHUNK = 1 << 16
+
+# Угловой сегмент трубки: точки (ob_i, ob_j, ot_i, ot_j, ib_i, ib_j, it_i, it_j),
+# o/i - наружная и внутренняя окружность, b/t - низ и верх, i/j - начало и конец сегмента.
+# Треугольники те же, что в tube_template: стенки, нижнее и верхнее кольцо.
+_TUBE_OUTER = np.array([1, 1, 1, 1, 0, 0, 0, 0], dtype=bool)
+_TUBE_END = np.array([0, 1, 0, 1, 0, 1, 0, 1])
+_TUBE_TOP = np.array([-0.5, -0.5, 0.5, 0.5, -0.5, -0.5, 0.5, 0.5])
+_TUBE_TRIS = np.array([
+    [0, 1, 3], [0, 3, 2],
+    [5, 4, 6], [5, 6, 7],
+    [1, 0, 4], [1, 4, 5],
+    [2, 3, 7], [2, 7, 6],
+])
+# Торцы сектора кольца: в начале первого сегмента и в конце последнего (как в sector_template)
+_SECTOR_START = np.array([[4, 0, 2], [4, 2, 6]])
+_SECTOR_END = np.array([[1, 5, 7], [1, 7, 3]])
+# Константы перемешивания для хэшей вершин (из splitmix64)
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+# --- 1. Источники ---
+def mesh_chunks(mesh, chunk=DEFAULT_CHUNK):
+    """Готовый индексированный меш кусками треугольников."""
+    for start in range(0, len(mesh.faces), chunk):
+        yield mesh.vertices[mesh.faces[start:start + chunk]]
+
+
+def template_chunks(template, radii, heights, translations=None, rotations=None, chunk=DEFAULT_CHUNK):
+    """Экземпляры шаблона из primitives группами по chunk треугольников."""
+    radii = np.atleast_2d(np.asarray(radii, dtype=np.float64))
+    k = len(radii)
+    heights = np.broadcast_to(np.asarray(heights, dtype=np.float64), (k,))
+    group = max(chunk // len(template.faces), 1)
+    for start in range(0, k, group):
+        part = slice(start, start + group)
+        mesh = instantiate_many(
+            template, radii[part], heights[part],
+            None if translations is None else np.asarray(translations)[part],
+            None if rotations is None else np.asarray(rotations)[part],
+        )
+        yield from mesh_chunks(mesh, chunk)
+
+
+def _ring_segments(radii, height, first, last, segments, start_deg=0.0, sweep_deg=360.0):
+    """Точки угловых сегментов first..last-1 трубки или сектора кольца: (s, 8, 3)."""
+    index = np.arange(first, last)[:, None] + _TUBE_END[None]
+    if sweep_deg >= 360.0:
+        index = index % segments
+    # Та же формула, что в unit_circle: последний сегмент трубки замыкается точно на первую точку
+    angles = np.radians(start_deg) + np.radians(sweep_deg) * index / segments
+    radius = np.where(_TUBE_OUTER, radii[0], radii[1])
+    points = np.empty(index.shape + (3,))
+    points[..., 0] = np.cos(angles) * radius
+    points[..., 1] = np.sin(angles) * radius
+    points[..., 2] = _TUBE_TOP * height
+    return points
+
+
+def tube_chunks(diameter, internal_diameter, height, segments=32, translations=None, rotations=None,
+                chunk=DEFAULT_CHUNK):
+    """Трубки (как hollow_cylinder) без построения меша: сегменты генерируются по мере записи.
+
+    translations - (k, 3), rotations - (k, 3, 3) или None; длинные трубки
+    (много сегментов) режутся на куски по сегментам, короткие - группируются.
+    """
+    translations = np.zeros((1, 3)) if translations is None else np.asarray(translations, dtype=np.float64)
+    radii = (diameter / 2, internal_diameter / 2)
+    per_chunk = max(chunk // len(_TUBE_TRIS), 1)
+    group = max(per_chunk // segments, 1)
+    step = min(segments, per_chunk)
+    for start in range(0, len(translations), group):
+        moved = translations[start:start + group]
+        turned = None if rotations is None else np.asarray(rotations, dtype=np.float64)[start:start + group]
+        for first in range(0, segments, step):
+            points = _ring_segments(radii, height, first, min(first + step, segments), segments)
+            if turned is None:
+                points = np.broadcast_to(points, (len(moved),) + points.shape)
+            else:
+                points = np.einsum("kij,snj->ksni", turned, points)
+            points = points + moved[:, None, None, :]
+            yield points[:, :, _TUBE_TRIS].reshape(-1, 3, 3)
+
+
+def sector_chunks(inner_radius, outer_radius, height, start_deg, sweep_deg, segments, chunk=DEFAULT_CHUNK):
+    """Сектор кольца от z=0 до z=height (как annular_sector) сегментами дуги без построения меша."""
+    if sweep_deg < 0:
+        start_deg, sweep_deg = start_deg + sweep_deg, -sweep_deg
+    radii = (outer_radius, inner_radius)
+    step = max((chunk - len(_SECTOR_START) - len(_SECTOR_END)) // len(_TUBE_TRIS), 1)
+    for first in range(0, segments, step):
+        last = min(first + step, segments)
+        points = _ring_segments(radii, height, first, last, segments, start_deg, sweep_deg)
+        points[..., 2] += height / 2
+        tris = [points[:, _TUBE_TRIS].reshape(-1, 3, 3)]
+        if first == 0:
+            tris.append(points[0, _SECTOR_START])
+        if last == segments:
+            tris.append(points[-1, _SECTOR_END])
+        yield np.concatenate(tris)
+
+
+# --- 2. Стадии ---
+def transform(chunks, matrix=None, translation=(0.0, 0.0, 0.0)):
+    """Матрица 3x3 и сдвиг для каждого куска; при отражении меняется обход."""
+    translation = np.asarray(translation, dtype=np.float64)
+    matrix = None if matrix is None else np.asarray(matrix, dtype=np.float64)
+    mirror = matrix is not None and np.linalg.det(matrix) < 0
+    for tris in chunks:
+        if matrix is not None:
+            tris = tris @ matrix.T
+        tris = tris + translation
+        yield tris[:, ::-1] if mirror else tris
+
+
+def _edge_points(a, b, side_a, side_b):
+    """Точки пересечения ребер с плоскостью, не зависящие от направления ребра.
+
+    Ребро всегда интерполируется от конца с меньшим значением side, поэтому
+    соседние треугольники получают побитно одинаковые точки.
+    """
+    swap = side_a > side_b
+    low = np.where(swap[:, None], b, a)
+    high = np.where(swap[:, None], a, b)
+    side_low = np.where(swap, side_b, side_a)
+    side_high = np.where(swap, side_a, side_b)
+    t = side_low / (side_low - side_high)
+    points = low + (high - low) * t[:, None]
+    return np.where((side_high == 0)[:, None], high, points)
+
+
+def _clip_chunk(tris, normal, offset):
+    """Часть куска, где dot(normal, x) < offset, и отрезки сечения (s, 2, 3) в обходе крышки."""
+    side = tris @ normal - offset
+    inside = side < 0
+    count = inside.sum(axis=1)
+    partial = (count == 1) | (count == 2)
+    tris_p, side_p, inside_p = tris[partial], side[partial], inside[partial]
+    # Одинокую вершину ставим первой циклическим сдвигом (обход сохраняется)
+    lonely_is_in = inside_p.sum(axis=1) == 1
+    lonely = np.where(lonely_is_in, np.argmax(inside_p, axis=1), np.argmin(inside_p, axis=1))
+    roll = (np.arange(3)[None, :] + lonely[:, None]) % 3
+    tris_p = np.take_along_axis(tris_p, roll[:, :, None], axis=1)
+    side_p = np.take_along_axis(side_p, roll, axis=1)
+    p0, p1, p2 = tris_p[:, 0], tris_p[:, 1], tris_p[:, 2]
+    c01 = _edge_points(p0, p1, side_p[:, 0], side_p[:, 1])
+    c02 = _edge_points(p0, p2, side_p[:, 0], side_p[:, 2])
+    one, two = lonely_is_in, ~lonely_is_in
+    kept = np.concatenate([
+        tris[count == 3],
+        np.stack([p0, c01, c02], axis=1)[one],
+        np.stack([c01, p1, p2], axis=1)[two],
+        np.stack([c01, p2, c02], axis=1)[two],
+    ])
+    # Крышка обходит ребро разреза в сторону, обратную сохраненной грани
+    segments = np.concatenate([np.stack([c02, c01], axis=1)[one], np.stack([c01, c02], axis=1)[two]])
+    kept = kept[(kept[:, 0] != kept[:, 1]).any(axis=1) & (kept[:, 1] != kept[:, 2]).any(axis=1)
+                & (kept[:, 2] != kept[:, 0]).any(axis=1)]
+    return kept, segments[(segments[:, 0] != segments[:, 1]).any(axis=1)]
+
+
+def _mix(z):
+    """Финальное перемешивание splitmix64 (uint64 с переполнением)."""
+    z = (z ^ (z >> np.uint64(30))) * _MIX[1]
+    z = (z ^ (z >> np.uint64(27))) * _MIX[2]
+    return z ^ (z >> np.uint64(31))
+
+
+def _edge_balance(tris):
+    """Сумма антисимметричных хэшей ориентированных ребер куска по модулю 2**64.
+
+    Хэш ребра a -> b равен u(a) v(b) - u(b) v(a), поэтому ребро и обратное к
+    нему взаимно уничтожаются: у набора замкнутых оболочек сумма равна нулю,
+    а непарные ребра дают ноль лишь со случайной вероятностью 2**-64.
+    """
+    # + 0.0 превращает -0.0 в 0.0: у равных координат должны быть равные биты
+    bits = (tris + 0.0).view(np.uint64)
+    u = _mix(bits[..., 0] ^ _mix(bits[..., 1] ^ _mix(bits[..., 2])))
+    v = _mix(u + _MIX[0])
+    u_next, v_next = np.roll(u, -1, axis=1), np.roll(v, -1, axis=1)
+    return int((u * v_next - u_next * v).sum(dtype=np.uint64))
+
+
+def _cap(segments, normal):
+    """Треугольники крышки по собранным отрезкам сечения."""
+    if not segments:
+        return np.zeros((0, 3, 3))
+    points, inverse = np.unique(np.concatenate(segments).reshape(-1, 3), axis=0, return_inverse=True)
+    faces = cap_faces(points, chain_loops(inverse.reshape(-1, 2)), normal)
+    return points[faces]
+
+
+def clip(chunks, normal, offset, cap=True):
+    """Оставляет часть, где dot(normal, x) < offset, и отдает крышки сечения.
+
+    Как clip_plane, но без разбиения на оболочки: крышки корректны, если
+    оболочки не пересекаются друг с другом (сетки трубок, плиты). Крышка
+    отдается, как только все начатые оболочки замкнулись, и в конце потока.
+    """
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    section = []
+    balance = 0
+    for tris in chunks:
+        kept, segments = _clip_chunk(tris, normal, offset)
+        if len(kept):
+            yield kept
+        if cap:
+            if len(segments):
+                section.append(segments)
+            balance = (balance + _edge_balance(tris)) % 2 ** 64
+            if section and balance == 0:
+                # Все контуры сечения замкнуты: отверстия к ним уже не добавятся
+                yield _cap(section, normal)
+                section = []
+    if cap:
+        yield _cap(section, normal)
+
+
+def cut_slab(chunks, z_low, z_high):
+    """Удаляет слой z_low < z < z_high (как cut_slab из clip) за один проход по кускам."""
+    up, down = np.array([0.0, 0.0, 1.0]), np.array([0.0, 0.0, -1.0])
+    below, above = [], []
+    balance = 0
+    for tris in chunks:
+        for normal, offset, section in ((up, z_low, below), (down, -z_high, above)):
+            kept, segments = _clip_chunk(tris, normal, offset)
+            if len(segments):
+                section.append(segments)
+            if len(kept):
+                yield kept
+        balance = (balance + _edge_balance(tris)) % 2 ** 64
+        if (below or above) and balance == 0:
+            yield _cap(below, up)
+            yield _cap(above, down)
+            below, above = [], []
+    yield _cap(below, up)
+    yield _cap(above, down)
+
+
+def rechunk(chunks, size=DEFAULT_CHUNK):
+    """Выравнивает куски до size треугольников (после разреза они бывают больше или меньше)."""
+    pending = []
+    count = 0
+    for tris in chunks:
+        pending.append(tris)
+        count += len(tris)
+        if count >= size:
+            tris = np.concatenate(pending)
+            for start in range(0, len(tris) - size + 1, size):
+                yield tris[start:start + size]
+            rest = tris[len(tris) - len(tris) % size:]
+            pending, count = [rest], len(rest)
+    if count:
+        yield np.concatenate(pending)
+
+
+# --- 3. Запись ---
+def write_stl_stream(path, chunks, header=b"meshtools"):
+    """Пишет бинарный STL по кускам; число треугольников вписывается в заголовок в конце."""
+    count = 0
+    with open(path, "wb") as f:
+        f.write(header[:80].ljust(80, b"\0"))
+        f.write(np.uint32(0).tobytes())
+        for tris in chunks:
+            if len(tris):
+                stl_records(tris).tofile(f)
+                count += len(tris)
+        if count >= 2 ** 32:
+            raise ValueError(f"{count} треугольников не помещаются в заголовок STL.")
+        f.seek(80)
+        f.write(np.uint32(count).tobytes())
+    return count
+
+
+# --- 4. Сетка трубок ---
+def tube_grid_chunks(nx, ny, pitch, diameter, internal_diameter, height, segments=32, chunk=DEFAULT_CHUNK):
+    """Плита nx x ny трубок с шагом pitch; позиции строятся по рядам, а не сразу для всей плиты."""
+    x = (np.arange(nx) - (nx - 1) / 2) * pitch
+    for j in range(ny):
+        row = np.column_stack([x, np.full(nx, (j - (ny - 1) / 2) * pitch), np.full(nx, height / 2)])
+        yield from tube_chunks(diameter, internal_diameter, height, segments, row, chunk=chunk)
+
+
+# --- 5. Детали генераторов ---
+def _slab(p):
+    # Как slab_cut в generators: масштаб куба по Z равен cut_thickness / 2
+    half = p["cut_thickness"] / 4
+    return p["z_offset"] - half, p["z_offset"] + half
+
+
+def corner_chunks(p, chunk=DEFAULT_CHUNK):
+    """Уголок (шаги generators.CORNER_STEPS) потоком; p - полный набор параметров corner."""
+    rotation, offset = rotation_matrix(-90, 45, 0), (0.0, 0.0, p["offset_of_joinded"])
+    external_diameter = p["external_diameter_ratio"] * p["internal_diameter"]
+    height = p["external_height"]
+    sweep = (p["missing_sector_start"] - p["missing_sector_end"]) % 360.0
+    # Как generators.corner_sector: сектор от конца отсутствующего сектора до его начала
+    shells = [sector_chunks(p["inner_diameter"] / 2, p["outer_diameter"] / 2, p["height"],
+                            p["missing_sector_end"], sweep, int(p["segments"]), chunk)]
+    for translation, tube_rotation in (((-p["inner_diameter"], 0.0, height / 2), rotation_matrix(90, 0, 90)),
+                                       ((0.0, -p["inner_diameter"], height / 2), rotation_matrix(90, 0, 180))):
+        shells.append(tube_chunks(external_diameter, p["internal_diameter"], height, int(p["tube_segments"]),
+                                  [translation], [tube_rotation], chunk))
+    for shell in shells:
+        yield from cut_slab(transform(shell, rotation, offset), *_slab(p))
+
+
+def six_ray_chunks(p, chunk=DEFAULT_CHUNK):
+    """Шестилучевая трубка (шаги generators.SIX_RAY_STEPS) потоком."""
+    rotation = rotation_matrix(p["rotate_x"], p["rotate_y"], 0)
+    external_diameter = p["external_diameter_ratio"] * p["internal_diameter"]
+    for tube_rotation in (rotation_matrix(), rotation_matrix(90, 0, 0), rotation_matrix(0, 90, 0)):
+        tube = tube_chunks(external_diameter, p["internal_diameter"], p["external_height"],
+                           int(p["tube_segments"]), rotations=[rotation @ tube_rotation], chunk=chunk)
+        yield from cut_slab(transform(tube, translation=(0.0, 0.0, p["external_height"] / 2)), *_slab(p))
+
+
+STREAMED = {"corner": corner_chunks, "six_ray_tube": six_ray_chunks}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковая генерация сетки трубок или детали в STL.")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--nx", type=int, default=10)
+    parser.add_argument("--ny", type=int, default=10)
+    parser.add_argument("--pitch", type=float, default=5.0, help="шаг сетки, мм")
+    parser.add_argument("--diameter", type=float, default=4.99)
+    parser.add_argument("--internal-diameter", type=float, default=2.85)
+    parser.add_argument("--height", type=float, default=10.0)
+    parser.add_argument("--segments", type=int, default=32)
+    parser.add_argument("--rotate", type=float, nargs=3, metavar=("X", "Y", "Z"), help="поворот XYZ, градусы")
+    parser.add_argument("--clip-z", type=float, help="оставить часть ниже этой высоты")
+    parser.add_argument("--slab", type=float, nargs=2, metavar=("LOW", "HIGH"), help="вырезать слой по z")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="треугольников в куске")
+    parser.add_argument("--generator", choices=sorted(STREAMED), help="деталь генератора вместо сетки трубок")
+    parser.add_argument("-p", "--param", action="append", default=[], help="имя=значение для --generator")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.generator:
+        try:
+            params = resolve_params(args.generator, {key: json.loads(value) for key, _, value in
+                                                     (item.partition("=") for item in args.param)})
+        except ValueError as error:
+            parser.error(str(error))
+        chunks = STREAMED[args.generator](params, args.chunk)
+    else:
+        chunks = tube_grid_chunks(args.nx, args.ny, args.pitch, args.diameter, args.internal_diameter,
+                                  args.height, args.segments, args.chunk)
+    if args.rotate:
+        chunks = transform(chunks, rotation_matrix(*args.rotate))
+    if args.clip_z is not None:
+        chunks = clip(chunks, (0.0, 0.0, 1.0), args.clip_z)
+    if args.slab:
+        chunks = cut_slab(chunks, *args.slab)
+    count = write_stl_stream(args.output, chunks)
+    print(f"{args.output}: {count} треугольников за {time.perf_counter() - start:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Чтение и запись 3MF (zip с XML-моделью) без внешних библиотек.
+
+Пишутся только сетки объектов без компонентов и матриц. При чтении
+разбирается XML (любой порядок атрибутов), объекты из компонентов
+(<components>) раскрываются, матрицы transform компонентов и элементов
+сборки применяются; у зеркальных матриц обход граней меняется. Компоненты из других файлов пакета (p:path) не
+поддерживаются.
+"""
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import numpy as np
+
+from meshtools.mesh import Mesh, make_mesh, merge, transformed
+
+MODEL_PATH = "3D/3dmodel.model"
+COMPRESS_LEVEL = 6
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    "</Types>\n"
+)
+RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Target="/{MODEL_PATH}" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    "</Relationships>\n"
+)
+
+_NS = "{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}"
+
+
+# --- 1. Запись ---
+def _mesh_xml(mesh):
+    """XML вершин и треугольников одной форматной операцией на весь массив."""
+    vertices = ('<vertex x="%.6f" y="%.6f" z="%.6f"/>' * len(mesh.vertices)) % tuple(mesh.vertices.ravel().tolist())
+    faces = ('<triangle v1="%d" v2="%d" v3="%d"/>' * len(mesh.faces)) % tuple(mesh.faces.ravel().tolist())
+    return f"<mesh><vertices>{vertices}</vertices><triangles>{faces}</triangles></mesh>"
+
+
+def model_xml(objects):
+    """Текст 3dmodel.model для списка (имя, Mesh)."""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<model unit="millimeter" xml:lang="en-US" '
+             'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02"><resources>']
+    for k, (name, mesh) in enumerate(objects, start=1):
+        name = name.replace("&", "&amp;").replace('"', "&quot;").replace("<", "&lt;")
+        parts.append(f'<object id="{k}" type="model" name="{name}">{_mesh_xml(mesh)}</object>')
+    parts.append("</resources><build>")
+    parts.extend(f'<item objectid="{k}"/>' for k in range(1, len(objects) + 1))
+    parts.append("</build></model>\n")
+    return "".join(parts)
+
+
+def write_3mf(file, mesh_or_objects, compresslevel=COMPRESS_LEVEL):
+    """Записывает 3MF в путь или открытый бинарный файл.
+
+    mesh_or_objects - Mesh или список (имя, Mesh); каждый объект попадает в сборку.
+    """
+    objects = [("part", mesh_or_objects)] if isinstance(mesh_or_objects, Mesh) else list(mesh_or_objects)
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        archive.writestr(MODEL_PATH, model_xml(objects))
+
+
+# --- 2. Чтение ---
+def _transform(element):
+    """Матрица 3MF "m00 m01 m02 ... m30 m31 m32" (строка-вектор умножается справа) -> (A, t)."""
+    text = element.get("transform")
+    if not text:
+        return np.eye(3), np.zeros(3)
+    values = np.array(text.split(), dtype=np.float64)
+    if len(values) != 12:
+        raise ValueError(f"transform из {len(values)} чисел вместо 12")
+    return values[:9].reshape(3, 3), values[9:]
+
+
+def _placed(mesh, element):
+    """Меш с матрицей элемента; у зеркальной матрицы (det < 0) обход граней меняется."""
+    rotation, translation = _transform(element)
+    # transformed умножает столбец-вектор слева, поэтому матрица транспонируется
+    return transformed(mesh, rotation.T, translation)
+
+
+def _object_mesh(objects, object_id, seen=()):
+    """Меш объекта: своя сетка или объединение компонентов с их матрицами."""
+    if object_id in seen:
+        raise ValueError(f"циклическая ссылка на объект {object_id}")
+    if object_id not in objects:
+        raise ValueError(f"нет объекта с id {object_id}")
+    element = objects[object_id]
+    mesh = element.find(f"{_NS}mesh")
+    if mesh is not None:
+        vertices = np.array([[float(v.get(axis)) for axis in "xyz"] for v in mesh.iter(f"{_NS}vertex")],
+                            dtype=np.float64).reshape(-1, 3)
+        faces = np.array([[int(t.get(key)) for key in ("v1", "v2", "v3")] for t in mesh.iter(f"{_NS}triangle")],
+                         dtype=np.int64).reshape(-1, 3)
+        return make_mesh(vertices, faces)
+    parts = []
+    for component in element.iter(f"{_NS}component"):
+        part = _object_mesh(objects, component.get("objectid"), (*seen, object_id))
+        parts.append(_placed(part, component))
+    return merge(parts) if parts else make_mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64))
+
+
+def read_3mf_objects(path):
+    """Меши элементов сборки (<build><item>) с примененными матрицами."""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read(MODEL_PATH))
+    objects = {element.get("id"): element for element in root.iter(f"{_NS}object")}
+    items = root.findall(f"{_NS}build/{_NS}item")
+    meshes = []
+    for item in items:
+        mesh = _object_mesh(objects, item.get("objectid"))
+        if len(mesh.faces):
+            meshes.append(_placed(mesh, item))
+    return meshes
+
+
+def read_3mf(path):
+    """Все объекты модели одним мешем."""
+    return merge(read_3mf_objects(path))
@@ -0,0 +1,236 @@
+"""Триангуляция плоских многоугольников с отверстиями (отсечение ушей).
+
+Используется для крышек: сечение после разреза плоскостью, торцы профилей.
+"""
+import bisect
+
+import numpy as np
+
+# Контуры не длиннее этого без отверстий режутся на списках Python
+SMALL_POLYGON = 16
+
+
+# --- 1. Вспомогательные функции ---
+def signed_area(points):
+    """Ориентированная площадь многоугольника (k, 2): > 0 для обхода против часовой стрелки."""
+    x, y = points[:, 0], points[:, 1]
+    # Срезы вместо np.roll: функция вызывается на множестве маленьких контуров
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) + x[-1] * y[0] - x[0] * y[-1])
+
+
+def points_in_polygon(points, polygon):
+    """Векторная проверка "точка внутри многоугольника" (правило четности)."""
+    points = np.atleast_2d(points)
+    a = polygon
+    b = np.roll(polygon, -1, axis=0)
+    px, py = points[:, 0:1], points[:, 1:2]
+    crosses = (a[None, :, 1] > py) != (b[None, :, 1] > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = a[None, :, 0] + (py - a[None, :, 1]) * (b[None, :, 0] - a[None, :, 0]) / (b[None, :, 1] - a[None, :, 1])
+    return (crosses & (px < x_at)).sum(axis=1) % 2 == 1
+
+
+def _cross(o, a, b):
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+
+# --- 2. Мосты к отверстиям ---
+def _locally_inside(ring_pts, pos, target):
+    """Лежит ли направление на target внутри угла многоугольника (против часовой) при вершине pos."""
+    p = ring_pts[pos]
+    to_prev = ring_pts[pos - 1] - p
+    to_next = ring_pts[(pos + 1) % len(ring_pts)] - p
+    d = target - p
+    left_of_next = to_next[0] * d[1] - to_next[1] * d[0] > 0
+    right_of_prev = d[0] * to_prev[1] - d[1] * to_prev[0] > 0
+    if to_next[0] * to_prev[1] - to_next[1] * to_prev[0] > 0:
+        return left_of_next and right_of_prev
+    return left_of_next or right_of_prev
+
+
+def _bridge_hole(ring, hole, coords):
+    """Вклеивает отверстие в кольцо индексов мостом от самой правой точки отверстия."""
+    hole_pts = coords[hole]
+    m = int(np.argmax(hole_pts[:, 0]))
+    mx, my = hole_pts[m]
+    ring_pts = coords[ring]
+    a, b = ring_pts, np.roll(ring_pts, -1, axis=0)
+    # Луч вправо от M: ближайшее пересечение с ребром кольца
+    spans = ((a[:, 1] <= my) & (b[:, 1] >= my)) | ((b[:, 1] <= my) & (a[:, 1] >= my))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(b[:, 1] != a[:, 1], (my - a[:, 1]) / (b[:, 1] - a[:, 1]), 0.0)
+    x_at = a[:, 0] + t * (b[:, 0] - a[:, 0])
+    valid = spans & (x_at >= mx)
+    if not valid.any():
+        raise ValueError("Отверстие лежит вне внешнего контура.")
+    edge = int(np.flatnonzero(valid)[np.argmin(x_at[valid])])
+    i, j = edge, (edge + 1) % len(ring)
+    best = i if a[edge, 0] >= b[edge, 0] else j
+    hit = np.array([x_at[edge], my])
+
+    # Если внутри треугольника (M, I, P) есть вершины кольца, берем ту, что ближе к лучу по углу
+    tri = np.array([[mx, my], hit, ring_pts[best]])
+    if abs(_cross(tri[0], tri[1], tri[2])) > 0:
+        sign = np.sign(_cross(tri[0], tri[1], tri[2]))
+        inside = ((sign * _cross(tri[0], tri[1], ring_pts) >= 0)
+                  & (sign * _cross(tri[1], tri[2], ring_pts) >= 0)
+                  & (sign * _cross(tri[2], tri[0], ring_pts) >= 0))
+        inside[best] = False
+        inside &= ring_pts[:, 0] >= mx
+        if inside.any():
+            candidates = np.flatnonzero(inside)
+            d = ring_pts[candidates] - [mx, my]
+            angle = np.abs(np.arctan2(d[:, 1], d[:, 0]))
+            candidates = candidates[np.lexsort((np.hypot(d[:, 0], d[:, 1]), angle))]
+            best = int(candidates[0])
+
+    # Вершина может встречаться в кольце дважды (после предыдущих мостов):
+    # берем то вхождение, в чей внутренний угол смотрит направление на M
+    for pos in np.flatnonzero(np.all(ring_pts == ring_pts[best], axis=1)):
+        if _locally_inside(ring_pts, pos, np.array([mx, my])):
+            best = int(pos)
+            break
+
+    hole_cycle = np.roll(hole, -m)
+    return np.concatenate([ring[:best + 1], hole_cycle, hole_cycle[:1], ring[best:]])
+
+
+# --- 3. Отсечение ушей ---
+def _cross2(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def _ear_clip(ring, coords):
+    n = len(ring)
+    prev = list(range(-1, n - 1))
+    prev[0] = n - 1
+    nxt = list(range(1, n + 1))
+    nxt[-1] = 0
+    alive = np.ones(n, dtype=bool)
+    pts = coords[ring]
+    px, py = pts[:, 0].tolist(), pts[:, 1].tolist()
+    # Внутрь уха может попасть только невыпуклая вершина; ищем их в полосе по x через сортировку
+    reflex = _cross(pts[prev], pts, pts[nxt]) <= 0
+    by_x = np.argsort(pts[:, 0], kind="stable")
+    xs = pts[by_x, 0].tolist()
+    triangles = []
+    remaining = n
+    current = 0
+    misses = 0
+    while remaining > 3:
+        p, c, q = prev[current], current, nxt[current]
+        ax, ay, bx, by, dx, dy = px[p], py[p], px[c], py[c], px[q], py[q]
+        is_ear = False
+        if _cross2(ax, ay, bx, by, dx, dy) > 0:
+            lo = bisect.bisect_left(xs, min(ax, bx, dx))
+            hi = bisect.bisect_right(xs, max(ax, bx, dx))
+            is_ear = True
+            if hi > lo:
+                others = by_x[lo:hi]
+                others = others[alive[others] & reflex[others]]
+                cx, cy = pts[others, 0], pts[others, 1]
+                # Вершины, совпадающие с вершинами уха (дубликаты от мостов), не в счет
+                same = ((cx == ax) & (cy == ay)) | ((cx == bx) & (cy == by)) | ((cx == dx) & (cy == dy))
+                inside = ((_cross2(ax, ay, bx, by, cx, cy) >= 0) & (_cross2(bx, by, dx, dy, cx, cy) >= 0)
+                          & (_cross2(dx, dy, ax, ay, cx, cy) >= 0) & ~same)
+                is_ear = not inside.any()
+        if is_ear or misses > remaining:
+            # Если ушей не осталось (вырожденный остаток), режем вершину принудительно
+            triangles.append((ring[p], ring[c], ring[q]))
+            alive[c] = False
+            nxt[p], prev[q] = q, p
+            for k in (p, q):
+                reflex[k] = _cross2(px[prev[k]], py[prev[k]], px[k], py[k], px[nxt[k]], py[nxt[k]]) <= 0
+            remaining -= 1
+            misses = 0
+            current = p
+        else:
+            misses += 1
+            current = q
+    current = int(np.flatnonzero(alive)[0])
+    triangles.append((ring[prev[current]], ring[current], ring[nxt[current]]))
+    return triangles
+
+
+def _ear_clip_small(points):
+    """Отсечение ушей на списках Python для маленьких контуров без отверстий (обход против часовой)."""
+    ring = list(range(len(points)))
+    triangles = []
+    while len(ring) > 3:
+        m = len(ring)
+        for k in range(m):
+            a, b, c = ring[k - 1], ring[k], ring[(k + 1) % m]
+            (ax, ay), (bx, by), (cx, cy) = points[a], points[b], points[c]
+            if _cross2(ax, ay, bx, by, cx, cy) <= 0:
+                continue
+            if any(_cross2(ax, ay, bx, by, x, y) >= 0 and _cross2(bx, by, cx, cy, x, y) >= 0
+                   and _cross2(cx, cy, ax, ay, x, y) >= 0
+                   for x, y in (points[i] for i in ring if i not in (a, b, c))
+                   if (x, y) not in (points[a], points[b], points[c])):
+                continue
+            break
+        else:
+            # Ушей нет (вырожденный остаток) - режем вершину принудительно
+            k = 0
+        triangles.append((ring[k - 1], ring[k], ring[(k + 1) % m]))
+        del ring[k]
+    triangles.append(tuple(ring))
+    return triangles
+
+
+def triangulate(outer, holes=()):
+    """Триангулирует многоугольник (outer - (k, 2)) с отверстиями.
+
+    Возвращает треугольники (t, 3) - индексы в объединенном массиве
+    [outer, holes[0], holes[1], ...], обход против часовой стрелки.
+    Ориентация входных контуров может быть любой.
+    """
+    outer = np.asarray(outer, dtype=np.float64)
+    holes = [np.asarray(h, dtype=np.float64) for h in holes]
+    coords = np.concatenate([outer] + holes) if holes else outer
+    offsets = np.cumsum([0, len(outer)] + [len(h) for h in holes])
+
+    ring = np.arange(len(outer))
+    if signed_area(outer) < 0:
+        ring = ring[::-1]
+    if not holes and len(outer) <= SMALL_POLYGON:
+        # На маленьких контурах накладные расходы NumPy больше самой работы
+        if len(ring) < 3:
+            return np.zeros((0, 3), dtype=np.int64)
+        points = outer[ring].tolist()
+        return ring[np.array(_ear_clip_small([tuple(p) for p in points]), dtype=np.int64)]
+    hole_rings = []
+    for k, hole in enumerate(holes):
+        indices = np.arange(offsets[k + 1], offsets[k + 2])
+        hole_rings.append(indices[::-1] if signed_area(hole) > 0 else indices)
+    # Отверстия вклеиваются по убыванию самой правой координаты
+    for indices in sorted(hole_rings, key=lambda h: -coords[h, 0].max()):
+        ring = _bridge_hole(ring, indices, coords)
+    if len(ring) < 3:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.array(_ear_clip(ring, coords), dtype=np.int64)
+
+
+def group_loops(loops):
+    """Разбирает контуры на внешние и отверстия по вложенности.
+
+    Возвращает список (индекс_внешнего, [индексы_отверстий]). Контур считается
+    отверстием, если он лежит внутри нечетного числа других контуров.
+    """
+    areas = np.array([abs(signed_area(loop)) for loop in loops])
+    # Габариты контуров отсеивают заведомо не содержащие контуры без точного теста
+    low = np.array([loop.min(axis=0) for loop in loops]).reshape(-1, 2)
+    high = np.array([loop.max(axis=0) for loop in loops]).reshape(-1, 2)
+    parents = []
+    depth = []
+    for i, loop in enumerate(loops):
+        p = loop[0]
+        candidates = np.flatnonzero((areas > areas[i]) & (low <= p).all(axis=1) & (high >= p).all(axis=1))
+        containing = [j for j in candidates.tolist() if points_in_polygon(loop[:1], loops[j])[0]]
+        depth.append(len(containing))
+        parents.append(min(containing, key=lambda j: areas[j]) if containing else None)
+    groups = {i: [] for i in range(len(loops)) if depth[i] % 2 == 0}
+    for i in range(len(loops)):
+        if depth[i] % 2 == 1:
+            groups[parents[i]].append(i)
+    return list(groups.items())
@@ -0,0 +1,132 @@
+"""Режим наблюдения: перегенерация детали при изменении файла параметров.
+
+Пример:
+    python -m meshtools.watch 3DScrog/corner.params.json -o corner.stl
+
+Пересчитываются только шаги, зависящие от измененных параметров; остальные
+берутся из кэша шагов в памяти или, с --cache-dir, с диска (переживает перезапуск).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+from meshtools.buildgraph import DEFAULT_CACHE_DIR, BuildGraph, DiskCache
+from meshtools.decimate import decimate
+from meshtools.generators import GENERATORS, resolve_params
+from meshtools.stl_io import write_stl
+
+
+def load_params(path):
+    """Читает JSON вида {"generator": "corner", "params": {...}}; возвращает имя и полный набор параметров."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    name = data.get("generator")
+    try:
+        return name, resolve_params(name, data.get("params", {}))
+    except KeyError as error:
+        raise ValueError(f"{path}: {error.args[0]}") from None
+    except ValueError as error:
+        raise ValueError(f"{path}: {error}") from None
+
+
+def write_atomic(path, mesh):
+    """Пишет STL во временный файл и подменяет результат одной операцией."""
+    tmp = f"{path}.tmp"
+    try:
+        write_stl(tmp, mesh)
+        os.replace(tmp, path)
+    finally:
+        # После сбоя временный файл не должен оставаться рядом с результатом
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+
+
+def regenerate(params_path, output, graphs, disk=None, preview=None):
+    """Перестраивает деталь, переиспользуя граф шагов (и его кэши) этого генератора."""
+    start = time.perf_counter()
+    name, params = load_params(params_path)
+    if name not in graphs:
+        graphs[name] = BuildGraph(GENERATORS[name][0], disk=disk)
+    graph = graphs[name]
+    mesh = graph.build(params)
+    write_atomic(output, mesh)
+    if preview:
+        # Облегченная копия для просмотра рядом с файлом для печати
+        write_atomic(preview_path(output), decimate(mesh, target_faces=int(len(mesh.faces) * preview)))
+    steps = ", ".join(f"{step} {seconds * 1000:.0f} мс" for step, (source, seconds) in graph.last_report.items()
+                      if source == "computed") or "нет"
+    print(f"[{time.strftime('%H:%M:%S')}] {output}: {len(mesh.faces)} треугольников, "
+          f"{(time.perf_counter() - start) * 1000:.0f} мс; пересчитано: {steps}")
+
+
+def preview_path(output):
+    stem, ext = os.path.splitext(output)
+    return f"{stem}.preview{ext}"
+
+
+def watch(params_path, output, interval=0.2, once=False, cache_dir=None, preview=None):
+    """Следит за файлом параметров; с once=True собирает один раз и возвращает признак успеха."""
+    graphs = {}
+    disk = DiskCache(cache_dir) if cache_dir else None
+    try:
+        return _poll(params_path, output, interval, once, graphs, disk, preview)
+    finally:
+        for graph in graphs.values():
+            graph.close()
+
+
+def _poll(params_path, output, interval, once, graphs, disk, preview):
+    last = None
+    while True:
+        try:
+            mtime = os.stat(params_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+            if once:
+                print(f"Ошибка: нет файла {params_path}", file=sys.stderr)
+                return False
+        if mtime is not None and mtime != last:
+            last = mtime
+            ok = False
+            try:
+                regenerate(params_path, output, graphs, disk, preview)
+                ok = True
+            except (ValueError, KeyError) as error:
+                # Ошибка в параметрах не должна останавливать наблюдение
+                print(f"Ошибка: {error}", file=sys.stderr)
+            except Exception:
+                # Сбой генератора или записи тоже: следующее сохранение параметров перезапустит сборку
+                print(f"Сбой сборки {params_path}:\n{traceback.format_exc()}", file=sys.stderr)
+            if once:
+                return ok
+        time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перегенерация детали при изменении параметров.")
+    parser.add_argument("params", help="JSON-файл параметров генератора")
+    parser.add_argument("-o", "--output", required=True, help="выходной STL")
+    parser.add_argument("--interval", type=float, default=0.2, help="период опроса файла, с")
+    parser.add_argument("--once", action="store_true", help="сгенерировать один раз и выйти")
+    parser.add_argument("--cache-dir", nargs="?", const=DEFAULT_CACHE_DIR,
+                        help=f"дисковый кэш шагов (по умолчанию {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--preview", type=float, metavar="RATIO",
+                        help="также писать упрощенную копию *.preview.stl с долей треугольников RATIO")
+    args = parser.parse_args(argv)
+    if args.preview is not None and not 0 < args.preview <= 1:
+        parser.error("--preview: доля треугольников должна быть в (0, 1]")
+    try:
+        ok = watch(args.params, args.output, args.interval, args.once, args.cache_dir, args.preview)
+    except KeyboardInterrupt:
+        return 0
+    # С --once сбой сборки виден по коду выхода
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
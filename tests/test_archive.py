@@ -0,0 +1,86 @@
+"""Архив meshz: точность квантования, метаданные и отказ на чужих и поврежденных файлах."""
+import numpy as np
+import pytest
+
+from meshtools.archive import MAGIC, PREAMBLE, VERSION, decode, encode, quantize, read_archive, read_header, write_archive
+from meshtools.csg import is_manifold
+from meshtools.generators import CORNER_DEFAULTS, build_corner
+from meshtools.mesh import make_mesh
+from meshtools.primitives import box, sphere
+
+
+def faces_as_set(mesh):
+    """Грани как множество троек координат с точностью до циклического сдвига."""
+    tris = np.round(mesh.vertices[mesh.faces], 9)
+    result = set()
+    for tri in tris.tolist():
+        k = tri.index(min(tri))
+        result.add(tuple(map(tuple, tri[k:] + tri[:k])))
+    return result
+
+
+@pytest.mark.parametrize("codec", ["lzma", "zlib", "none"])
+@pytest.mark.parametrize("quantum", [0.001, 0.05])
+def test_round_trip_error_is_within_half_quantum(codec, quantum):
+    mesh = sphere(7.3, 24, (100.123456, -3.3, 0.5))
+    restored, header = decode(encode(mesh, quantum, codec=codec))
+    assert header["vertex_count"] == len(restored.vertices) and header["face_count"] == len(restored.faces)
+    assert len(restored.faces) == len(mesh.faces)
+    # Каждая исходная вершина на сетке не дальше половины шага по каждой оси
+    error = np.abs(restored.vertices[None] - mesh.vertices[:, None]).max(axis=2).min(axis=1)
+    assert error.max() <= quantum / 2 + 1e-9
+    assert is_manifold(restored)
+
+
+def test_round_trip_is_exact_on_the_grid():
+    # Вершины уголка уже лежат на сетке после первого прохода: второй проход ничего не меняет
+    first, _ = decode(encode(build_corner({**CORNER_DEFAULTS, "segments": 64})))
+    second, _ = decode(encode(first))
+    assert faces_as_set(first) == faces_as_set(second)
+    assert np.allclose(np.sort(first.vertices, axis=0), np.sort(second.vertices, axis=0), atol=1e-9)
+
+
+def test_vertices_merged_by_quantization():
+    # Две вершины в пределах шага сливаются, вырожденная после этого грань выбрасывается
+    mesh = make_mesh(np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0.0004, 0, 0]]), np.array([[0, 1, 2], [0, 3, 2]]))
+    grid, faces, _ = quantize(mesh)
+    assert len(grid) == 3 and len(faces) == 1
+
+
+def test_empty_mesh():
+    empty = make_mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64))
+    restored, header = decode(encode(empty))
+    assert restored.vertices.shape == (0, 3) and restored.faces.shape == (0, 3)
+    assert header["bounds"] is None
+
+
+def test_params_metadata(tmp_path):
+    params = {"generator": "corner", "params": {"segments": 64, "подпись": "уголок"}}
+    path = str(tmp_path / "part.meshz")
+    write_archive(path, box((1, 2, 3)), params=params)
+    mesh, header = read_archive(path)
+    assert header["params"] == params
+    assert header["version"] == VERSION
+    assert np.allclose(header["bounds"], [[-0.5, -1, -1.5], [0.5, 1, 1.5]])
+    assert len(mesh.faces) == 12
+
+
+def corrupted(data):
+    header, offset = read_header(data)
+    size = offset - PREAMBLE.size
+    return {
+        "short": data[:PREAMBLE.size - 1],
+        "magic": b"STLZZ" + data[5:],
+        "future": PREAMBLE.pack(MAGIC, VERSION + 1, size) + data[PREAMBLE.size:],
+        "zero": PREAMBLE.pack(MAGIC, 0, size) + data[PREAMBLE.size:],
+        "truncated_header": data[:offset - 5],
+        "not_json": PREAMBLE.pack(MAGIC, VERSION, 4) + b"{{{{" + data[offset:],
+        "codec": PREAMBLE.pack(MAGIC, VERSION, 16) + b'{"codec": "xz!"}' + data[offset:],
+    }
+
+
+@pytest.mark.parametrize("kind", ["short", "magic", "future", "zero", "truncated_header", "not_json", "codec"])
+def test_bad_headers_are_rejected(kind):
+    data = corrupted(encode(box((1, 1, 1))))[kind]
+    with pytest.raises(ValueError):
+        decode(data)
@@ -0,0 +1,48 @@
+"""Граф сборки: ключ шага меняется при правке помощников из других модулей пакета."""
+import types
+
+import numpy as np
+
+from meshtools.buildgraph import BuildGraph, DiskCache, Step, code_hash
+
+
+def make_step(offset, style="module"):
+    """Шаг в одном модуле пакета, его помощник - в другом; offset - "правка" помощника."""
+    helpers = types.ModuleType("meshtools._test_helpers")
+    exec("from meshtools.primitives import box\n"
+         "from meshtools.mesh import make_mesh\n\n"
+         "def moved_box(size):\n"
+         "    mesh = box((size, size, size))\n"
+         f"    return make_mesh(mesh.vertices + {offset}, mesh.faces)\n", helpers.__dict__)
+    steps = types.ModuleType("meshtools._test_steps")
+    if style == "module":
+        steps.helpers = helpers
+        exec("def step(p):\n    return helpers.moved_box(p['size'])\n", steps.__dict__)
+    else:
+        steps.moved_box = helpers.moved_box
+        exec("def step(p):\n    return moved_box(p['size'])\n", steps.__dict__)
+    return steps.step
+
+
+def test_code_hash_follows_callees_across_modules():
+    for style in ("module", "function"):
+        assert code_hash(make_step(1.0, style)) == code_hash(make_step(1.0, style))
+        assert code_hash(make_step(1.0, style)) != code_hash(make_step(2.0, style))
+
+
+def test_editing_a_callee_invalidates_the_cache(tmp_path):
+    disk = DiskCache(str(tmp_path))
+
+    def build(offset):
+        with BuildGraph([Step("moved", make_step(offset), ("size",))], disk=disk, workers=1) as graph:
+            mesh = graph.build({"size": 2.0})
+            return mesh, graph.last_report["moved"][0]
+
+    first, source = build(1.0)
+    assert source == "computed"
+    again, source = build(1.0)
+    assert source == "disk"
+    assert np.array_equal(again.vertices, first.vertices)
+    edited, source = build(2.0)
+    assert source == "computed"
+    assert np.allclose(edited.vertices, first.vertices + 1.0)
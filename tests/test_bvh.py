@@ -0,0 +1,62 @@
+"""BVH: ближайшие точки против полного перебора, знак расстояния против числа оборотов."""
+import numpy as np
+import pytest
+
+from meshtools.bvh import BVH, closest_point_on_triangles
+from meshtools.collision import winding_numbers
+from meshtools.csg import union
+from meshtools.extrude import Profile, extrude, polygon
+from meshtools.mesh import triangles
+from meshtools.primitives import box, cylinder, rotation_matrix
+
+
+def brute_force(points, tris):
+    """Расстояния до ближайших точек перебором всех треугольников."""
+    best = np.full(len(points), np.inf)
+    for a, b, c in tris:
+        k = len(points)
+        closest = closest_point_on_triangles(points, np.tile(a, (k, 1)), np.tile(b, (k, 1)), np.tile(c, (k, 1)))
+        best = np.minimum(best, np.linalg.norm(points - closest, axis=1))
+    return best
+
+
+# Острый клин (угол 7 градусов), тело с вогнутыми ребрами и цилиндр
+SHAPES = {
+    "wedge": extrude(Profile(polygon((0, 0), (4, 0), (0, 0.5))), 1.0),
+    "union": union(box((2, 2, 2)), box((2, 2, 2), (1, 1, 1)), cylinder(0.5, 4, 12, (-1, 0, 0), rotation_matrix(0, 90, 0))),
+    "cylinder": cylinder(1.0, 2.0, 24),
+}
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_closest_matches_brute_force(name):
+    mesh = SHAPES[name]
+    tris = triangles(mesh)
+    points = np.random.default_rng(1).uniform(-3, 5, (400, 3))
+    distance, tri, closest = BVH(tris).closest(points)
+    assert np.allclose(distance, brute_force(points, tris), atol=1e-6)
+    # Найденная точка лежит на найденном треугольнике
+    t = tris[tri]
+    assert np.allclose(closest_point_on_triangles(closest, t[:, 0], t[:, 1], t[:, 2]), closest, atol=1e-9)
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_sign_matches_winding_number(name):
+    mesh = SHAPES[name]
+    tris = triangles(mesh)
+    lo, hi = mesh.vertices.min(axis=0) - 0.3, mesh.vertices.max(axis=0) + 0.3
+    points = np.random.default_rng(2).uniform(lo, hi, (4000, 3))
+    distance, _, _ = BVH(tris).signed_distance(points)
+    inside = winding_numbers(points, tris) > 0.5
+    off_surface = np.abs(distance) > 1e-6
+    assert ((distance < 0) == inside)[off_surface].all()
+
+
+def test_sign_around_sharp_edges():
+    # У острого ребра нормаль одной из его граней может смотреть от внешней точки
+    tris = triangles(SHAPES["wedge"])
+    angles = np.radians(np.arange(0, 360, 5))
+    ring = 0.15 * np.stack([np.cos(angles), np.sin(angles), np.zeros(len(angles))], axis=1)
+    points = np.concatenate([ring + (4, 0, 0.5), ring + (0, 0.5, 0.5)])
+    distance, _, _ = BVH(tris).signed_distance(points)
+    assert ((distance < 0) == (winding_numbers(points, tris) > 0.5)).all()
@@ -0,0 +1,57 @@
+"""Разрез плоскостью: сечение заделано, объемы верные, оболочки режутся отдельно."""
+import numpy as np
+import pytest
+
+from meshtools.clip import clip_plane, cut_slab
+from meshtools.csg import is_manifold
+from meshtools.mesh import components, merge
+from meshtools.primitives import box, hollow_cylinder, rotation_matrix, sphere
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+@pytest.mark.parametrize("offset", [-0.75, 0.0, 0.3])
+def test_box_clipped_by_plane(offset):
+    result = clip_plane(box((2, 2, 2)), (0, 0, 1), offset)
+    assert is_manifold(result)
+    assert volume(result) == pytest.approx(4 * (offset + 1))
+
+
+def test_plane_through_vertices():
+    # Плоскость проходит через ребра и вершины куба по диагонали
+    result = clip_plane(box((2, 2, 2)), (1, 1, 0), 0.0)
+    assert is_manifold(result)
+    assert volume(result) == pytest.approx(4.0)
+
+
+def test_oblique_cut_of_sphere():
+    mesh = sphere(1, 32)
+    normal = rotation_matrix(30, 20, 0) @ np.array([0.0, 0.0, 1.0])
+    low, high = clip_plane(mesh, normal, 0.2), clip_plane(mesh, -normal, -0.2)
+    assert is_manifold(low) and is_manifold(high)
+    assert volume(low) + volume(high) == pytest.approx(volume(mesh))
+
+
+def test_slab_cut_of_tube_leaves_ring_caps():
+    tube = hollow_cylinder(10, 4, 2, segments=24)
+    result = cut_slab(tube, -1.0, 2.0, half_size=5)
+    assert is_manifold(result)
+    assert len(components(result)) == 2
+    assert volume(result) == pytest.approx(volume(tube) * 7 / 10)
+
+
+def test_overlapping_shells_are_cut_separately():
+    # Объединение без булевой операции: сечения пересекаются, но каждое заделано само
+    joined = merge([box((2, 2, 2)), box((2, 2, 2), (1, 1, 0))])
+    result = clip_plane(joined, (0, 0, 1), 0.0)
+    assert is_manifold(result)
+    assert len(components(result)) == 2
+    assert volume(result) == pytest.approx(8.0)
+
+
+def test_part_outside_cutter_is_rejected():
+    with pytest.raises(ValueError):
+        cut_slab(sphere(10, 16), -0.5, 0.5, half_size=5)
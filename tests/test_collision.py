@@ -0,0 +1,58 @@
+"""Столкновения: пары через BVH против перебора всех пар теоремой о разделяющей оси, зазоры против перебора."""
+import numpy as np
+import pytest
+
+from meshtools.collision import (check_pair, intersecting_pairs, min_distance, triangle_distances,
+                                 triangles_intersect)
+from meshtools.mesh import transformed, triangles
+from meshtools.primitives import box, cylinder, rotation_matrix
+
+
+def all_pairs(a, b):
+    ia, ib = np.meshgrid(np.arange(len(a)), np.arange(len(b)), indexing="ij")
+    return ia.ravel(), ib.ravel()
+
+
+@pytest.mark.parametrize("offset", [(0.5, 0.2, 0.1), (1.0, 0.0, 0.0), (1.9, 0.3, 0.0)])
+def test_intersecting_pairs_match_brute_force(offset):
+    a = cylinder(1.0, 2.0, 16)
+    b = transformed(box((1.5, 1.5, 1.5)), rotation_matrix(10, 20, 30), offset)
+    tris_a, tris_b = triangles(a), triangles(b)
+    ia, ib = all_pairs(tris_a, tris_b)
+    hits = triangles_intersect(tris_a[ia], tris_b[ib])
+    expected = set(zip(ia[hits].tolist(), ib[hits].tolist()))
+    assert set(zip(*(x.tolist() for x in intersecting_pairs(a, b)))) == expected
+
+
+def test_min_distance_matches_brute_force():
+    a = cylinder(1.0, 2.0, 16)
+    b = transformed(box((1.0, 1.0, 1.0)), rotation_matrix(10, 20, 30), (2.0, 0.4, 0.3))
+    tris_a, tris_b = triangles(a), triangles(b)
+    ia, ib = all_pairs(tris_a, tris_b)
+    expected = triangle_distances(tris_a[ia], tris_b[ib]).min()
+    assert expected > 0
+    assert min_distance(a, b, limit=10.0) == pytest.approx(expected)
+    assert min_distance(a, b, limit=expected / 2) == np.inf
+
+
+def test_triangle_distance_against_sampling():
+    rng = np.random.default_rng(3)
+    a, b = rng.uniform(-1, 1, (40, 3, 3)), rng.uniform(-1, 1, (40, 3, 3)) + (1.5, 0, 0)
+    exact = triangle_distances(a, b)
+    # Точки на треугольниках по сетке барицентрических координат дают верхнюю оценку
+    u, v = np.meshgrid(np.linspace(0, 1, 25), np.linspace(0, 1, 25))
+    inside = u + v <= 1
+    weights = np.stack([1 - u[inside] - v[inside], u[inside], v[inside]], axis=1)
+    sample_a = np.einsum("sk,tkj->tsj", weights, a)
+    sample_b = np.einsum("sk,tkj->tsj", weights, b)
+    sampled = np.linalg.norm(sample_a[:, :, None] - sample_b[:, None], axis=3).min(axis=(1, 2))
+    assert (exact <= sampled + 1e-12).all()
+    intersecting = triangles_intersect(a, b)
+    assert np.all(exact[intersecting] == 0)
+    assert np.allclose(exact[~intersecting], sampled[~intersecting], atol=0.1)
+
+
+def test_contained_part_counts_as_overlap():
+    outer, inner = box((4, 4, 4)), box((1, 1, 1))
+    contact = check_pair("outer", outer, "inner", inner, expect="clear")
+    assert contact.contained and not contact.ok
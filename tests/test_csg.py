@@ -0,0 +1,114 @@
+"""Булевы операции: объемы и многообразие на кубах и цилиндрах, цепочки операций."""
+import numpy as np
+import pytest
+
+from meshtools.collision import winding_numbers
+from meshtools.csg import boolean, is_manifold, snap
+from meshtools.mesh import make_mesh
+from meshtools.primitives import box, cylinder, rotation_matrix
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+@pytest.mark.parametrize("operation, expected", [("union", 15.0), ("intersection", 1.0), ("difference", 7.0)])
+def test_overlapping_cubes(operation, expected):
+    # Кубы со стороной 2, второй сдвинут на (1, 1, 1): грани частично совпадают по плоскостям
+    result = boolean(box((2, 2, 2)), box((2, 2, 2), (1, 1, 1)), operation)
+    assert is_manifold(result)
+    assert volume(result) == pytest.approx(expected, abs=1e-4)
+
+
+@pytest.mark.parametrize("operation, expected", [("union", 16.0), ("intersection", 0.0), ("difference", 8.0)])
+def test_cubes_sharing_a_face(operation, expected):
+    result = boolean(box((2, 2, 2)), box((2, 2, 2), (2, 0, 0)), operation)
+    assert is_manifold(result)
+    assert volume(result) == pytest.approx(expected, abs=1e-4)
+
+
+def test_difference_of_identical_operands_is_empty():
+    cube = box((2, 2, 2))
+    assert len(boolean(cube, cube, "difference").faces) == 0
+    assert volume(boolean(cube, cube, "intersection")) == pytest.approx(8.0, abs=1e-4)
+
+
+def snapped_volume(mesh, quantum=0.001):
+    grid, faces = snap(mesh, quantum)
+    return volume(make_mesh(grid * quantum, faces))
+
+
+def test_crossing_cylinders():
+    x = cylinder(2, 10, 32, rotation=rotation_matrix(0, 90, 0))
+    y = cylinder(2, 10, 32, rotation=rotation_matrix(90, 0, 0))
+    union, common = boolean(x, y, "union"), boolean(x, y, "intersection")
+    assert is_manifold(union) and is_manifold(common)
+    # Операнды привязываются к сетке 1 мкм, поэтому сравниваем с объемами привязанных
+    assert volume(union) + volume(common) == pytest.approx(snapped_volume(x) + snapped_volume(y), rel=1e-6)
+
+
+def test_snap_merges_vertices_on_the_grid():
+    grid, faces = snap(box((2, 2, 2)), quantum=0.5)
+    assert grid.dtype == np.int64
+    assert np.abs(grid).max() == 2
+    assert len(faces) == 12
+
+
+def inside(mesh, points):
+    if not len(mesh.faces):
+        return np.zeros(len(points), dtype=bool)
+    return winding_numbers(points, mesh.vertices[mesh.faces]) > 0.5
+
+
+def check_chain(operands, operations, box_size=4.0):
+    """Цепочка операций слева направо: многообразие на каждом шаге и совпадение точек с эталоном."""
+    points = np.random.default_rng(0).uniform(-box_size, box_size, (3000, 3))
+    result, truth = operands[0], inside(operands[0], points)
+    for operand, operation in zip(operands[1:], operations):
+        result = boolean(result, operand, operation)
+        assert is_manifold(result)
+        other = inside(operand, points)
+        truth = {"union": truth | other, "intersection": truth & other, "difference": truth & ~other}[operation]
+    # Точки в пределах шага сетки от поверхностей могут расходиться
+    assert (inside(result, points) != truth).sum() <= 2
+    return result
+
+
+@pytest.mark.parametrize("rotation", [(90, 0, 0), (0, 90, 0)])
+def test_chained_union_with_coplanar_faces_and_cylinders(rotation):
+    operands = [box((1, 2, 3), (0, -1, 0.5)), box((2, 1, 3), (0.5, -1, 0)),
+                cylinder(0.5, 2, 16, (-1, -1, 0), rotation_matrix(90, 0, 0)),
+                cylinder(1, 4, 16, (1, -1, -1), rotation_matrix(*rotation))]
+    check_chain(operands, ["union"] * 3)
+
+
+def test_chained_coplanar_boxes():
+    # Ступеньки с общими гранями, затем вырез и пересечение по тем же плоскостям
+    operands = [box((2, 2, 2)), box((2, 2, 1), (2, 0, -0.5)), box((2, 2, 2), (1, 2, 0)),
+                box((1, 1, 2), (1, 1, 0)), box((4, 4, 2), (1, 1, 0))]
+    result = check_chain(operands, ["union", "union", "difference", "intersection"])
+    assert volume(result) == pytest.approx(18.25, abs=1e-4)
+
+
+def test_chained_boxes_sharing_edges():
+    # Кубы касаются только ребрами: ребро с четырьмя гранями разводится, объем сохраняется;
+    # малый куб задевает все три на 1/8
+    operands = [box((2, 2, 2)), box((2, 2, 2), (2, 2, 0)), box((2, 2, 2), (0, 2, 2)), box((1, 1, 1), (1, 1, 1))]
+    result = check_chain(operands, ["union", "union", "difference"])
+    assert volume(result) == pytest.approx(24 - 3 / 8, abs=1e-4)
+
+
+def test_chained_touching_cylinders():
+    # Восьмигранные цилиндры стоят вплотную: боковые грани совпадают
+    apothem = np.cos(np.pi / 8)
+    operands = [cylinder(1, 3, 8), cylinder(1, 3, 8, (2 * apothem, 0, 0)), cylinder(1, 3, 8, (apothem, 0, 1.5)),
+                box((1, 1, 1), (apothem, 0, 0))]
+    check_chain(operands, ["union", "union", "difference"])
+
+
+def test_open_operand_is_rejected():
+    cube = box((2, 2, 2))
+    open_cube = make_mesh(cube.vertices, cube.faces[:-1])
+    with pytest.raises((RuntimeError, ValueError)):
+        boolean(open_cube, box((2, 2, 2), (5, 0, 0)), "union")
@@ -0,0 +1,57 @@
+"""Упрощение: многообразие, число граней и отклонение от исходного меша."""
+import numpy as np
+import pytest
+
+from meshtools import watch
+from meshtools.csg import is_manifold
+from meshtools.decimate import decimate, main
+from meshtools.generators import CORNER_DEFAULTS, build_corner
+from meshtools.mesh_diff import compare_meshes
+from meshtools.primitives import box, sphere
+
+MESHES = {
+    "sphere": lambda: sphere(10, 48),
+    "corner": lambda: build_corner({**CORNER_DEFAULTS, "segments": 128}),
+}
+
+
+def diagonal(mesh):
+    return float(np.linalg.norm(mesh.vertices.max(axis=0) - mesh.vertices.min(axis=0)))
+
+
+@pytest.mark.parametrize("ratio", [0.5, 0.2])
+@pytest.mark.parametrize("name", MESHES)
+def test_target_faces(name, ratio):
+    mesh = MESHES[name]()
+    target = int(len(mesh.faces) * ratio)
+    result = decimate(mesh, target_faces=target)
+    assert is_manifold(result)
+    # Стягивание внутреннего ребра убирает две грани, поэтому возможен недобор на одну
+    assert target - 1 <= len(result.faces) <= target
+    assert compare_meshes(mesh, result).hausdorff < 0.03 * diagonal(mesh)
+
+
+@pytest.mark.parametrize("name", MESHES)
+def test_max_error(name):
+    mesh = MESHES[name]()
+    result = decimate(mesh, max_error=0.05)
+    assert is_manifold(result)
+    assert len(result.faces) < len(mesh.faces)
+    assert compare_meshes(mesh, result).hausdorff <= 0.1
+
+
+@pytest.mark.parametrize("mesh", [sphere(1, 32), box((1, 1, 1))])
+def test_closed_shell_stops_at_tetrahedron(mesh):
+    # Без особых ребер стягивать можно все, но замкнутая оболочка не вырождается в две грани
+    result = decimate(mesh, target_faces=0, feature_angle=180)
+    assert is_manifold(result)
+    assert len(result.faces) == 4
+    assert len(result.vertices) == 4
+
+
+@pytest.mark.parametrize("ratio", ["0", "-0.5", "1.5"])
+def test_bad_ratio_is_rejected(tmp_path, ratio):
+    with pytest.raises(SystemExit):
+        main(["missing.stl", "-o", str(tmp_path / "out.stl"), "--ratio", ratio])
+    with pytest.raises(SystemExit):
+        watch.main(["missing.json", "-o", str(tmp_path / "out.stl"), "--once", "--preview", ratio])
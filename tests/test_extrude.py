@@ -0,0 +1,83 @@
+"""Выдавливание и вращение: тела замкнуты и смотрят наружу при любом обходе контуров и знаке углов."""
+import numpy as np
+import pytest
+
+from meshtools.csg import is_manifold
+from meshtools.extrude import (Profile, annular_sector_profile, arc, circle, extrude, polygon, revolve,
+                               rounded_polygon)
+from meshtools.triangulate import signed_area
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+def area(profile):
+    return abs(signed_area(np.asarray(profile.outer))) - sum(abs(signed_area(np.asarray(h))) for h in profile.holes)
+
+
+def centroid(profile):
+    """Координата r центра тяжести профиля с отверстиями."""
+    moment = 0.0
+    for k, loop in enumerate([profile.outer, *profile.holes]):
+        x, y = loop[:, 0], loop[:, 1]
+        x1, y1 = np.roll(x, -1), np.roll(y, -1)
+        # Момент контура при обходе против часовой стрелки; отверстия вычитаются
+        part = ((x + x1) * (x * y1 - x1 * y)).sum() / 6 * np.sign(signed_area(loop))
+        moment += part if k == 0 else -part
+    return moment / area(profile)
+
+
+def check(mesh, expected=None, rel=1e-9):
+    assert is_manifold(mesh)
+    # Положительный объем - нормали наружу
+    assert volume(mesh) > 0
+    if expected is not None:
+        assert volume(mesh) == pytest.approx(expected, rel=rel)
+
+
+L_SHAPE = np.array([[0.0, 0.0], [4.0, 0.0], [4.0, 1.0], [1.0, 1.0], [1.0, 3.0], [0.0, 3.0]])
+
+PROFILES = {
+    "polygon": Profile(L_SHAPE),
+    "clockwise": Profile(L_SHAPE[::-1]),
+    "rounded": Profile(rounded_polygon(L_SHAPE, [0.0, 0.5, 0.3, 0.2, 0.3, 0.5], segments=6)),
+    "holes": Profile(polygon((0, 0), (6, 0), arc(1, 0, 180, 8, (5, 3)), (0, 3)),
+                     [circle(0.5, 12, (1.5, 1.5)), circle(0.5, 12, (3.5, 1.5))[::-1]]),
+    "sector": annular_sector_profile(2, 3, 30, 120, 16),
+    "sector_negative": annular_sector_profile(2, 3, 30, -120, 16),
+    "ring": annular_sector_profile(2, 3, 0, 360, 16),
+}
+
+
+@pytest.mark.parametrize("height", [2.5, -2.5])
+@pytest.mark.parametrize("name", PROFILES)
+def test_extrude(name, height):
+    profile = PROFILES[name]
+    check(extrude(profile, height, z=1.0), area(profile) * abs(height))
+
+
+@pytest.mark.parametrize("name", ["polygon", "clockwise", "rounded", "holes"])
+@pytest.mark.parametrize("start, sweep", [(0, 360), (0, -360), (20, 90), (20, -90), (-45, 300)])
+def test_revolve(name, start, sweep):
+    profile = PROFILES[name]
+    # Профиль сдвигается от оси; объем по теореме Паппа, сегментов достаточно для 1%
+    shift = np.array([1.0, 0.0])
+    moved = Profile(np.asarray(profile.outer) + shift, [np.asarray(h) + shift for h in profile.holes], profile.cap)
+    points = np.concatenate([moved.outer, *moved.holes])
+    assert points[:, 0].min() > 0
+    check(revolve(moved, 96, start, sweep), area(moved) * 2 * np.pi * centroid(moved) * abs(sweep) / 360, rel=1e-2)
+
+
+def test_rounded_polygon_keeps_orientation():
+    for points in (L_SHAPE, L_SHAPE[::-1]):
+        rounded = rounded_polygon(points, 0.25)
+        assert np.sign(signed_area(rounded)) == np.sign(signed_area(points))
+        # Скругление срезает углы: площадь меньше, но не больше чем на четверть круга на угол
+        assert abs(signed_area(points)) - len(points) * 0.25 ** 2 < abs(signed_area(rounded)) < abs(signed_area(points))
+
+
+def test_revolve_rejects_profile_on_axis():
+    with pytest.raises(ValueError):
+        revolve(Profile(L_SHAPE), 16)
@@ -0,0 +1,70 @@
+"""Хабы: многообразие, отверстия лучей открыты, одиночные лучи не выходят за сквозные трубки."""
+import numpy as np
+import pytest
+
+from meshtools.collision import winding_numbers
+from meshtools.csg import is_manifold
+from meshtools.hub import HUB_DEFAULTS, JOINT_RATIO, PRESETS, arm_layout, hub
+
+SHAPES = {**PRESETS, "Y": [(1, 0, 0), (-0.5, 0.866, 0), (-0.5, -0.866, 0)], "L": [(1, 0, 0), (0, 1, 0)]}
+
+
+def evenly_spaced(n):
+    angles = 2 * np.pi * np.arange(n) / n
+    return np.stack([np.cos(angles), np.sin(angles), np.zeros(n)], axis=1)
+
+
+def well_separated(seed, n, min_angle=45):
+    """Случайные лучи, попарно не ближе min_angle градусов."""
+    rng = np.random.default_rng(seed)
+    directions = []
+    while len(directions) < n:
+        d = rng.normal(size=3)
+        d /= np.linalg.norm(d)
+        if all(d @ other < np.cos(np.radians(min_angle)) for other in directions):
+            directions.append(d)
+    return np.array(directions)
+
+
+def check_hub(directions):
+    mesh = hub(directions)
+    assert is_manifold(mesh)
+
+    p = HUB_DEFAULTS
+    r_out = p["internal_diameter"] / 2 * p["external_diameter_ratio"]
+    axes, solids, _, through = arm_layout(directions, p)
+    inside = np.linalg.norm(mesh.vertices, axis=1) <= JOINT_RATIO * r_out + 1e-3 if not through.any() else False
+    for axis, (start, end) in zip(axes, solids):
+        along = mesh.vertices @ axis
+        radial = np.linalg.norm(mesh.vertices - along[:, None] * axis, axis=1)
+        inside = inside | ((along >= start - 1e-3) & (along <= end + 1e-3) & (radial <= r_out + 1e-3))
+    assert inside.all()
+
+    # Точки на осях лучей - в воздухе: стенки не перегораживают отверстия
+    d = np.asarray(directions, dtype=np.float64)
+    d /= np.linalg.norm(d, axis=1)[:, None]
+    points = np.concatenate([np.outer(np.linspace(0, p["arm_length"] + 1, 12), axis) for axis in d])
+    assert (np.abs(winding_numbers(points, mesh.vertices[mesh.faces])) < 0.5).all()
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_hub_is_closed_with_open_bores(name):
+    check_hub(SHAPES[name])
+
+
+@pytest.mark.parametrize("n", range(3, 9))
+def test_evenly_spaced_planar_hub(n):
+    # При четном n противоположные лучи становятся сквозными трубками
+    check_hub(evenly_spaced(n))
+
+
+@pytest.mark.parametrize("seed, n", [(0, 3), (1, 4), (2, 5), (3, 6)])
+def test_random_well_separated_hub(seed, n):
+    check_hub(well_separated(seed, n))
+
+
+def test_unknown_params_are_rejected():
+    with pytest.raises(ValueError):
+        hub(PRESETS["4+"], {"colour": 1})
+    with pytest.raises(ValueError):
+        hub(PRESETS["4+"], {"external_diameter_ratio": 1})
@@ -0,0 +1,43 @@
+"""Сравнение ревизий: расстояния против полного перебора, хаусдорфово расстояние и области изменений."""
+import numpy as np
+import pytest
+
+from meshtools.bvh import closest_point_on_triangles
+from meshtools.mesh import transformed, triangles
+from meshtools.mesh_diff import compare_meshes
+from meshtools.primitives import box, cylinder, rotation_matrix
+
+
+def brute_force(points, tris):
+    """Расстояния до поверхности перебором всех треугольников."""
+    k = len(points)
+    return np.min([np.linalg.norm(points - closest_point_on_triangles(points, *(np.tile(v, (k, 1)) for v in t)), axis=1)
+                   for t in tris], axis=0)
+
+
+def test_scaled_box():
+    reference = box((2, 2, 2))
+    candidate = transformed(reference, np.eye(3) * 1.01)
+    report = compare_meshes(reference, candidate, tolerance=0.001)
+    # Вершины нового куба снаружи старого на 0.01 по каждой оси, старого - внутри нового на 0.01
+    assert np.allclose(report.distances, 0.01 * np.sqrt(3))
+    assert np.allclose(report.reverse_distances, -0.01)
+    assert report.hausdorff == pytest.approx(0.01 * np.sqrt(3))
+    assert [region.vertex_count for region in report.regions] == [8]
+
+
+def test_distances_match_brute_force():
+    reference = cylinder(1.0, 2.0, 24)
+    candidate = transformed(cylinder(1.05, 2.1, 16), rotation_matrix(3, 5, 7), (0.02, -0.01, 0.03))
+    report = compare_meshes(reference, candidate, tolerance=0.01)
+    assert np.allclose(np.abs(report.distances), brute_force(candidate.vertices, triangles(reference)), atol=1e-6)
+    assert np.allclose(np.abs(report.reverse_distances), brute_force(reference.vertices, triangles(candidate)),
+                       atol=1e-6)
+    assert report.hausdorff == pytest.approx(max(np.abs(report.distances).max(), np.abs(report.reverse_distances).max()))
+
+
+def test_identical_meshes_have_no_regions():
+    mesh = cylinder(1.0, 2.0, 24)
+    report = compare_meshes(mesh, mesh)
+    assert report.hausdorff < 1e-9
+    assert report.regions == []
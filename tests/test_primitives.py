@@ -0,0 +1,58 @@
+"""Шаблоны примитивов: замкнутость, нормали наружу и объемы."""
+import numpy as np
+import pytest
+
+from meshtools.csg import is_manifold
+from meshtools.primitives import (annular_sector, box, cylinder, hollow_cylinder, sector_template, sphere,
+                                  unit_circle)
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+def polygon_area(segments, sweep_deg=360.0):
+    """Площадь вписанного многоугольника (или веера сектора) единичного радиуса."""
+    step = np.radians(sweep_deg) / segments
+    return segments * np.sin(step) / 2
+
+
+@pytest.mark.parametrize("segments", [3, 8, 33])
+def test_closed_templates_face_outward(segments):
+    meshes = [
+        (cylinder(2, 3, segments), 4 * polygon_area(segments) * 3),
+        (hollow_cylinder(3, 4, 2, segments), (4 - 1) * polygon_area(segments) * 3),
+        (sphere(1, segments), None),
+        (box((1, 2, 3), (5, 0, 0)), 6),
+    ]
+    for mesh, expected in meshes:
+        assert is_manifold(mesh)
+        # Положительный объем - нормали наружу
+        assert volume(mesh) > 0
+        if expected is not None:
+            assert volume(mesh) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("start, sweep", [(0, 90), (30, 270), (0, -90), (45, -300), (-10, 1)])
+@pytest.mark.parametrize("segments", [1, 7, 64])
+def test_sector_faces_outward_for_any_sweep(segments, start, sweep):
+    mesh = annular_sector(2, 3, 4, start, sweep, segments)
+    assert is_manifold(mesh)
+    assert volume(mesh) == pytest.approx((9 - 4) * polygon_area(segments, abs(sweep)) * 4)
+    # Отрицательный угол - та же дуга, пройденная от конца
+    mirror = annular_sector(2, 3, 4, start + sweep, -sweep, segments)
+    assert np.allclose(np.sort(mesh.vertices, axis=0), np.sort(mirror.vertices, axis=0))
+
+
+@pytest.mark.parametrize("sweep", [0, 360, -360, 400])
+def test_degenerate_sector_is_rejected(sweep):
+    with pytest.raises(ValueError):
+        sector_template(8, 0.0, float(sweep))
+
+
+def test_caches_are_bounded():
+    for start in range(300):
+        sector_template(4, float(start), 10.0)
+    assert sector_template.cache_info().currsize <= 256
+    assert unit_circle.cache_info().currsize <= 256
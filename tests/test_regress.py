@@ -0,0 +1,86 @@
+"""Регрессии: тест Манна - Уитни и пороги отметок."""
+import itertools
+
+import numpy as np
+import pytest
+
+from meshtools.regress import THRESHOLDS, check, mann_whitney_greater
+
+
+def exact_p(sample, baseline):
+    """Точное p-значение перебором всех разбиений объединенной выборки (ранги с усреднением)."""
+    pooled = np.concatenate([sample, baseline]).astype(np.float64)
+    ranks = np.array([(pooled < x).sum() + ((pooled == x).sum() + 1) / 2 for x in pooled])
+    n1 = len(sample)
+    observed = ranks[:n1].sum()
+    sums = [ranks[list(chosen)].sum() for chosen in itertools.combinations(range(len(pooled)), n1)]
+    return np.mean(np.array(sums) >= observed - 1e-9)
+
+
+def test_known_p_values():
+    # Без совпадений: U = 6 из 6, z = (6 - 3 - 0.5) / sqrt(3)
+    assert mann_whitney_greater([3, 4, 5], [1, 2]) == pytest.approx(0.0744573, abs=1e-6)
+    # Пять одинаковых значений: дисперсия 8 - 120 / 42, z = 2.5 / sqrt(5.142857)
+    assert mann_whitney_greater([2, 2, 3], [1, 2, 2, 2]) == pytest.approx(0.1351447, abs=1e-6)
+    # Обратное направление не значимо
+    assert mann_whitney_greater([1, 2], [3, 4, 5]) > 0.9
+
+
+@pytest.mark.parametrize("sample, baseline", [([1, 1, 1], [1, 1, 1]), ([], [1, 2]), ([1, 2], [])])
+def test_degenerate_samples(sample, baseline):
+    assert mann_whitney_greater(sample, baseline) == 1.0
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_close_to_exact_p_value(seed):
+    # Значения округлены до 0.1: совпадения встречаются; нормальное приближение на 7 и 6 точках - в пределах 0.02
+    rng = np.random.default_rng(seed)
+    sample = np.round(rng.normal(seed % 2, 1, 7), 1)
+    baseline = np.round(rng.normal(0, 1, 6), 1)
+    assert mann_whitney_greater(sample, baseline) == pytest.approx(exact_p(sample, baseline), abs=0.02)
+
+
+def entry(times, peak=10.0, rss=100.0, triangles=1000, deviation=None):
+    return {"times": list(times), "peak_alloc_mb": peak, "rss_mb": rss, "triangles": triangles,
+            "stl_bytes": 84 + 50 * triangles, "meshz_bytes": 5 * triangles, "deviation": deviation}
+
+
+BASE = [entry([1.00, 1.01, 0.99, 1.02, 0.98]) for _ in range(3)]
+
+
+def test_no_history_no_flags():
+    assert check(entry([5.0] * 5), []) == []
+
+
+def test_steady_record_is_not_flagged():
+    assert check(entry([1.0, 1.01, 0.99, 1.0, 1.02]), BASE) == []
+
+
+@pytest.mark.parametrize("factor, flagged", [(1.2, True), (1.05, False)])
+def test_slowdown_needs_both_significance_and_size(factor, flagged):
+    # Все новые времена больше всех прежних: p мало, решает порог роста медианы
+    record = entry(np.array([1.03, 1.04, 1.05, 1.06, 1.07]) * factor / 1.05)
+    flags = check(record, BASE)
+    assert any("замедление" in flag for flag in flags) == flagged
+
+
+def test_noisy_slowdown_is_not_flagged():
+    # Медиана выросла на 20%, но разброс перекрывает прежние времена
+    record = entry([0.7, 1.2, 1.5, 0.8, 1.25])
+    assert not any("замедление" in flag for flag in check(record, BASE))
+
+
+@pytest.mark.parametrize("field, value, flagged", [
+    ("peak", 12.5, True), ("peak", 11.5, False),
+    ("rss", 125.0, True), ("rss", 115.0, False), ("rss", None, False),
+    ("triangles", 1030, True), ("triangles", 1010, False),
+    ("deviation", 0.002, True), ("deviation", 0.0005, False), ("deviation", None, False),
+])
+def test_thresholds(field, value, flagged):
+    record = entry([1.0] * 5, **{field: value})
+    assert bool(check(record, BASE)) == flagged
+
+
+def test_custom_thresholds():
+    record = entry([1.0] * 5, triangles=1010)
+    assert check(record, BASE, {**THRESHOLDS, "bloat": 0.005})
@@ -0,0 +1,119 @@
+"""Сервис деталей: склейка одинаковых запросов, кэш результатов и коды ошибок HTTP."""
+import asyncio
+import json
+import os
+
+import pytest
+
+from meshtools import service
+from meshtools.generators import resolve_params
+
+PARAMS = {"segments": 16}
+
+
+@pytest.fixture
+def part_service(tmp_path):
+    svc = service.PartService(str(tmp_path), workers=2, executor="thread")
+    yield svc
+    svc.close()
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    original = service.build_part
+
+    def counting(*args):
+        calls.append(args[0])
+        return original(*args)
+
+    monkeypatch.setattr(service, "build_part", counting)
+    return calls
+
+
+def _status(response):
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+def test_concurrent_identical_requests_build_once(part_service, builds):
+    async def burst():
+        return await asyncio.gather(*[part_service.generate("vent_connector", PARAMS) for _ in range(8)])
+
+    results = asyncio.run(burst())
+    assert builds == ["vent_connector"]
+    assert sorted(source for _, source in results) == ["coalesced"] * 7 + ["miss"]
+    assert len({data for data, _ in results}) == 1
+    assert part_service.stats == {"hit": 0, "miss": 1, "coalesced": 7}
+
+
+def test_repeat_request_is_a_hit(part_service, builds):
+    first, source = asyncio.run(part_service.generate("vent_connector", PARAMS))
+    assert source == "miss"
+    second, source = asyncio.run(part_service.generate("vent_connector", PARAMS))
+    assert source == "hit"
+    assert first == second
+    assert len(builds) == 1
+    _, source = asyncio.run(part_service.generate("vent_connector", {"segments": 24}))
+    assert source == "miss"
+
+
+def test_results_cache_is_bounded(tmp_path, builds):
+    svc = service.PartService(str(tmp_path), executor="thread", max_bytes=1)
+    try:
+        asyncio.run(svc.generate("vent_connector", PARAMS))
+        asyncio.run(svc.generate("vent_connector", {"segments": 24}))
+        assert len(os.listdir(svc.results_dir)) == 0
+        _, source = asyncio.run(svc.generate("vent_connector", PARAMS))
+        assert source == "miss"
+    finally:
+        svc.close()
+
+
+@pytest.mark.parametrize("name, params, status", [
+    ("vent_connector", {"segments": 0}, 400),
+    ("vent_connector", {"segments": 2.5}, 400),
+    ("vent_connector", {"bore_diameter": -1}, 400),
+    ("vent_connector", {"body_height": 0}, 400),
+    ("vent_connector", {"colour": 1}, 400),
+    ("vent_connector", {"segments": "x"}, 400),
+    ("corner", {"missing_sector_end": 360}, 400),
+    ("hub_4+", {"colour": 1}, 400),
+    ("hub_4+", {"external_diameter_ratio": 1}, 400),
+    ("corner", {"inner_diameter": 35}, 400),
+    ("corner", {"external_diameter_ratio": 0.9}, 400),
+    ("six_ray_tube", {"external_diameter_ratio": 1}, 400),
+    ("vent_connector", {"bore_diameter": 95}, 400),
+    ("vent_connector", {"lip_diameter": 90}, 400),
+    ("vent_connector", {"flange_diameter": 92}, 400),
+    ("vent_connector", {"flange_height": 40}, 400),
+    ("no_such_part", {}, 404),
+])
+def test_bad_requests(part_service, builds, name, params, status):
+    response = asyncio.run(service._dispatch(part_service, "POST", f"/generate/{name}", json.dumps(params).encode()))
+    code, body = _status(response)
+    assert code == status
+    assert "error" in json.loads(body)
+    assert builds == []
+
+
+def test_unknown_path_and_format(part_service):
+    assert _status(asyncio.run(service._dispatch(part_service, "GET", "/nowhere", b"")))[0] == 404
+    response = asyncio.run(service._dispatch(part_service, "POST", "/generate/corner?format=obj", b"{}"))
+    assert _status(response)[0] == 400
+
+
+def test_negative_offsets_are_allowed():
+    assert resolve_params("corner", {"z_offset": -2, "missing_sector_start": -45})["z_offset"] == -2
+
+
+def test_build_errors_are_500(part_service, monkeypatch):
+    # KeyError изнутри сборки - ошибка сервиса, а не неизвестный генератор
+    def broken(*args):
+        raise KeyError("step")
+
+    monkeypatch.setattr(service, "build_part", broken)
+    response = asyncio.run(service._dispatch(part_service, "POST", "/generate/vent_connector", b"{}"))
+    code, body = _status(response)
+    assert code == 500
+    assert "KeyError" in json.loads(body)["error"]
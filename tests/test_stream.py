@@ -0,0 +1,85 @@
+"""Потоковый конвейер: результат совпадает со сборкой в памяти, крышки отдаются по ходу потока."""
+import numpy as np
+import pytest
+
+from meshtools.buildgraph import BuildGraph
+from meshtools.clip import clip_plane, cut_slab as cut_slab_in_memory
+from meshtools.csg import is_manifold
+from meshtools.generators import CORNER_DEFAULTS, SIX_RAY_DEFAULTS, SIX_RAY_STEPS, build_corner
+from meshtools.mesh import from_triangles, merge
+from meshtools.mesh_diff import compare_meshes
+from meshtools.primitives import annular_sector, hollow_cylinder
+from meshtools.stream import (DEFAULT_CHUNK, clip, corner_chunks, cut_slab, sector_chunks, six_ray_chunks,
+                              tube_grid_chunks, write_stl_stream)
+from meshtools.stl_io import read_stl
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+def check_same(chunks, expected):
+    mesh = from_triangles(np.concatenate(list(chunks)))
+    assert is_manifold(mesh)
+    assert volume(mesh) == pytest.approx(volume(expected), rel=1e-9)
+    assert compare_meshes(expected, mesh).hausdorff < 1e-6
+
+
+@pytest.mark.parametrize("chunk", [50, 1000, DEFAULT_CHUNK])
+def test_corner_matches_in_memory_build(chunk):
+    params = {**CORNER_DEFAULTS, "segments": 96, "missing_sector_start": 200.0, "missing_sector_end": 30.0}
+    check_same(corner_chunks(params, chunk), build_corner(params))
+
+
+@pytest.mark.parametrize("chunk", [50, DEFAULT_CHUNK])
+def test_six_ray_tube_matches_in_memory_build(chunk):
+    with BuildGraph(SIX_RAY_STEPS) as graph:
+        expected = graph.build(SIX_RAY_DEFAULTS)
+    check_same(six_ray_chunks(SIX_RAY_DEFAULTS, chunk), expected)
+
+
+@pytest.mark.parametrize("sweep", [120.0, -250.0])
+def test_sector_matches_annular_sector(sweep):
+    expected = annular_sector(2, 3, 4, 30, sweep, 17)
+    check_same(sector_chunks(2, 3, 4, 30, sweep, 17, chunk=40), expected)
+
+
+def plate(nx, ny, pitch=5.0, height=10.0, segments=32):
+    x = (np.arange(nx) - (nx - 1) / 2) * pitch
+    y = (np.arange(ny) - (ny - 1) / 2) * pitch
+    return merge(hollow_cylinder(height, 4.99, 2.85, segments, (i, j, height / 2)) for j in y for i in x)
+
+
+@pytest.mark.parametrize("chunk", [100, 256, DEFAULT_CHUNK])
+def test_plate_clip_and_slab_match_in_memory(chunk):
+    expected = plate(4, 3)
+    check_same(clip(tube_grid_chunks(4, 3, 5.0, 4.99, 2.85, 10.0, 32, chunk), (0, 0, 1), 7.5),
+               clip_plane(expected, (0, 0, 1), 7.5))
+    check_same(cut_slab(tube_grid_chunks(4, 3, 5.0, 4.99, 2.85, 10.0, 32, chunk), 2.0, 3.5),
+               cut_slab_in_memory(expected, 2.0, 3.5))
+
+
+def test_caps_are_emitted_while_streaming():
+    # Кусок вмещает одну трубку целиком: крышка каждой трубки выходит сразу за ней, а не в конце потока
+    consumed = []
+
+    def source():
+        for k, tris in enumerate(tube_grid_chunks(3, 3, 5.0, 4.99, 2.85, 10.0, 32, chunk=256)):
+            consumed.append(k)
+            yield tris
+
+    caps = []
+    for tris in clip(source(), (0, 0, 1), 7.5):
+        if len(tris) and np.all(tris[:, :, 2] == 7.5):
+            caps.append((len(consumed), len(tris)))
+    assert [count for count, _ in caps] == list(range(1, 10))
+    assert all(size == caps[0][1] for _, size in caps)
+
+
+def test_write_stl_stream(tmp_path):
+    path = str(tmp_path / "plate.stl")
+    count = write_stl_stream(path, clip(tube_grid_chunks(2, 2, 5.0, 4.99, 2.85, 10.0, 16, chunk=100), (0, 0, 1), 4.0))
+    mesh = read_stl(path)
+    assert len(mesh.faces) == count
+    assert is_manifold(mesh)
@@ -0,0 +1,92 @@
+"""3MF: экспорт и чтение обратно, матрицы сборки и компонентов, зеркальные матрицы."""
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from meshtools.archive import read_archive
+from meshtools.csg import is_manifold
+from meshtools.export import export_parts
+from meshtools.mesh import transformed
+from meshtools.primitives import box, cylinder, rotation_matrix
+from meshtools.stl_io import read_stl
+from meshtools.threemf_io import CONTENT_TYPES, MODEL_PATH, RELATIONSHIPS, model_xml, read_3mf, read_3mf_objects
+
+
+def volume(mesh):
+    tris = mesh.vertices[mesh.faces]
+    return np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])).sum() / 6
+
+
+def face_keys(mesh, atol):
+    """Треугольники с учетом обхода, с точностью до циклического сдвига и порядка граней."""
+    rows = []
+    for tri in np.round(mesh.vertices[mesh.faces] / atol).astype(np.int64).tolist():
+        # Начинаем с лексикографически меньшей вершины - сдвиг сохраняет обход
+        k = tri.index(min(tri))
+        rows.append(tri[k:] + tri[:k])
+    return sorted(rows)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_export_and_read_back(tmp_path, workers):
+    parts = [cylinder(2, 5, 24, (1.25, -3.5, 0.125), rotation_matrix(30, 0, 10)), box((1, 2, 3), (4, 5, 6))]
+    paths = [str(tmp_path / f"part{k}{ext}") for k in range(2) for ext in (".3mf", ".stl", ".meshz")]
+    sizes = export_parts([(path, parts[k // 3]) for k, path in enumerate(paths)], workers=workers, fsync=False)
+    assert sizes == [os.path.getsize(path) for path in paths]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths)
+    for k, path in enumerate(paths):
+        original = parts[k // 3]
+        if path.endswith(".3mf"):
+            restored = read_3mf(path)
+        elif path.endswith(".stl"):
+            restored = read_stl(path)
+        else:
+            restored = read_archive(path)[0]
+        assert is_manifold(restored)
+        # STL хранит float32, 3MF - 6 знаков после запятой, архив - сетку 1 мкм
+        assert volume(restored) == pytest.approx(volume(original), rel=1e-4)
+        assert np.abs(np.sort(restored.vertices, axis=0) - np.sort(original.vertices, axis=0)).max() < 1e-3
+
+
+def write_model(path, xml):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        archive.writestr(MODEL_PATH, xml)
+
+
+def matrix_text(matrix, translation):
+    """Матрица 3MF: строки - образы базисных векторов (строка-вектор умножается справа)."""
+    return " ".join(f"{value:.9g}" for value in [*np.asarray(matrix).T.ravel(), *translation])
+
+
+MIRROR_X = np.diag([-1.0, 1.0, 1.0])
+TURN = rotation_matrix(0, 0, 90)
+
+
+@pytest.mark.parametrize("component, item", [
+    (np.eye(3), np.eye(3)),
+    (TURN, np.eye(3)),
+    (MIRROR_X, np.eye(3)),
+    (np.eye(3), MIRROR_X @ TURN),
+    (MIRROR_X, MIRROR_X),
+    (np.diag([2.0, -1.0, 0.5]), TURN),
+])
+def test_transforms_keep_normals_outward(tmp_path, component, item):
+    part = box((1, 2, 3), (1, 0, 0))
+    xml = model_xml([("part", part)])
+    # Объект 2 - сборка из объекта 1 с матрицей компонента; в сборку модели попадает он с матрицей элемента
+    assembly = (f'<object id="2" type="model"><components><component objectid="1" '
+                f'transform="{matrix_text(component, (0.5, 0, 0))}"/></components></object>')
+    xml = xml.replace("</resources>", assembly + "</resources>")
+    xml = xml.replace('<item objectid="1"/>', f'<item objectid="2" transform="{matrix_text(item, (0, 0, 7))}"/>')
+    path = str(tmp_path / "model.3mf")
+    write_model(path, xml)
+
+    (mesh,) = read_3mf_objects(path)
+    expected = transformed(transformed(part, component, (0.5, 0, 0)), item, (0, 0, 7))
+    assert is_manifold(mesh)
+    assert volume(mesh) == pytest.approx(6 * abs(np.linalg.det(component) * np.linalg.det(item)))
+    assert face_keys(mesh, 1e-6) == face_keys(expected, 1e-6)
@@ -0,0 +1,68 @@
+"""Триангуляция: площадь сохраняется, треугольники против часовой, отверстия не закрываются."""
+import numpy as np
+import pytest
+
+from meshtools.triangulate import SMALL_POLYGON, group_loops, points_in_polygon, signed_area, triangulate
+
+
+def square(size, center=(0.0, 0.0)):
+    half = size / 2
+    return np.array([[-half, -half], [half, -half], [half, half], [-half, half]]) + center
+
+
+def star(points, seed):
+    """Звездчатый (невыпуклый) многоугольник против часовой стрелки."""
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, points))
+    radii = rng.uniform(0.3, 1.0, points)
+    return np.stack([radii * np.cos(angles), radii * np.sin(angles)], axis=1)
+
+
+def check(outer, holes=()):
+    coords = np.concatenate([outer, *holes]) if holes else outer
+    tris = triangulate(outer, holes)
+    a, b, c = coords[tris[:, 0]], coords[tris[:, 1]], coords[tris[:, 2]]
+    areas = ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])) / 2
+    assert (areas >= 0).all()
+    expected = abs(signed_area(outer)) - sum(abs(signed_area(h)) for h in holes)
+    assert areas.sum() == pytest.approx(expected)
+    # Центры треугольников не попадают в отверстия
+    centers = (a + b + c) / 3
+    for hole in holes:
+        assert not points_in_polygon(centers[areas > 1e-12], hole).any()
+    return tris
+
+
+@pytest.mark.parametrize("points", [5, SMALL_POLYGON, 200])
+@pytest.mark.parametrize("seed", range(4))
+def test_star_polygons(points, seed):
+    tris = check(star(points, seed))
+    assert len(tris) == points - 2
+
+
+@pytest.mark.parametrize("points", [5, 200])
+def test_clockwise_input(points):
+    check(star(points, 0)[::-1])
+
+
+def test_square_with_holes():
+    # Отверстия в любом обходе, одно из них касается внешнего контура по x
+    holes = [square(1, (-1.5, 0)), square(1, (1.5, 0))[::-1], star(40, 1) * 0.4]
+    check(square(5), holes)
+
+
+def test_degenerate_polygon():
+    assert triangulate(np.array([[0.0, 0.0], [1.0, 0.0]])).shape == (0, 3)
+
+
+def test_group_loops_nesting():
+    # Внешний контур, отверстие в нем, остров в отверстии и отдельный контур рядом
+    loops = [square(10), square(6), square(2), square(1, (20, 0))]
+    groups = sorted(group_loops(loops))
+    assert groups == [(0, [1]), (2, []), (3, [])]
+
+
+def test_points_in_polygon():
+    polygon = square(2)
+    inside = points_in_polygon(np.array([[0.0, 0.0], [0.9, -0.9], [1.1, 0.0], [0.0, 5.0]]), polygon)
+    assert inside.tolist() == [True, True, False, False]
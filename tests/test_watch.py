@@ -0,0 +1,51 @@
+"""Режим наблюдения: атомарная запись и код выхода разовой сборки."""
+import json
+import os
+
+import pytest
+
+from meshtools import watch
+from meshtools.primitives import box
+from meshtools.stl_io import read_stl
+
+
+def write_params(path, params):
+    path.write_text(json.dumps({"generator": "vent_connector", "params": params}), encoding="utf-8")
+    return str(path)
+
+
+def test_once_builds_part_and_preview(tmp_path):
+    params = write_params(tmp_path / "vent.json", {"segments": 12})
+    output = str(tmp_path / "vent.stl")
+    assert watch.main([params, "-o", output, "--once", "--preview", "0.5"]) == 0
+    part, preview = read_stl(output), read_stl(watch.preview_path(output))
+    # У переходника почти все ребра острые, поэтому упрощение не доходит до половины
+    assert 0 < len(preview.faces) < len(part.faces)
+    assert sorted(os.listdir(tmp_path)) == ["vent.json", "vent.preview.stl", "vent.stl"]
+
+
+@pytest.mark.parametrize("params", [{"segments": 2}, {"colour": 1}, {"bore_diameter": 200.0}])
+def test_once_fails_on_bad_params(tmp_path, params):
+    output = str(tmp_path / "vent.stl")
+    assert watch.main([write_params(tmp_path / "vent.json", params), "-o", output, "--once"]) == 1
+    assert not os.path.exists(output)
+
+
+def test_once_fails_on_missing_file(tmp_path):
+    assert watch.main([str(tmp_path / "missing.json"), "-o", str(tmp_path / "out.stl"), "--once"]) == 1
+
+
+def test_failed_write_keeps_old_result(tmp_path, monkeypatch):
+    output = tmp_path / "part.stl"
+    output.write_bytes(b"old")
+
+    def broken_write(path, mesh):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(watch, "write_stl", broken_write)
+    with pytest.raises(OSError):
+        watch.write_atomic(str(output), box((1, 1, 1)))
+    assert output.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["part.stl"]